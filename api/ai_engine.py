@@ -2,20 +2,30 @@
 # Script Name: ai_engine.py
 # Script Location: /opt/RealmQuest/api/ai_engine.py
 # Date: 2026-01-26
-# Version: 18.17.0
-# About: Multimodal Engine (Text, Image, & Gemini Audio)
+# Version: 18.21.1
+# About: Multimodal Engine (Text, Image, & Gemini Audio). Named SRD entities are looked up
+#        in-process; federated RAG (rules, physics, dictionary + BM25, rank-fused) covers the rest,
+#        from a local NumPy index while Chroma is unreachable.
 # ===============================================================
 
 import os
 import requests
 import uuid
 import base64
+import threading
+import time
 from datetime import datetime
 import chromadb
 from google import genai
 from google.genai import types
 from openai import OpenAI
 
+import srd_lookup
+from retrieval import Retriever, format_context
+from srd_chunker import guess_categories
+
+CHROMA_RETRY_S = float(os.getenv("RQ_CHROMA_RETRY_S", "30"))
+
 class AIEngine:
     def __init__(self):
         self.gemini_key = os.getenv("GEMINI_API_KEY")
@@ -23,13 +33,13 @@ class AIEngine:
         self.model_name = os.getenv("GEMINI_MODEL", "gemini-2.0-flash-exp")
         
         # --- RAG SETUP ---
-        self.chroma_client = None
-        self.rules_collection = None
-        try:
-            self.chroma_client = chromadb.HttpClient(host="realmquest-chroma", port=8000)
-            self.rules_collection = self.chroma_client.get_or_create_collection("dnd_rules")
-            print("✅ RAG: Connected to ChromaDB")
-        except: print("⚠️ RAG: Chroma Offline")
+        # Chroma may be down at startup or go away later: a watchdog reconnects, and until it
+        # does retrieval runs on the local NumPy export (vector_index).
+        self.chroma_client = self._connect_chroma()
+        print("✅ RAG: Connected to ChromaDB" if self.chroma_client else "⚠️ RAG: Chroma Offline (local vector index)")
+        self.retriever = Retriever(self.chroma_client)
+        self.retriever.warm()
+        threading.Thread(target=self._chroma_watchdog, name="rq-chroma-watchdog", daemon=True).start()
 
         # --- CLIENTS ---
         self.google_client = None
@@ -46,16 +56,54 @@ class AIEngine:
                 print("✅ AI: OpenAI Client Ready")
             except: pass
 
+    # --- RAG CONNECTION ---
+    def _connect_chroma(self):
+        try:
+            client = chromadb.HttpClient(host="realmquest-chroma", port=8000)
+            client.heartbeat()
+            return client
+        except Exception:
+            return None
+
+    def _chroma_watchdog(self):
+        while True:
+            time.sleep(CHROMA_RETRY_S)
+            if self.chroma_client is not None:
+                try:
+                    self.chroma_client.heartbeat()
+                    continue
+                except Exception:
+                    print("⚠️ RAG: Chroma lost; serving from the local vector index")
+                    self.chroma_client = None
+                    self.retriever.set_client(None)
+                    continue
+            client = self._connect_chroma()
+            if client is not None:
+                print("✅ RAG: Chroma back; switching retrieval to it")
+                self.chroma_client = client
+                self.retriever.set_client(client)
+
     # --- TEXT / STORY ---
-    def generate_story(self, system_prompt, user_prompt):
-        """Generates text response using RAG + Gemini/OpenAI"""
+    def generate_story(self, system_prompt, user_prompt, rag_query=None, categories=None):
+        """Generates text response using RAG + Gemini/OpenAI.
+
+        rag_query: text to retrieve rules for (defaults to the whole prompt).
+        categories: SRD categories to search (srd_chunker.CATEGORIES); None = guessed from the query.
+        """
         context_text = ""
-        if self.rules_collection:
+        if rag_query:
+            # Exact SRD entries for entities the player named; vector search only when none match.
+            hints = categories if categories is not None else guess_categories(rag_query)
+            entries = srd_lookup.lookup(rag_query, hints)
+            if entries:
+                context_text = "\nRELEVANT RULES (SRD):\n" + "\n".join(f"[{e.category} {e.ruleset}] {e.doc}" for e in entries)
+        if not context_text:
+            query = rag_query or user_prompt
+            cats = categories if categories is not None else guess_categories(query)
             try:
-                results = self.rules_collection.query(query_texts=[user_prompt], n_results=2)
-                if results['documents']:
-                    context_text = "\nRELEVANT RULES:\n" + "\n".join(results['documents'][0])
-            except: pass
+                context_text = format_context(self.retriever.retrieve(query, cats))
+            except Exception as e:
+                print(f"⚠️ RAG retrieval failed: {e}")
 
         full_prompt = f"{user_prompt}\n{context_text}"
 
@@ -132,7 +180,14 @@ class AIEngine:
             file_path = os.path.join(assets_dir, filename)
 
             img_data = requests.get(image_url).content
-            with open(file_path, 'wb') as handler: handler.write(img_data)
+            # Temp file + rename: the old inode may be hardlinked into campaign snapshots/forks
+            # (campaign_snapshots.clone_tree), so it must be replaced, never truncated.
+            tmp_path = f"{file_path}.{uuid.uuid4().hex[:8]}.tmp"
+            try:
+                with open(tmp_path, 'wb') as handler: handler.write(img_data)
+                os.replace(tmp_path, file_path)
+            finally:
+                if os.path.exists(tmp_path): os.remove(tmp_path)
             
             return filename, None
         except Exception as e:
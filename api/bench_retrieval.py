@@ -0,0 +1,98 @@
+#===============================================================
+#Script Name: bench_retrieval.py
+#Script Location: /opt/RealmQuest/api/bench_retrieval.py
+#Date: 10/19/2026
+#Created By: T03KNEE
+#Github: https://github.com/To3Knee/RealmQuest
+#Version: 1.0.0
+#About: Benchmark: Chroma HTTP query vs the embedded NumPy index (vector_index).
+#       Run inside the API container after bootstrap has exported vectors:
+#         docker exec -it realmquest-api python bench_retrieval.py [--collection dnd_rules] [-k 6]
+#       Query embeddings are computed once up front so both paths time search only;
+#       agreement is the overlap of the two top-k id sets.
+#===============================================================
+
+import argparse
+import statistics
+import time
+
+import chromadb
+
+import vector_index
+from retrieval import Retriever
+
+QUERIES = [
+    "how does grappling work", "what does fireball do", "goblin armor class", "can I cast two spells in one turn",
+    "falling damage", "opportunity attack when I move away", "how long does a short rest take",
+    "what happens at zero hit points", "stealth check to hide behind cover", "how much does a longsword cost",
+    "prone condition attack rolls", "concentration saving throw after damage", "dragon breath weapon recharge",
+    "ranged attack in melee disadvantage", "how do I level up my wizard", "potion of healing dice",
+    "underwater combat rules", "exhaustion levels", "two weapon fighting bonus action", "counterspell range",
+]
+
+
+def _pct(samples, p):
+    s = sorted(samples)
+    return s[min(len(s) - 1, int(round(p / 100.0 * (len(s) - 1))))]
+
+
+def _report(label, samples_ms):
+    print(f"{label:<28} p50 {_pct(samples_ms, 50):8.3f} ms   p95 {_pct(samples_ms, 95):8.3f} ms   mean {statistics.mean(samples_ms):8.3f} ms")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--collection", default="dnd_rules")
+    ap.add_argument("-k", type=int, default=6)
+    ap.add_argument("--rounds", type=int, default=5)
+    args = ap.parse_args()
+
+    idx = vector_index.get_index(args.collection)
+    if idx is None:
+        print(f"❌ No local export for {args.collection} in {vector_index.VECTOR_DIR} (run bootstrap.py)")
+        return
+    print(f"📦 Local index: {len(idx)} x {idx.matrix.shape[1]} ({idx.matrix.nbytes / 1e6:.1f} MB mmap)")
+
+    retriever = Retriever(None)
+    t = time.perf_counter()
+    embeddings = [retriever.embed(q, idx.provider) for q in QUERIES]
+    print(f"🧠 Embedded {len(QUERIES)} queries in {(time.perf_counter() - t) * 1000:.1f} ms (not included below)")
+
+    local = []
+    for _ in range(args.rounds):
+        for e in embeddings:
+            t = time.perf_counter()
+            idx.query(e, args.k)
+            local.append((time.perf_counter() - t) * 1000)
+    _report("numpy single query", local)
+
+    t = time.perf_counter()
+    for _ in range(args.rounds):
+        idx.search(embeddings, args.k)
+    per_q = (time.perf_counter() - t) * 1000 / (args.rounds * len(embeddings))
+    print(f"{'numpy batched (per query)':<28} mean {per_q:8.3f} ms")
+
+    try:
+        client = chromadb.HttpClient(host="realmquest-chroma", port=8000)
+        coll = client.get_collection(args.collection)
+    except Exception as e:
+        print(f"⚠️ Chroma unreachable ({e}); local numbers only")
+        return
+
+    remote, agree = [], []
+    for r in range(args.rounds):
+        for q_emb in embeddings:
+            t = time.perf_counter()
+            res = coll.query(query_embeddings=[q_emb], n_results=args.k, include=[])
+            remote.append((time.perf_counter() - t) * 1000)
+            if r == 0:
+                want = set((res.get("ids") or [[]])[0])
+                got = {i for i, _, _, _ in idx.query(q_emb, args.k)}
+                agree.append(len(want & got) / max(1, len(want)))
+    _report("chroma http query", remote)
+    print(f"{'top-k agreement':<28} {statistics.mean(agree) * 100:6.1f} %")
+    print(f"{'speedup (p50)':<28} {_pct(remote, 50) / max(_pct(local, 50), 1e-6):6.1f} x")
+
+
+if __name__ == "__main__":
+    main()
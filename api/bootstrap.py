@@ -1,68 +1,200 @@
 # ==============================================================================
-# Script Name: bootstrap.py (v19.5 - Clean Ingest)
-# Description: Ingests Rules & Physics. SILENCES duplicate errors.
+# Script Name: bootstrap.py (v19.10 - Manifest checked against Chroma)
+# Description: Ingests Rules & Physics. Content-hashed: only changed items are re-embedded.
+#              The Mongo manifest is only trusted while Chroma still holds what it lists, and
+#              entries for deleted rules files are pruned (with their Chroma ids).
+#              SRD items are chunked per entity with category metadata (srd_chunker).
+#              Compiles the memory-mappable SRD bundle (srd_bundle) for in-process readers and
+#              exports collection embeddings for the offline vector fallback (vector_index).
 # ==============================================================================
 import os
 import json
 import glob
 import re
+import time
+import hashlib
 import chromadb
-from pymongo import MongoClient
 
-MONGO_URL = "mongodb://realmquest-mongo:27017/"
+from database import get_db
+from srd_chunker import chunk_items
+import srd_bundle
+import vector_index
+from retrieval import COLLECTIONS, EMBED_PROVIDERS
+
 CHROMA_HOST = "realmquest-chroma"
 CHROMA_PORT = 8000
 CAMPAIGN_ROOT = os.getenv("CAMPAIGN_ROOT", "/campaigns")
 RULES_ROOT = os.getenv("RULES_ROOT", "/rules")
 
+# Bump when document/metadata construction changes: every item hash moves and is re-embedded.
+INGEST_VERSION = 2
+INGEST_BATCH = int(os.getenv("RQ_INGEST_BATCH", "256"))
+# /rules is mounted read-only, so the per-file / per-item hash manifest lives in Mongo.
+MANIFEST_COLLECTION = "rules_ingest_manifest"
+
 print("⚡ BOOTSTRAP: Initializing...")
 
 try:
-    mongo = MongoClient(MONGO_URL, serverSelectionTimeoutMS=2000)
-    db = mongo["realmquest"]
+    db = get_db()
     chroma = chromadb.HttpClient(host=CHROMA_HOST, port=CHROMA_PORT)
     print("✅ Databases Connected")
 except:
     chroma = None
     print("⚠️ DB Connection Weak")
 
+def _ruleset_of(filepath):
+    """'2014' / '2024' from rules/<year>/file.json ('core' for files at the rules root)."""
+    rel = os.path.relpath(os.path.dirname(filepath), RULES_ROOT)
+    return "core" if rel in (".", "") else rel.replace(os.sep, "/")
+
+def _item_hash(doc, meta):
+    raw = json.dumps([INGEST_VERSION, doc, meta], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+def _file_items(ruleset, filepath, data):
+    """{id: (doc, meta)} for one rules file. Ids are namespaced by ruleset so 2014/2024 never collide.
+    Documents/metadata come from srd_chunker (one field-aware chunk per entity, rule sections split)."""
+    return {c.id: (c.doc, c.meta) for c in chunk_items(ruleset, filepath, data)}
+
+def _load_manifest():
+    if db is None: return {}
+    try:
+        return {d["_id"]: d for d in db[MANIFEST_COLLECTION].find({"collection": "dnd_rules"})}
+    except Exception as e:
+        print(f"⚠️ Ingest manifest unavailable ({e}); falling back to Chroma metadata hashes")
+        return {}
+
+def _save_manifest(key, entry):
+    if db is None: return
+    try:
+        db[MANIFEST_COLLECTION].replace_one({"_id": key}, entry, upsert=True)
+    except Exception as e:
+        print(f"⚠️ Ingest manifest write failed for {key}: {e}")
+
+def _chroma_hashes(collection, ids):
+    """Per-item hashes already stored in Chroma (used when the Mongo manifest is missing)."""
+    out = {}
+    for i in range(0, len(ids), INGEST_BATCH):
+        got = collection.get(ids=ids[i:i + INGEST_BATCH], include=["metadatas"])
+        for uid, meta in zip(got.get("ids") or [], got.get("metadatas") or []):
+            if meta and meta.get("content_hash"): out[uid] = meta["content_hash"]
+    return out
+
+def _manifest_matches_chroma(collection, manifest):
+    """False when Chroma lost items the manifest lists (volume reset, collection dropped)."""
+    ids = [uid for entry in manifest.values() for uid in (entry.get("items") or {})]
+    if not ids: return True
+    try:
+        if collection.count() < len(ids): return False
+        # Count alone can be masked by extra (legacy) ids; spot-check ids spread across files.
+        probe = ids[::max(1, len(ids) // 64)][:64]
+        return len(collection.get(ids=probe, include=[]).get("ids") or []) == len(probe)
+    except Exception as e:
+        print(f"⚠️ Manifest check against Chroma failed ({e}); re-checking every item")
+        return False
+
+def _prune_manifest(collection, manifest, seen, summary):
+    """Rules files that no longer exist: drop their Chroma ids and manifest entries."""
+    for key, entry in manifest.items():
+        if key in seen: continue
+        ids = list(entry.get("items") or {})
+        try:
+            for i in range(0, len(ids), INGEST_BATCH):
+                collection.delete(ids=ids[i:i + INGEST_BATCH])
+            if db is not None: db[MANIFEST_COLLECTION].delete_one({"_id": key})
+            summary["removed"] += len(ids)
+            summary["pruned"] += 1
+        except Exception as e:
+            print(f"⚠️ Could not prune {key}: {e}")
+
+def _purge_legacy_ids(collection):
+    """Drop pre-namespacing ids ('<file>.json_<Name>') left by older bootstraps."""
+    try:
+        ids = collection.get(include=[]).get("ids") or []
+        legacy = [i for i in ids if ".json_" in i and ":" not in i]
+        for i in range(0, len(legacy), INGEST_BATCH):
+            collection.delete(ids=legacy[i:i + INGEST_BATCH])
+        if legacy: print(f"   Removed {len(legacy)} legacy (un-namespaced) rule ids")
+    except Exception as e:
+        print(f"⚠️ Legacy id cleanup skipped: {e}")
+
 def ingest_json_rules():
     if not chroma: return
     print(f"📚 Scanning JSON Rules in {RULES_ROOT}...")
     collection = chroma.get_or_create_collection("dnd_rules")
-    
-    count = 0
     if not os.path.exists(RULES_ROOT): return
 
-    for filepath in glob.glob(f"{RULES_ROOT}/**/*.json", recursive=True):
+    started = time.time()
+    loaded = _load_manifest()
+    manifest = loaded
+    if loaded and not _manifest_matches_chroma(collection, loaded):
+        # Item hashes are then read back from Chroma, so only what is missing gets re-embedded.
+        print("⚠️ Chroma is missing items the ingest manifest lists; re-checking every rules file")
+        manifest = {}
+    if not manifest: _purge_legacy_ids(collection)
+    summary = {"files": 0, "files_unchanged": 0, "updated": 0, "skipped": 0, "removed": 0, "failed": 0, "pruned": 0}
+    seen = set()
+
+    for filepath in sorted(glob.glob(f"{RULES_ROOT}/**/*.json", recursive=True)):
+        summary["files"] += 1
+        ruleset = _ruleset_of(filepath)
+        key = f"dnd_rules::{ruleset}/{os.path.basename(filepath)}"
+        seen.add(key)
         try:
-            with open(filepath, 'r') as f:
-                data = json.load(f)
-                if isinstance(data, list):
-                    # DE-DUPLICATION LOGIC
-                    unique_items = {}
-                    for item in data:
-                        if 'name' in item and 'desc' in item:
-                            # Create ID based on filename + item name
-                            uid = f"{os.path.basename(filepath)}_{item['name']}".replace(" ", "_")
-                            # If ID exists in this batch, skip it (wins last write)
-                            unique_items[uid] = {
-                                "doc": f"{item['name']}: {item['desc']}",
-                                "meta": {"source": "SRD", "file": os.path.basename(filepath)}
-                            }
-                    
-                    if unique_items:
-                        ids = list(unique_items.keys())
-                        docs = [v["doc"] for v in unique_items.values()]
-                        metas = [v["meta"] for v in unique_items.values()]
-                        
-                        # Upsert batch
-                        collection.upsert(ids=ids, documents=docs, metadatas=metas)
-                        count += len(ids)
+            with open(filepath, 'rb') as f: raw = f.read()
+            file_hash = hashlib.sha256(raw).hexdigest()
+            prev = manifest.get(key) or {}
+            if prev.get("file_sha256") == file_hash and prev.get("ingest_version") == INGEST_VERSION:
+                summary["files_unchanged"] += 1
+                summary["skipped"] += len(prev.get("items") or {})
+                continue
+
+            items = _file_items(ruleset, filepath, json.loads(raw))
+            hashes = {uid: _item_hash(doc, meta) for uid, (doc, meta) in items.items()}
+            old = prev.get("items")
+            if old is None: old = _chroma_hashes(collection, list(items.keys()))
+
+            changed = [uid for uid, h in hashes.items() if old.get(uid) != h]
+            removed = [uid for uid in (prev.get("items") or {}) if uid not in hashes]
+            summary["skipped"] += len(hashes) - len(changed)
+
+            stored = {uid: h for uid, h in hashes.items() if uid not in changed}
+            for i in range(0, len(changed), INGEST_BATCH):
+                batch = changed[i:i + INGEST_BATCH]
+                try:
+                    collection.upsert(
+                        ids=batch,
+                        documents=[items[uid][0] for uid in batch],
+                        metadatas=[dict(items[uid][1], content_hash=hashes[uid]) for uid in batch],
+                    )
+                    stored.update({uid: hashes[uid] for uid in batch})
+                    summary["updated"] += len(batch)
+                except Exception as e:
+                    summary["failed"] += len(batch)
+                    print(f"❌ Upsert failed ({key}, {len(batch)} items): {e}")
+            if removed:
+                collection.delete(ids=removed)
+                summary["removed"] += len(removed)
+
+            # A partial failure keeps the old file hash so the next boot retries the missing items.
+            complete = len(stored) == len(hashes)
+            _save_manifest(key, {
+                "_id": key, "collection": "dnd_rules", "file": os.path.relpath(filepath, RULES_ROOT),
+                "file_sha256": file_hash if complete else prev.get("file_sha256"),
+                "ingest_version": INGEST_VERSION, "items": stored,
+            })
         except Exception as e:
-            # Only print real errors, not parsing noise
-            pass
-    print(f"   Total JSON Rules Indexed: {count}")
+            summary["failed"] += 1
+            print(f"❌ Rules file failed ({filepath}): {e}")
+
+    _prune_manifest(collection, loaded, seen, summary)
+
+    print(
+        f"   JSON Rules: {summary['files']} files ({summary['files_unchanged']} unchanged) | "
+        f"updated {summary['updated']}, skipped {summary['skipped']}, removed {summary['removed']} "
+        f"({summary['pruned']} deleted files), failed {summary['failed']} | {time.time() - started:.1f}s"
+    )
+    return summary
 
 def ingest_markdown_physics():
     if not chroma: return
@@ -107,8 +239,39 @@ def scaffold_campaigns():
         with open(os.path.join(game_path, "manifest.json"), "w") as f:
             json.dump(manifest, f, indent=2)
 
+def compile_srd_bundle():
+    """Memory-mappable SRD bundle for the API/bot/scribe readers (rebuilt only when rules change)."""
+    if not os.path.exists(RULES_ROOT): return
+    try:
+        built = srd_bundle.ensure_built(RULES_ROOT)
+        if built: print(f"📦 SRD bundle: {built['records']} records from {built['files']} files -> {built['path']} ({built['bytes']} bytes, {built['seconds']}s)")
+        else: print("📦 SRD bundle up to date")
+    except Exception as e:
+        print(f"⚠️ SRD bundle build failed ({e}); readers fall back to the JSON files")
+
+def export_vectors(rules_summary=None):
+    """NumPy snapshot of each RAG collection for the API's offline fallback (vector_index)."""
+    if not chroma: return
+    rules_changed = not rules_summary or rules_summary.get("updated") or rules_summary.get("removed")
+    for name in COLLECTIONS:
+        try:
+            collection = chroma.get_collection(name)
+        except Exception:
+            continue  # not built (e.g. no dictionary packs yet)
+        try:
+            current = vector_index.get_index(name)
+            if current is not None and len(current) == collection.count() and not (name == "dnd_rules" and rules_changed):
+                print(f"   Vector export {name}: up to date ({len(current)} rows)")
+                continue
+            out = vector_index.export_collection(collection, name, provider=EMBED_PROVIDERS.get(name, ""))
+            print(f"🧮 Vector export {name}: {out.get('count', 0)} rows -> {vector_index.VECTOR_DIR}")
+        except Exception as e:
+            print(f"⚠️ Vector export {name} failed: {e}")
+
 if __name__ == "__main__":
     scaffold_campaigns()
-    ingest_json_rules()
+    compile_srd_bundle()
+    summary = ingest_json_rules()
     ingest_markdown_physics()
+    export_vectors(summary)
     print("✅ Bootstrap Complete.")
@@ -0,0 +1,245 @@
+#===============================================================
+#Script Name: campaign_catalog.py
+#Script Location: /opt/RealmQuest/api/campaign_catalog.py
+#Date: 10/19/2026
+#Created By: T03KNEE
+#Github: https://github.com/To3Knee/RealmQuest
+#Version: 1.0.0
+#About: In-process campaign catalog behind /campaigns/list.
+#       Each campaign entry is keyed on a stat signature (campaign dir, manifest.json,
+#       campaign-config.json and the content dirs). Only entries whose signature moved are
+#       re-read, campaign-config.json is validated against schemas.CampaignConfig once per
+#       change, and NPC/image counts + disk usage are computed at load so listing never walks.
+#===============================================================
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from schemas import CampaignConfig
+
+logger = logging.getLogger("api")
+
+IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".webp"}
+
+# Paths (relative to the campaign dir) whose mtimes make up an entry's signature.
+# Directory mtimes move whenever a file is added, removed or atomically replaced inside them.
+_SIGNATURE_PATHS = (
+    "",
+    "manifest.json",
+    "campaign-config.json",
+    "assets",
+    "assets/images",
+    "assets/audio",
+    "codex",
+    "codex/npcs",
+    "codex/locations",
+)
+
+ACTIVE_TTL_S = float(os.getenv("RQ_ACTIVE_CAMPAIGN_TTL", "5"))
+
+Signature = Tuple[int, ...]
+
+
+@dataclass
+class CatalogEntry:
+    id: str
+    signature: Signature
+    description: str
+    manifest: Dict[str, Any] = field(default_factory=dict)
+    config: Optional[Dict[str, Any]] = None
+    config_error: Optional[str] = None
+    npc_count: int = 0
+    image_count: int = 0
+    disk_bytes: int = 0
+    loaded_at: float = 0.0
+
+    def public(self, active_id: str) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.id.replace("_", " ").title(),
+            "description": self.description,
+            "is_active": self.id == active_id,
+            # None = no campaign-config.json; False = present but failed CampaignConfig validation.
+            "config_valid": None if self.config is None and self.config_error is None else self.config is not None,
+            "config_error": self.config_error,
+            "stats": {
+                "npcs": self.npc_count,
+                "images": self.image_count,
+                "disk_bytes": self.disk_bytes,
+            },
+        }
+
+
+def _signature(base: Path) -> Signature:
+    sig: List[int] = []
+    for rel in _SIGNATURE_PATHS:
+        try:
+            sig.append(os.stat(base / rel).st_mtime_ns if rel else os.stat(base).st_mtime_ns)
+        except OSError:
+            sig.append(0)
+    return tuple(sig)
+
+
+def _read_json(path: Path) -> Optional[Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"⚠️ Catalog: unreadable {path}: {e}")
+        return None
+
+
+def _count(dir_path: Path, pred: Callable[[str], bool]) -> int:
+    try:
+        with os.scandir(dir_path) as it:
+            return sum(1 for e in it if e.is_file() and pred(e.name))
+    except OSError:
+        return 0
+
+
+def _disk_usage(base: Path) -> int:
+    """Allocated bytes under base, counting each hardlinked inode once."""
+    total = 0
+    seen = set()
+    stack = [str(base)]
+    while stack:
+        top = stack.pop()
+        try:
+            with os.scandir(top) as it:
+                for e in it:
+                    try:
+                        if e.is_dir(follow_symlinks=False):
+                            stack.append(e.path)
+                        elif e.is_file(follow_symlinks=False):
+                            st = e.stat(follow_symlinks=False)
+                            key = (st.st_dev, st.st_ino)
+                            if st.st_nlink > 1:
+                                if key in seen:
+                                    continue
+                                seen.add(key)
+                            total += st.st_size
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return total
+
+
+def _load_entry(base: Path, sig: Signature) -> CatalogEntry:
+    manifest = _read_json(base / "manifest.json")
+    manifest = manifest if isinstance(manifest, dict) else {}
+
+    config = None
+    config_error = None
+    raw_cfg = _read_json(base / "campaign-config.json")
+    if raw_cfg is not None:
+        try:
+            config = CampaignConfig.model_validate(raw_cfg).model_dump()
+        except Exception as e:
+            config_error = str(e).splitlines()[0] if str(e) else "invalid campaign-config.json"
+
+    is_image = lambda n: os.path.splitext(n)[1].lower() in IMAGE_EXTS
+    npcs_dir = base / "codex" / "npcs"
+    return CatalogEntry(
+        id=base.name,
+        signature=sig,
+        description=str(manifest.get("pitch") or "A RealmQuest Campaign"),
+        manifest=manifest,
+        config=config,
+        config_error=config_error,
+        npc_count=_count(npcs_dir, lambda n: n.lower().endswith(".json")),
+        image_count=_count(base / "assets" / "images", is_image) + _count(npcs_dir, is_image),
+        disk_bytes=_disk_usage(base),
+        loaded_at=time.time(),
+    )
+
+
+class CampaignCatalog:
+    """Thread-safe, incrementally refreshed view of the campaigns root."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, CatalogEntry] = {}
+        self._root_mtime: Optional[int] = None
+        self._names: List[str] = []
+        self._active: Optional[Tuple[str, float]] = None
+        self.loads = 0
+
+    def _list_names(self) -> List[str]:
+        try:
+            mtime = os.stat(self.root).st_mtime_ns
+        except OSError:
+            self._root_mtime = None
+            return []
+        if mtime != self._root_mtime:
+            try:
+                with os.scandir(self.root) as it:
+                    self._names = sorted(e.name for e in it if e.is_dir() and not e.name.startswith("."))
+            except OSError:
+                self._names = []
+            self._root_mtime = mtime
+        return self._names
+
+    def refresh(self, force: bool = False) -> List[CatalogEntry]:
+        with self._lock:
+            if force:
+                self._root_mtime = None
+                self._entries.clear()
+            names = self._list_names()
+            fresh: Dict[str, CatalogEntry] = {}
+            for name in names:
+                base = self.root / name
+                sig = _signature(base)
+                entry = self._entries.get(name)
+                if entry is None or entry.signature != sig:
+                    entry = _load_entry(base, sig)
+                    self.loads += 1
+                fresh[name] = entry
+            self._entries = fresh
+            return list(fresh.values())
+
+    def get(self, campaign_id: str) -> Optional[CatalogEntry]:
+        for entry in self.refresh():
+            if entry.id == campaign_id:
+                return entry
+        return None
+
+    def invalidate(self, campaign_id: Optional[str] = None) -> None:
+        """Drop one entry (or everything) so the next read reloads it.
+
+        Signatures catch adds/removes/renames; this covers in-place edits deeper in the tree.
+        """
+        with self._lock:
+            if campaign_id is None:
+                self._entries.clear()
+                self._root_mtime = None
+            else:
+                self._entries.pop(campaign_id, None)
+
+    # Active campaign id (system_config) is cached briefly: the portal polls the list.
+    def active_id(self, fetch: Callable[[], str]) -> str:
+        now = time.monotonic()
+        cached = self._active
+        if cached is not None and now - cached[1] < ACTIVE_TTL_S:
+            return cached[0]
+        val = fetch()
+        self._active = (val, now)
+        return val
+
+    def set_active(self, campaign_id: str) -> None:
+        self._active = (campaign_id, time.monotonic())
+
+    def listing(self, fetch_active: Callable[[], str], force: bool = False) -> List[Dict[str, Any]]:
+        active = self.active_id(fetch_active)
+        return [e.public(active) for e in self.refresh(force=force)]
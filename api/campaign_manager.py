@@ -4,8 +4,15 @@
 #Date: 01/31/2026
 #Created By: T03KNEE
 #Github: https://github.com/To3Knee/RealmQuest
-#Version: 19.13.2
+#Version: 19.20.0
 #About: Phase 3.7 Hotfix - Import missing FastAPI symbols (Query/File/UploadFile) for delete/replace routes.
+#       19.14.0: shared pooled Mongo client (database.py).
+#       19.15.0: portrait/gallery uploads stream through uploads.py (size cap, type sniff, atomic rename).
+#       19.16.0: /campaigns/list served from the mtime-keyed campaign catalog (campaign_catalog.py).
+#       19.17.0: hardlinked snapshots / forks / restore as background jobs (campaign_snapshots.py).
+#       19.18.0: shared Docker client + SSE follow-mode log stream with since cursor (log_stream.py).
+#       19.19.0: /audio/kenku/state and /audio/kenku/cue via the persistent Kenku client (kenku_client.py).
+#       19.20.0: ElevenLabs voices + Kenku track catalogs served stale-while-revalidate (swr_cache.py).
 #===============================================================
 
 import os
@@ -19,8 +26,15 @@ from pathlib import Path
 from typing import Dict, Any, List, Optional, Union
 from dotenv import dotenv_values, set_key, unset_key
 from fastapi import APIRouter, HTTPException, Body, Request, Query, UploadFile, File
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from pymongo import MongoClient
+from database import get_db
+from uploads import commit_upload, discard, receive_image
+from campaign_catalog import CampaignCatalog
+from campaign_snapshots import CampaignSnapshots, jobs, valid_id
+import log_stream
+from kenku_client import kenku
+from swr_cache import SWRCache
 
 from system_config import get_active_campaign_id, set_active_campaign_id
 
@@ -35,12 +49,8 @@ router = APIRouter()
 # -----------------------------
 ENV_FILE = Path("/app/.env") 
 CAMPAIGNS_DIR = Path("/campaigns")
-MONGO_URL = os.getenv("MONGO_URL", "mongodb://realmquest-mongo:27017/")
-
-try:
-    mongo = MongoClient(MONGO_URL, serverSelectionTimeoutMS=2000)
-    db = mongo["realmquest"]
-except Exception: db = None
+catalog = CampaignCatalog(CAMPAIGNS_DIR)
+snapshots = CampaignSnapshots(CAMPAIGNS_DIR, get_db)
 
 # -----------------------------
 # 2. DATA MODELS
@@ -55,6 +65,12 @@ class AudioConfig(BaseModel):
 class CampaignAction(BaseModel):
     campaign_id: str
 
+class SnapshotRequest(BaseModel):
+    label: str = ""
+
+class ForkRequest(BaseModel):
+    new_id: str
+
 class ForgeDraft(BaseModel):
     title: str
     villain: str
@@ -69,39 +85,26 @@ class ForgeDraft(BaseModel):
 
 def _get_active_campaign_id():
     """Fetches active campaign from DB, defaults to 'the_collision_stone'. (Canonical)"""
+    db = get_db()
     return get_active_campaign_id(db)
 
 @router.get("/campaigns/list")
-def list_campaigns():
-    """Scans the /campaigns folder and returns available campaigns."""
+def list_campaigns(refresh: bool = Query(False, description="Drop the catalog cache and rescan every campaign")):
+    """Returns available campaigns (cached catalog; only changed campaign dirs are re-read)."""
     if not CAMPAIGNS_DIR.exists(): return []
-    
-    active_id = _get_active_campaign_id()
-    campaigns = []
-    
-    for item in CAMPAIGNS_DIR.iterdir():
-        if item.is_dir():
-            # Try to read manifest if exists
-            desc = "A RealmQuest Campaign"
-            manifest = item / "manifest.json"
-            if manifest.exists():
-                try:
-                    with open(manifest) as f:
-                        data = json.load(f)
-                        desc = data.get("pitch", desc)
-                except: pass
-            
-            campaigns.append({
-                "id": item.name,
-                "name": item.name.replace("_", " ").title(),
-                "description": desc,
-                "is_active": (item.name == active_id)
-            })
-    return campaigns
+    return catalog.listing(_get_active_campaign_id, force=refresh)
+
+@router.get("/campaigns/{campaign_id}/stats")
+def campaign_stats(campaign_id: str):
+    """Precomputed counts / disk usage for one campaign (no filesystem walk on a warm catalog)."""
+    entry = catalog.get(campaign_id)
+    if entry is None: raise HTTPException(404, "Campaign not found on disk")
+    return entry.public(catalog.active_id(_get_active_campaign_id))
 
 @router.post("/campaigns/activate")
 def activate_campaign(payload: CampaignAction):
     """Switches the active campaign in the Database."""
+    db = get_db()
     if db is None: raise HTTPException(503, "Database unavailable")
     
     target_path = CAMPAIGNS_DIR / payload.campaign_id
@@ -110,6 +113,7 @@ def activate_campaign(payload: CampaignAction):
         
     try:
         set_active_campaign_id(db, payload.campaign_id)
+        catalog.set_active(payload.campaign_id)
         logger.info(f"⚔️ Active Campaign Switched to: {payload.campaign_id}")
         return {"status": "success", "active": payload.campaign_id}
     except Exception as e:
@@ -127,11 +131,69 @@ def delete_campaign(campaign_id: str):
 
     try:
         shutil.rmtree(target)
+        catalog.invalidate(campaign_id)
         logger.info(f"🗑️ Campaign Deleted: {campaign_id}")
         return {"status": "success", "deleted": campaign_id}
     except Exception as e:
         raise HTTPException(500, f"Delete failed: {e}")
 
+# --- SNAPSHOTS / FORKS (background jobs; poll /campaigns/jobs/{job_id}) ---
+
+def _campaign_dir_or_404(campaign_id: str) -> Path:
+    if not valid_id(campaign_id): raise HTTPException(400, "Invalid campaign id")
+    base = CAMPAIGNS_DIR / campaign_id
+    if not base.is_dir(): raise HTTPException(404, "Campaign not found on disk")
+    return base
+
+def _start_job(start, *args):
+    try:
+        return start(*args).to_dict()
+    except RuntimeError as e:
+        raise HTTPException(409, str(e))
+
+@router.get("/campaigns/jobs")
+def campaign_jobs():
+    return {"jobs": [j.to_dict() for j in jobs.list()]}
+
+@router.get("/campaigns/jobs/{job_id}")
+def campaign_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None: raise HTTPException(404, "Job not found")
+    return job.to_dict()
+
+@router.get("/campaigns/{campaign_id}/snapshots")
+def list_snapshots(campaign_id: str):
+    if not valid_id(campaign_id): raise HTTPException(400, "Invalid campaign id")
+    return {"campaign_id": campaign_id, "snapshots": snapshots.list(campaign_id)}
+
+@router.post("/campaigns/{campaign_id}/snapshots", status_code=202)
+def create_snapshot(campaign_id: str, payload: SnapshotRequest = Body(default=SnapshotRequest())):
+    """Snapshot the campaign tree (assets hardlinked) plus its characters and roll rollups."""
+    _campaign_dir_or_404(campaign_id)
+    return _start_job(snapshots.snapshot, campaign_id, payload.label)
+
+@router.post("/campaigns/{campaign_id}/snapshots/{snapshot_id}/restore", status_code=202)
+def restore_snapshot(campaign_id: str, snapshot_id: str):
+    """Replace the campaign tree and its Mongo state with a snapshot (atomic directory swap)."""
+    if not valid_id(campaign_id) or not valid_id(snapshot_id): raise HTTPException(400, "Invalid id")
+    if not (snapshots.snapshot_root(campaign_id) / snapshot_id / "meta.json").exists():
+        raise HTTPException(404, "Snapshot not found")
+    return _start_job(snapshots.restore, campaign_id, snapshot_id)
+
+@router.delete("/campaigns/{campaign_id}/snapshots/{snapshot_id}")
+def delete_snapshot(campaign_id: str, snapshot_id: str):
+    if not valid_id(campaign_id) or not valid_id(snapshot_id): raise HTTPException(400, "Invalid id")
+    if not snapshots.delete(campaign_id, snapshot_id): raise HTTPException(404, "Snapshot not found")
+    return {"status": "success", "deleted": snapshot_id}
+
+@router.post("/campaigns/{campaign_id}/fork", status_code=202)
+def fork_campaign(campaign_id: str, payload: ForkRequest):
+    """Clone a campaign under a new id: shared asset inodes, copied JSON, characters re-keyed."""
+    _campaign_dir_or_404(campaign_id)
+    if not valid_id(payload.new_id): raise HTTPException(400, "Invalid new campaign id")
+    if (CAMPAIGNS_DIR / payload.new_id).exists(): raise HTTPException(400, "Campaign already exists")
+    return _start_job(snapshots.fork, campaign_id, payload.new_id)
+
 # --- THE FORGE (Creating New Campaigns) ---
 
 @router.post("/campaigns/forge/preview")
@@ -455,25 +517,11 @@ async def campaign_gallery_replace_image(filename: str, file: UploadFile = File(
     if ext not in [".png", ".jpg", ".jpeg", ".webp"]:
         raise HTTPException(status_code=400, detail="only png/jpg/jpeg/webp allowed")
 
-    try:
-        content = await file.read()
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"failed to read upload: {e}")
-
-    if not content:
-        raise HTTPException(status_code=400, detail="empty upload")
-
-    tmp = assets_dir / f".{filename}.upload.tmp"
-    try:
-        with open(tmp, "wb") as f:
-            f.write(content)
-        tmp.replace(dst)
-    finally:
-        try:
-            if tmp.exists():
-                tmp.unlink()
-        except Exception:
-            pass
+    upload = await receive_image(file, assets_dir)
+    if not upload.matches_ext(ext):
+        discard(upload)
+        raise HTTPException(status_code=415, detail=f"upload is {upload.kind}, not {ext}")
+    await commit_upload(upload, dst)
 
     stat = dst.stat()
     meta_map = _gallery_meta_map(assets_dir)
@@ -608,20 +656,15 @@ async def codex_replace_portrait(npc_id: str, file: UploadFile = File(...)):
         else:
             raise HTTPException(status_code=404, detail="npc dossier not found")
 
-    try:
-        content = await file.read()
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"failed to read upload: {e}")
-    if not content:
-        raise HTTPException(status_code=400, detail="empty upload")
-
-    # extension based on upload filename
+    # extension based on upload filename (falls back to the sniffed type)
     up_name = (file.filename or "").strip()
-    ext = Path(up_name).suffix.lower() if up_name else ".png"
-    if ext not in [".png", ".jpg", ".jpeg", ".webp"]:
+    ext = Path(up_name).suffix.lower() if up_name else ""
+    if ext and ext not in [".png", ".jpg", ".jpeg", ".webp"]:
         raise HTTPException(status_code=400, detail="only png/jpg/jpeg/webp allowed")
 
-    codex_dir.mkdir(parents=True, exist_ok=True)
+    upload = await receive_image(file, codex_dir)
+    if not ext or not upload.matches_ext(ext):
+        ext = upload.ext
 
     # Remove any existing portrait with known extensions (npc scoped)
     for old_ext in [".png", ".jpg", ".jpeg", ".webp"]:
@@ -630,17 +673,7 @@ async def codex_replace_portrait(npc_id: str, file: UploadFile = File(...)):
             _safe_unlink(old)
 
     dst = codex_dir / f"{npc_id}{ext}"
-    tmp = codex_dir / f".{npc_id}{ext}.upload.tmp"
-    try:
-        with open(tmp, "wb") as f:
-            f.write(content)
-        tmp.replace(dst)
-    finally:
-        try:
-            if tmp.exists():
-                tmp.unlink()
-        except Exception:
-            pass
+    await commit_upload(upload, dst)
 
     # Update dossier image field to point to codex location
     updated = None
@@ -964,6 +997,7 @@ def _coerce_audio_registry(raw: Any) -> Dict[str, Any]:
     }
 
 def repair_audio_config():
+    db = get_db()
     if db is None: return
     try:
         conf = db["system_config"].find_one({"config_id": "audio_registry"})
@@ -990,6 +1024,7 @@ def repair_audio_config():
 
 @router.get("/config")
 def get_system_config():
+    db = get_db()
     repair_audio_config()
     # LOAD ACTIVE CAMPAIGN FROM DB
     active = _get_active_campaign_id()
@@ -1009,6 +1044,7 @@ def get_system_config():
 
 @router.post("/audio/save")
 def save_audio_config(payload: AudioConfig):
+    db = get_db()
     if db is None: raise HTTPException(status_code=500, detail="Mongo unavailable")
     try:
         data = _coerce_audio_registry(payload.dict())
@@ -1021,19 +1057,31 @@ def save_audio_config(payload: AudioConfig):
 # 7. KENKU & SYSTEM CONTROLS
 # -----------------------------
 ELEVEN_API_KEY = os.getenv("ELEVENLABS_API_KEY", "").strip()
+
+# External catalogs: served from memory, refreshed in the background, last known good on outage.
+voice_catalog = SWRCache("elevenlabs_voices", ttl=float(os.getenv("RQ_VOICES_TTL_S", "600")), max_stale=86400.0)
+kenku_catalog = SWRCache("kenku_tracks", ttl=float(os.getenv("RQ_KENKU_TRACKS_TTL_S", "60")), max_stale=86400.0)
+
+def _fetch_voices() -> List[Dict[str, str]]:
+    r = requests.get("https://api.elevenlabs.io/v1/voices", headers={"xi-api-key": ELEVEN_API_KEY}, timeout=5)
+    r.raise_for_status()
+    return [{"id": v["voice_id"], "name": v["name"]} for v in r.json().get("voices", [])]
+
+def warm_audio_catalogs() -> None:
+    """Called from the API lifespan; both loads run in background threads."""
+    if ELEVEN_API_KEY: voice_catalog.warm("voices", _fetch_voices)
+    kenku_catalog.warm("tracks", _scan_kenku_tracks)
+
 @router.get("/audio/voices")
-def list_voices():
+def list_voices(refresh: bool = False):
     if not ELEVEN_API_KEY: return []
-    try:
-        r = requests.get("https://api.elevenlabs.io/v1/voices", headers={"xi-api-key": ELEVEN_API_KEY}, timeout=5)
-        return [{"id": v["voice_id"], "name": v["name"]} for v in r.json().get("voices", [])]
-    except: return []
+    if refresh: voice_catalog.invalidate("voices")
+    return voice_catalog.get("voices", _fetch_voices, default=[])
 
 KENKU_URL = os.getenv("KENKU_URL", "http://realmquest-kenku:3333").rstrip("/")
 
 def _docker_client():
-    try: return docker.DockerClient(base_url="unix:///var/run/docker.sock")
-    except: return None
+    return log_stream.docker_client()
 
 # HELPER: RECURSIVE TRACK FINDER
 def _extract_tracks_recursive(data: Any, tracks: List[Dict[str, str]]):
@@ -1053,20 +1101,21 @@ def _extract_tracks_recursive(data: Any, tracks: List[Dict[str, str]]):
         for item in data:
             _extract_tracks_recursive(item, tracks)
 
-@router.get("/audio/kenku/tracks")
-def list_kenku_tracks():
+def _scan_kenku_tracks() -> List[Dict[str, str]]:
     real_tracks = []
     logger.info(f"🎵 KENKU: Connecting to {KENKU_URL}...")
-    try:
-        r_pl = requests.get(f"{KENKU_URL}/v1/playlist", timeout=3)
-        if r_pl.status_code == 200: _extract_tracks_recursive(r_pl.json(), real_tracks)
-        r_sb = requests.get(f"{KENKU_URL}/v1/soundboard", timeout=3)
-        if r_sb.status_code == 200: _extract_tracks_recursive(r_sb.json(), real_tracks)
-        
-        unique_tracks = {t['id']: t for t in real_tracks}.values()
-        real_tracks = list(unique_tracks)
-    except Exception as e:
-        logger.error(f"❌ KENKU SCAN FAIL: {e}")
+    r_pl = requests.get(f"{KENKU_URL}/v1/playlist", timeout=3)
+    if r_pl.status_code == 200: _extract_tracks_recursive(r_pl.json(), real_tracks)
+    r_sb = requests.get(f"{KENKU_URL}/v1/soundboard", timeout=3)
+    if r_sb.status_code == 200: _extract_tracks_recursive(r_sb.json(), real_tracks)
+    if r_pl.status_code != 200 and r_sb.status_code != 200:
+        raise RuntimeError(f"Kenku returned {r_pl.status_code}/{r_sb.status_code}")
+    return list({t['id']: t for t in real_tracks}.values())
+
+@router.get("/audio/kenku/tracks")
+def list_kenku_tracks(refresh: bool = False):
+    if refresh: kenku_catalog.invalidate("tracks")
+    real_tracks = kenku_catalog.get("tracks", _scan_kenku_tracks, default=[])
 
     phantom_tracks = []
     for seed in DEFAULT_SOUND_SEEDS:
@@ -1077,25 +1126,69 @@ def list_kenku_tracks():
         })
     return real_tracks + phantom_tracks
 
+@router.get("/audio/catalogs")
+def audio_catalog_status():
+    """Cache age / last error for the external audio catalogs."""
+    return {
+        "voices": {**voice_catalog.peek("voices"), **voice_catalog.stats},
+        "kenku_tracks": {**kenku_catalog.peek("tracks"), **kenku_catalog.stats},
+    }
+
+@router.get("/audio/kenku/state")
+async def kenku_state(refresh: bool = False):
+    """Cached playback model (what the chat engine thinks Kenku is playing)."""
+    if refresh:
+        try: await kenku.refresh_state(force=True)
+        except Exception as e: return {"ok": False, "error": str(e), **kenku.snapshot()}
+    return {"ok": True, **kenku.snapshot()}
+
+@router.post("/audio/kenku/cue")
+async def kenku_cue(payload: Dict[str, str] = Body(...)):
+    kenku.cue(payload.get("id"))
+    return {"ok": True, "queued": payload.get("id")}
+
 # DOCKER CONTROL LOGS
 @router.get("/logs/{container_name}")
 def get_logs_alias(container_name: str):
     return control_logs(container_name)
 
 @router.get("/control/logs/{service}")
-def control_logs(service: str):
+def control_logs(service: str, since: Optional[str] = None, tail: int = 400):
+    """Snapshot read. Pass the returned cursor back as ?since= to fetch only newer lines."""
     cli = _docker_client()
     if not cli: return {"status": "error", "logs": "Docker Socket Unavailable"}
     try:
-        target = service if "realmquest" in service else f"realmquest-{service.replace('rq-', '')}"
+        target = log_stream.container_name(service)
         try:
             container = cli.containers.get(target)
-            logs = container.logs(tail=400).decode("utf-8", "ignore")
-            return {"status": "success", "logs": logs}
+            since_ns = log_stream.cursor_ns(since)
+            if since_ns is None:
+                raw = container.logs(tail=max(0, int(tail)), timestamps=True)
+            else:
+                raw = container.logs(since=log_stream.since_arg(since_ns), timestamps=True)
+            lines = [log_stream.split_line(l) for l in raw.splitlines()]
+            if since_ns is not None:
+                lines = [(ts, text) for ts, text in lines if (log_stream.cursor_ns(ts) or 0) > since_ns]
+            cursor = next((ts for ts, _ in reversed(lines) if ts), since or "")
+            logs = "".join(text + "\n" for _, text in lines)
+            return {"status": "success", "logs": logs, "cursor": cursor}
         except docker.errors.NotFound:
              return {"status": "error", "logs": f"Container '{target}' not found."}
     except Exception as e: return {"status": "error", "logs": str(e)}
 
+@router.get("/control/logs/{service}/stream")
+async def control_logs_stream(request: Request, service: str, since: Optional[str] = None, tail: int = 200):
+    """Server-Sent Events: replay after the cursor (or the last `tail` lines), then follow live.
+
+    Each line's id is its Docker timestamp, so EventSource reconnects resume via Last-Event-ID.
+    """
+    since = since or request.headers.get("last-event-id")
+    return StreamingResponse(
+        log_stream.sse_stream(log_stream.container_name(service), since, tail),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.post("/control/restart/{service}")
 def control_restart(service: str):
     cli = _docker_client()
@@ -0,0 +1,393 @@
+#===============================================================
+#Script Name: campaign_snapshots.py
+#Script Location: /opt/RealmQuest/api/campaign_snapshots.py
+#Date: 10/19/2026
+#Created By: T03KNEE
+#Github: https://github.com/To3Knee/RealmQuest
+#Version: 1.0.2
+#About: Campaign snapshot / fork / restore as background jobs.
+#       - Trees are cloned with hardlinks for immutable assets (images, audio, anything binary)
+#         and real copies for mutable text (JSON/Markdown/YAML). A linked inode is shared, so
+#         binary writers under /campaigns must write a temp file and os.replace it
+#         (uploads.commit_upload, AIEngine.generate_image); an in-place write would change
+#         every snapshot and fork that shares the file.
+#       - Mongo state travels with the tree: characters, roll_rollups and roll_analytics.
+#         Snapshots keep it as NDJSON beside the tree; forks copy it under fresh character_ids,
+#         with /campaigns/<source>/ URLs (avatars) pointed at the fork.
+#       - Jobs are serialized per campaign: a snapshot, fork or restore is refused while another
+#         job touches the same source or target campaign.
+#       - Restore loads the Mongo state before swapping the tree in, and rolls both back (from a
+#         pre-restore dump and the renamed-away tree) if either step fails.
+#       - Snapshots live in <campaigns>/.snapshots (same filesystem, so links work; the
+#         dot-prefix keeps them out of the campaign catalog, and main.py does not serve
+#         dot-paths from the /campaigns mount).
+#===============================================================
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger("api")
+
+SNAPSHOTS_DIRNAME = ".snapshots"
+MUTABLE_EXTS = {".json", ".ndjson", ".md", ".txt", ".yaml", ".yml"}
+MAX_JOBS = 50
+
+CHARACTERS = "characters"
+ROLLUPS = "roll_rollups"
+ANALYTICS = "roll_analytics"
+
+_SAFE_ID = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_\-]{0,79}$")
+
+
+def valid_id(value: str) -> bool:
+    return bool(_SAFE_ID.match(str(value or "")))
+
+
+def _utc_now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# -----------------------------
+# Jobs
+# -----------------------------
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    campaign_id: str
+    target: str
+    status: str = "queued"  # queued | running | done | error
+    total: int = 0
+    done: int = 0
+    linked: int = 0
+    copied: int = 0
+    bytes_linked: int = 0
+    bytes_copied: int = 0
+    db: Dict[str, int] = field(default_factory=dict)
+    error: Optional[str] = None
+    created_at: str = field(default_factory=_utc_now_iso)
+    finished_at: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = asdict(self)
+        out["progress"] = round(self.done / self.total, 4) if self.total else (1.0 if self.status == "done" else 0.0)
+        return out
+
+
+class JobRegistry:
+    """In-process job table (the API runs a single worker); oldest finished jobs are evicted."""
+
+    def __init__(self, limit: int = MAX_JOBS):
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Job] = {}
+        self._limit = limit
+
+    def start(self, kind: str, campaign_id: str, target: str, fn: Callable[[Job], None]) -> Job:
+        job = Job(id=uuid.uuid4().hex[:12], kind=kind, campaign_id=campaign_id, target=target)
+        keys = {campaign_id, target}
+        with self._lock:
+            for j in self._jobs.values():
+                busy = keys & {j.campaign_id, j.target}
+                if j.status in ("queued", "running") and busy:
+                    raise RuntimeError(f"a job for {sorted(busy)[0]} is already running")
+            self._jobs[job.id] = job
+            finished = [j for j in self._jobs.values() if j.status in ("done", "error")]
+            for old in finished[: max(0, len(self._jobs) - self._limit)]:
+                self._jobs.pop(old.id, None)
+
+        def run():
+            job.status = "running"
+            try:
+                fn(job)
+                job.status = "done"
+            except Exception as e:
+                job.status = "error"
+                job.error = str(e)
+                logger.error(f"❌ Campaign {kind} job {job.id} failed: {e}")
+            finally:
+                job.finished_at = _utc_now_iso()
+
+        threading.Thread(target=run, name=f"rq-{kind}-{job.id}", daemon=True).start()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+
+jobs = JobRegistry()
+
+
+# -----------------------------
+# Tree cloning
+# -----------------------------
+
+def _walk(src: Path) -> Iterable[os.DirEntry]:
+    stack = [str(src)]
+    while stack:
+        top = stack.pop()
+        with os.scandir(top) as it:
+            for e in it:
+                if e.is_dir(follow_symlinks=False):
+                    stack.append(e.path)
+                yield e
+
+
+def count_files(src: Path) -> int:
+    return sum(1 for e in _walk(src) if not e.is_dir(follow_symlinks=False))
+
+
+def clone_tree(src: Path, dst: Path, job: Optional[Job] = None) -> None:
+    """Recreate src at dst: hardlink immutable files, copy mutable ones. dst must not exist."""
+    src, dst = Path(src), Path(dst)
+    dst.mkdir(parents=True, exist_ok=False)
+    for e in _walk(src):
+        rel = os.path.relpath(e.path, src)
+        target = dst / rel
+        if e.is_dir(follow_symlinks=False):
+            target.mkdir(parents=True, exist_ok=True)
+            continue
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if e.is_symlink():
+            os.symlink(os.readlink(e.path), target)
+        else:
+            size = e.stat(follow_symlinks=False).st_size
+            linked = False
+            if os.path.splitext(e.name)[1].lower() not in MUTABLE_EXTS:
+                try:
+                    os.link(e.path, target)
+                    linked = True
+                except OSError:
+                    pass  # cross-device / unsupported filesystem: fall back to a copy
+            if not linked:
+                shutil.copy2(e.path, target)
+            if job is not None:
+                if linked:
+                    job.linked += 1
+                    job.bytes_linked += size
+                else:
+                    job.copied += 1
+                    job.bytes_copied += size
+        if job is not None:
+            job.done += 1
+
+
+# -----------------------------
+# Mongo state
+# -----------------------------
+
+def _find(db, coll: str, campaign_id: str) -> List[Dict[str, Any]]:
+    return list(db[coll].find({"campaign_id": campaign_id}, {"_id": 0}))
+
+
+def _remap_rollup(doc: Dict[str, Any], target: str, ids: Dict[str, str]) -> Dict[str, Any]:
+    doc = dict(doc, campaign_id=target)
+    if doc.get("scope") == "campaign":
+        doc["key"] = target
+    elif doc.get("scope") == "character" and doc.get("key") in ids:
+        doc["key"] = ids[doc["key"]]
+    return doc
+
+
+def _remap_analytics(doc: Dict[str, Any], target: str, ids: Dict[str, str]) -> Dict[str, Any]:
+    doc = dict(doc, campaign_id=target)
+    if doc.get("character") in ids:
+        doc["character"] = ids[doc["character"]]
+    return doc
+
+
+def _rehome_urls(value: Any, source: str, target: str) -> Any:
+    """Point /campaigns/<source>/... strings (avatar_url etc.) at the target campaign."""
+    if isinstance(value, str):
+        return value.replace(f"/campaigns/{source}/", f"/campaigns/{target}/")
+    if isinstance(value, dict):
+        return {k: _rehome_urls(v, source, target) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_rehome_urls(v, source, target) for v in value]
+    return value
+
+
+def copy_db_state(db, source: str, target: str) -> Dict[str, int]:
+    """Fork Mongo state: characters get fresh ids; rollups/analytics follow the id map."""
+    now = _utc_now_iso()
+    ids: Dict[str, str] = {}
+    chars = []
+    for doc in _find(db, CHARACTERS, source):
+        new_id = str(uuid.uuid4())
+        if doc.get("character_id"):
+            ids[str(doc["character_id"])] = new_id
+        # Otherwise deleting the fork's character would remove the source campaign's avatar.
+        doc = _rehome_urls(doc, source, target)
+        chars.append(dict(doc, character_id=new_id, campaign_id=target, version=1, created_at=now, updated_at=now))
+    rollups = [_remap_rollup(d, target, ids) for d in _find(db, ROLLUPS, source)]
+    analytics = [_remap_analytics(d, target, ids) for d in _find(db, ANALYTICS, source)]
+    for coll, docs in ((CHARACTERS, chars), (ROLLUPS, rollups), (ANALYTICS, analytics)):
+        if docs:
+            db[coll].insert_many(docs, ordered=False)
+    return {CHARACTERS: len(chars), ROLLUPS: len(rollups), ANALYTICS: len(analytics)}
+
+
+def dump_db_state(db, campaign_id: str, out_dir: Path) -> Dict[str, int]:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    counts: Dict[str, int] = {}
+    for coll in (CHARACTERS, ROLLUPS, ANALYTICS):
+        n = 0
+        with open(out_dir / f"{coll}.ndjson", "w", encoding="utf-8") as f:
+            for doc in db[coll].find({"campaign_id": campaign_id}, {"_id": 0}).batch_size(500):
+                f.write(json.dumps(doc, ensure_ascii=False, default=str) + "\n")
+                n += 1
+        counts[coll] = n
+    return counts
+
+
+def load_db_state(db, campaign_id: str, in_dir: Path) -> Dict[str, int]:
+    """Replace a campaign's Mongo state with a snapshot dump (ids are preserved)."""
+    counts: Dict[str, int] = {}
+    for coll in (CHARACTERS, ROLLUPS, ANALYTICS):
+        path = in_dir / f"{coll}.ndjson"
+        docs: List[Dict[str, Any]] = []
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                docs = [json.loads(line) for line in f if line.strip()]
+        db[coll].delete_many({"campaign_id": campaign_id})
+        if docs:
+            db[coll].insert_many([dict(d, campaign_id=campaign_id) for d in docs], ordered=False)
+        counts[coll] = len(docs)
+    return counts
+
+
+# -----------------------------
+# Operations
+# -----------------------------
+
+class CampaignSnapshots:
+    def __init__(self, root: Path, get_db: Callable[[], Any]):
+        self.root = Path(root)
+        self._get_db = get_db
+
+    def snapshot_root(self, campaign_id: str) -> Path:
+        return self.root / SNAPSHOTS_DIRNAME / campaign_id
+
+    def list(self, campaign_id: str) -> List[Dict[str, Any]]:
+        base = self.snapshot_root(campaign_id)
+        out: List[Dict[str, Any]] = []
+        if not base.exists():
+            return out
+        for d in sorted(base.iterdir(), reverse=True):
+            meta_path = d / "meta.json"
+            if d.is_dir() and meta_path.exists():
+                try:
+                    out.append(json.loads(meta_path.read_text(encoding="utf-8")))
+                except Exception:
+                    continue
+        return out
+
+    def snapshot(self, campaign_id: str, label: str = "") -> Job:
+        src = self.root / campaign_id
+        slug = re.sub(r"[^a-z0-9]+", "-", (label or "").lower()).strip("-")[:40]
+        snap_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ") + (f"-{slug}" if slug else "")
+        dest = self.snapshot_root(campaign_id) / snap_id
+
+        def run(job: Job):
+            job.total = count_files(src)
+            tmp = dest.with_name(f".{snap_id}.partial")
+            try:
+                clone_tree(src, tmp / "tree", job)
+                db = self._get_db()
+                if db is not None:
+                    job.db = dump_db_state(db, campaign_id, tmp / "db")
+                meta = {
+                    "snapshot_id": snap_id,
+                    "campaign_id": campaign_id,
+                    "label": label,
+                    "created_at": _utc_now_iso(),
+                    "files": job.total,
+                    "db": job.db,
+                }
+                (tmp / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+                os.replace(tmp, dest)
+            except BaseException:
+                shutil.rmtree(tmp, ignore_errors=True)
+                raise
+
+        return jobs.start("snapshot", campaign_id, f"snapshot:{campaign_id}/{snap_id}", run)
+
+    def fork(self, campaign_id: str, new_id: str) -> Job:
+        src = self.root / campaign_id
+        dest = self.root / new_id
+
+        def run(job: Job):
+            job.total = count_files(src)
+            tmp = self.root / f".{new_id}.partial"
+            try:
+                clone_tree(src, tmp, job)
+                db = self._get_db()
+                if db is not None:
+                    job.db = copy_db_state(db, campaign_id, new_id)
+                os.rename(tmp, dest)
+            except BaseException:
+                shutil.rmtree(tmp, ignore_errors=True)
+                raise
+
+        return jobs.start("fork", campaign_id, new_id, run)
+
+    def restore(self, campaign_id: str, snap_id: str) -> Job:
+        snap = self.snapshot_root(campaign_id) / snap_id
+        dest = self.root / campaign_id
+
+        def run(job: Job):
+            job.total = count_files(snap / "tree")
+            tmp = self.root / f".{campaign_id}.restore-{job.id}"
+            trash = self.root / f".{campaign_id}.trash-{job.id}"
+            backup = self.root / f".{campaign_id}.pre-restore-{job.id}"
+            db = self._get_db()
+            db_touched = moved = False
+            try:
+                clone_tree(snap / "tree", tmp, job)
+                if db is not None:
+                    dump_db_state(db, campaign_id, backup)
+                    db_touched = True
+                    job.db = load_db_state(db, campaign_id, snap / "db")
+                # Swap with two renames so readers never see a half-restored tree.
+                if dest.exists():
+                    os.rename(dest, trash)
+                    moved = True
+                os.rename(tmp, dest)
+            except BaseException:
+                if moved and not dest.exists():
+                    os.rename(trash, dest)
+                if db_touched:
+                    try:
+                        load_db_state(db, campaign_id, backup)
+                    except Exception as e:
+                        logger.error(f"❌ Restore rollback of {campaign_id} Mongo state failed (dump kept at {backup}): {e}")
+                        backup = None
+                raise
+            finally:
+                for leftover in (tmp, trash, backup):
+                    if leftover is not None:
+                        shutil.rmtree(leftover, ignore_errors=True)
+
+        return jobs.start("restore", campaign_id, campaign_id, run)
+
+    def delete(self, campaign_id: str, snap_id: str) -> bool:
+        snap = self.snapshot_root(campaign_id) / snap_id
+        if not snap.is_dir():
+            return False
+        shutil.rmtree(snap)
+        return True
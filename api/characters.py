@@ -2,26 +2,103 @@
 # Script Name: characters.py
 # Script Location: /opt/RealmQuest/api/characters.py
 # Date: 2026-01-31
-# Version: 1.2.1 (Canonical campaign id + roll engine wiring compatibility)
+# Version: 1.8.2 (Roster cursor reaches characters without updated_at; legacy backfill)
 # ===============================================================
 
 import os
 import uuid
 import json
 import re
-from typing import Any, Dict, List, Optional
+import base64
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Union
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, Query
+from fastapi import APIRouter, HTTPException, UploadFile, File, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 
-try:
-    from pymongo import MongoClient
-except Exception:
-    MongoClient = None
-
+from database import get_db, run_db
+from uploads import commit_upload, receive_image
+from derived_stats import derived_by_id, invalidate as invalidate_derived, stat_key
 from system_config import get_active_campaign_id
 
 router = APIRouter(tags=["characters"])
+logger = logging.getLogger("api")
+
+# Roster views and the bot only need identity + presentation, not the sheet.
+SUMMARY_FIELDS = (
+    "character_id", "campaign_id", "name", "class_name", "race", "level",
+    "owner_discord_id", "owner_display_name", "avatar_url", "updated_at", "version",
+)
+
+_indexes_ready = False
+_indexes_lock = threading.Lock()
+
+
+def ensure_character_indexes(db) -> None:
+    """Roster/owner/identity indexes, created once per process (idempotent)."""
+    global _indexes_ready
+    if _indexes_ready or db is None:
+        return
+    with _indexes_lock:
+        if _indexes_ready:
+            return
+        coll = db["characters"]
+        try:
+            coll.create_index([("campaign_id", 1), ("updated_at", -1), ("character_id", -1)], name="campaign_roster")
+            coll.create_index([("campaign_id", 1), ("owner_discord_id", 1), ("updated_at", -1)], name="campaign_owner")
+        except Exception as e:
+            logger.warning(f"⚠️ Character index setup deferred: {e}")
+            return
+        try:
+            coll.create_index([("character_id", 1)], name="character_id", unique=True)
+        except Exception as e:
+            # Pre-existing duplicate ids block the unique index; keep serving and say why.
+            logger.warning(f"⚠️ Unique character_id index not created (duplicates?): {e}")
+        _backfill_updated_at(coll)
+        _indexes_ready = True
+
+
+def _backfill_updated_at(coll) -> None:
+    """Legacy characters without updated_at take their created_at (else the epoch) so they page normally."""
+    try:
+        res = coll.update_many(
+            {"updated_at": None},
+            [{"$set": {"updated_at": {"$ifNull": ["$created_at", "1970-01-01T00:00:00+00:00"]}}}],
+        )
+        if res.modified_count:
+            logger.info(f"✅ Backfilled updated_at on {res.modified_count} character(s)")
+    except Exception as e:
+        logger.warning(f"⚠️ Character updated_at backfill skipped: {e}")
+
+
+def _encode_cursor(doc: Dict[str, Any]) -> str:
+    # A missing updated_at stays null: it sorts after every timestamp, not at "".
+    raw = json.dumps([doc.get("updated_at"), doc.get("character_id") or ""], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> List[Optional[str]]:
+    try:
+        pad = "=" * (-len(cursor) % 4)
+        updated_at, character_id = json.loads(base64.urlsafe_b64decode(cursor + pad).decode())
+        return [None if updated_at is None else str(updated_at), str(character_id)]
+    except Exception:
+        raise HTTPException(status_code=422, detail="invalid_cursor")
+
+
+def _after_cursor(after_ts: Optional[str], after_id: str) -> Dict[str, Any]:
+    """Keyset for (updated_at desc, character_id desc); null/missing updated_at sorts last."""
+    if after_ts is None:
+        return {"updated_at": None, "character_id": {"$lt": after_id}}
+    return {"$or": [
+        {"updated_at": {"$lt": after_ts}},
+        {"updated_at": after_ts, "character_id": {"$lt": after_id}},
+        {"updated_at": None},
+    ]}
 
 
 def _utc_now_iso() -> str:
@@ -31,17 +108,8 @@ def _utc_now_iso() -> str:
 
 
 def _get_db():
-    if MongoClient is None:
-        return None
-    uri = os.getenv("MONGO_URL") or os.getenv("RQ_MONGO_URI") or ""
-    if not uri:
-        return None
-    try:
-        client = MongoClient(uri)
-        db_name = os.getenv("RQ_MONGO_DB", "realmquest")
-        return client[db_name]
-    except Exception:
-        return None
+    # Process-wide pooled client; no per-request connection setup.
+    return get_db()
 
 
 def _get_active_campaign_id(db) -> str:
@@ -102,30 +170,242 @@ class CharacterRecord(BaseModel):
     created_at: Optional[str] = None
     updated_at: Optional[str] = None
 
+    # Bumped on every write; send it back to make a write conditional (409 on mismatch).
+    version: Optional[int] = None
+
+
+class CharacterPatch(BaseModel):
+    """Partial update. Keys may be dotted paths ("sheet.combat.hp.current") or nested dicts."""
+    set: Dict[str, Any] = Field(default_factory=dict)
+    inc: Dict[str, Union[int, float]] = Field(default_factory=dict)
+    unset: List[str] = Field(default_factory=list)
+    version: Optional[int] = None  # expected current version (compare-and-swap)
+
+
+# Managed by the server; never writable through PATCH.
+_PROTECTED_FIELDS = {"_id", "character_id", "version", "created_at", "updated_at"}
+
+
+def _check_path(path: str) -> str:
+    path = str(path or "").strip()
+    parts = path.split(".")
+    if not path or any(not p or p.startswith("$") for p in parts):
+        raise HTTPException(status_code=422, detail=f"invalid_path: {path!r}")
+    if parts[0] in _PROTECTED_FIELDS:
+        raise HTTPException(status_code=422, detail=f"protected_field: {parts[0]}")
+    return path
+
+
+def _flatten_paths(value: Any, prefix: str = "", out: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """{"sheet": {"combat": {"hp": {"current": 7}}}} -> {"sheet.combat.hp.current": 7}.
+
+    Lists and empty dicts are leaves (replaced whole).
+    """
+    out = {} if out is None else out
+    if isinstance(value, dict) and (value or not prefix):
+        for k, v in value.items():
+            _flatten_paths(v, f"{prefix}.{k}" if prefix else str(k), out)
+    else:
+        out[_check_path(prefix)] = value
+    return out
+
+
+def _version_filter(character_id: str, version: Optional[int]) -> Dict[str, Any]:
+    q: Dict[str, Any] = {"character_id": character_id}
+    if version is not None:
+        if int(version) == 0:
+            # Documents written before versioning count as version 0.
+            q["$or"] = [{"version": 0}, {"version": {"$exists": False}}]
+        else:
+            q["version"] = int(version)
+    return q
+
+
+def _conflict_or_missing(db, character_id: str) -> HTTPException:
+    cur = db["characters"].find_one({"character_id": character_id}, {"_id": 0, "version": 1})
+    if cur is None:
+        return HTTPException(status_code=404, detail="Character not found")
+    return HTTPException(
+        status_code=409,
+        detail={"error": "version_conflict", "current_version": int(cur.get("version") or 0)},
+    )
+
 
 @router.get("/characters")
 def list_characters(
+    response: Response,
     owner_discord_id: Optional[str] = Query(default=None),
     campaign_id: Optional[str] = Query(default=None),
     limit: int = Query(default=200, ge=1, le=1000),
+    fields: str = Query(default="full", pattern="^(full|summary)$"),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor from the previous page"),
 ):
+    """Roster, newest first. fields=summary skips the sheet; pages continue via X-Next-Cursor."""
     db = _get_db()
     if db is None:
         # No DB: return empty (keeps portal functional without crashing)
         return []
 
+    ensure_character_indexes(db)
     active_campaign = campaign_id or _get_active_campaign_id(db)
 
     q: Dict[str, Any] = {"campaign_id": active_campaign}
     if owner_discord_id:
         q["owner_discord_id"] = owner_discord_id
+    if cursor:
+        after_ts, after_id = _decode_cursor(cursor)
+        q.update(_after_cursor(after_ts, after_id))
+
+    projection: Dict[str, Any] = {"_id": 0}
+    if fields == "summary":
+        projection.update({f: 1 for f in SUMMARY_FIELDS})
 
+    # Fetch one extra row to know whether another page exists.
     docs = list(
-        db["characters"].find(q, {"_id": 0}).sort("updated_at", -1).limit(limit)
+        db["characters"].find(q, projection).sort([("updated_at", -1), ("character_id", -1)]).limit(limit + 1)
     )
+    if len(docs) > limit:
+        docs = docs[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(docs[-1])
     return docs
 
 
+# -----------------------------
+# Bulk NDJSON roster (registered before /characters/{character_id} so the paths win)
+# -----------------------------
+
+NDJSON_BATCH = 500
+NDJSON_MAX_ERRORS = 1000
+NDJSON_MAX_LINE_BYTES = int(float(os.getenv("RQ_NDJSON_MAX_LINE_KB", "1024")) * 1024)
+
+
+@router.get("/characters/export.ndjson")
+def export_roster(campaign_id: Optional[str] = Query(default=None)):
+    """Stream every character in a campaign as one JSON document per line."""
+    db = _get_db()
+    if db is None:
+        raise HTTPException(status_code=500, detail="Mongo unavailable")
+    cid = campaign_id or _get_active_campaign_id(db)
+    ensure_character_indexes(db)
+
+    def lines():
+        cur = db["characters"].find({"campaign_id": cid}, {"_id": 0}).sort([("updated_at", -1), ("character_id", -1)]).batch_size(NDJSON_BATCH)
+        for doc in cur:
+            yield json.dumps(doc, ensure_ascii=False, default=str) + "\n"
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{_safe_slug(cid)}-roster.ndjson"'},
+    )
+
+
+def _prepare_import(data: Dict[str, Any], campaign_id: str, now: str, new_id: bool = False) -> Dict[str, Any]:
+    """Normalize an imported/exported character before upsert (shared by single + bulk import)."""
+    data = dict(data or {})
+    if new_id or not data.get("character_id") or data.get("character_id") in ("TEMPLATE", ""):
+        data["character_id"] = str(uuid.uuid4())
+    data["campaign_id"] = campaign_id or data.get("campaign_id")
+    data["created_at"] = data.get("created_at") or now
+    data["updated_at"] = now
+    data.pop("version", None)
+    data.pop("_id", None)
+    return data
+
+
+@router.post("/characters/import.ndjson")
+async def import_roster(
+    request: Request,
+    campaign_id: Optional[str] = Query(default=None, description="Target campaign (default: each line's own, else active)"),
+    new_ids: bool = Query(default=False, description="Assign fresh character_ids (copy instead of move/restore)"),
+):
+    """Import an NDJSON roster in batched, unordered bulk upserts; bad lines are reported, not fatal."""
+    db = _get_db()
+    if db is None:
+        raise HTTPException(status_code=500, detail="Mongo unavailable")
+    await run_db(ensure_character_indexes, db)
+    fallback_campaign = await run_db(_get_active_campaign_id, db)
+    now = _utc_now_iso()
+
+    stats = {"lines": 0, "upserted": 0, "modified": 0, "matched": 0, "batches": 0}
+    errors: List[Dict[str, Any]] = []
+    error_count = 0
+    ops: List[UpdateOne] = []
+    op_lines: List[int] = []
+
+    def note(line_no: int, msg: str):
+        nonlocal error_count
+        error_count += 1
+        if len(errors) < NDJSON_MAX_ERRORS:
+            errors.append({"line": line_no, "error": msg})
+
+    async def flush():
+        if not ops:
+            return
+        batch, lines_for = list(ops), list(op_lines)
+        ops.clear()
+        op_lines.clear()
+        stats["batches"] += 1
+        try:
+            res = await run_db(db["characters"].bulk_write, batch, ordered=False)
+            details = res.bulk_api_result
+        except BulkWriteError as e:
+            details = e.details or {}
+            for we in details.get("writeErrors") or []:
+                note(lines_for[int(we.get("index", 0))], str(we.get("errmsg") or "write_failed"))
+        stats["upserted"] += int(details.get("nUpserted") or 0)
+        stats["modified"] += int(details.get("nModified") or 0)
+        stats["matched"] += int(details.get("nMatched") or 0)
+
+    def add(line_no: int, raw: bytes):
+        raw = raw.strip()
+        if not raw:
+            return
+        stats["lines"] += 1
+        try:
+            item = json.loads(raw)
+        except Exception as e:
+            note(line_no, f"invalid_json: {e}")
+            return
+        if not isinstance(item, dict):
+            note(line_no, "not_an_object")
+            return
+        data = _prepare_import(item, campaign_id or item.get("campaign_id") or fallback_campaign, now, new_ids)
+        ops.append(UpdateOne({"character_id": data["character_id"]}, {"$set": data, "$inc": {"version": 1}}, upsert=True))
+        op_lines.append(line_no)
+
+    def too_long(line: int) -> HTTPException:
+        return HTTPException(
+            status_code=413,
+            detail={"error": "ndjson_line_too_long", "line": line, "max_bytes": NDJSON_MAX_LINE_BYTES, **stats},
+        )
+
+    # Body is consumed as it arrives; only one batch of parsed lines and one partial line are held at a time.
+    buf = b""
+    line_no = 0
+    async for chunk in request.stream():
+        buf += chunk
+        *complete, buf = buf.split(b"\n")
+        for raw in complete:
+            line_no += 1
+            if len(raw) > NDJSON_MAX_LINE_BYTES:
+                raise too_long(line_no)
+            add(line_no, raw)
+            if len(ops) >= NDJSON_BATCH:
+                await flush()
+        if len(buf) > NDJSON_MAX_LINE_BYTES:
+            raise too_long(line_no + 1)
+    if buf:
+        line_no += 1
+        add(line_no, buf)
+    await flush()
+
+    return {
+        "ok": not error_count, **stats, "errors": errors,
+        "errors_total": error_count, "errors_truncated": error_count > len(errors),
+    }
+
+
 @router.get("/characters/{character_id}")
 def get_character(character_id: str):
     db = _get_db()
@@ -199,14 +479,17 @@ def create_character(payload: CharacterRecord):
     data["name"] = (data.get("name") or "").strip()
     data["class_name"] = (data.get("class_name") or "").strip()
     data["race"] = (data.get("race") or "").strip()
+    data.pop("version", None)
 
-    db["characters"].update_one(
+    doc = db["characters"].find_one_and_update(
         {"character_id": data["character_id"]},
-        {"$set": data},
+        {"$set": data, "$inc": {"version": 1}},
         upsert=True,
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER,
     )
 
-    return {"ok": True, "character": data}
+    return {"ok": True, "character": doc}
 
 
 @router.put("/characters/{character_id}")
@@ -220,20 +503,94 @@ def update_character(character_id: str, payload: CharacterRecord):
     # Pydantic models will include defaults for missing fields; we only want to
     # apply what the client actually sent where possible.
     incoming = payload.dict(exclude_unset=True)
+    expected_version = incoming.pop("version", None)
+
+    # The merged write is conditional on the version it was merged against. With an explicit
+    # version a mismatch is a 409; without one we re-read and re-merge instead of clobbering.
+    for _ in range(3):
+        existing: Dict[str, Any] = db["characters"].find_one({"character_id": character_id}, {"_id": 0}) or {}
+        current_version = int(existing.get("version") or 0)
+        if expected_version is not None and existing and current_version != int(expected_version):
+            raise HTTPException(
+                status_code=409,
+                detail={"error": "version_conflict", "current_version": current_version},
+            )
+        merged = _deep_merge(existing, incoming)
+        merged.pop("version", None)
+
+        # Force identity + campaign and timestamps
+        merged["character_id"] = character_id
+        merged["campaign_id"] = merged.get("campaign_id") or campaign_id
+
+        now = _utc_now_iso()
+        merged["created_at"] = merged.get("created_at") or existing.get("created_at") or now
+        merged["updated_at"] = now
+
+        q = _version_filter(character_id, current_version) if existing else {"character_id": character_id}
+        try:
+            doc = db["characters"].find_one_and_update(
+                q,
+                {"$set": merged, "$inc": {"version": 1}},
+                upsert=not existing,
+                projection={"_id": 0},
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            doc = None
+        if doc is not None:
+            return {"ok": True, "character": doc}
+        if expected_version is not None:
+            break
+    raise _conflict_or_missing(db, character_id)
+
+
+@router.patch("/characters/{character_id}")
+def patch_character(character_id: str, payload: CharacterPatch):
+    """Atomic partial update: dotted-path $set/$inc/$unset in one write.
+
+    An HP tick is {"inc": {"sheet.combat.hp.current": -3}}. Pass "version" to make the write
+    conditional; a mismatch returns 409 with the current version. Only touched paths are returned.
+    """
+    db = _get_db()
+    if db is None:
+        raise HTTPException(status_code=500, detail="Mongo unavailable")
 
-    existing: Dict[str, Any] = db["characters"].find_one({"character_id": character_id}, {"_id": 0}) or {}
-    merged = _deep_merge(existing, incoming)
-
-    # Force identity + campaign and timestamps
-    merged["character_id"] = character_id
-    merged["campaign_id"] = merged.get("campaign_id") or campaign_id
-
-    now = _utc_now_iso()
-    merged["created_at"] = merged.get("created_at") or existing.get("created_at") or now
-    merged["updated_at"] = now
+    sets = _flatten_paths(payload.set) if payload.set else {}
+    incs = {_check_path(k): v for k, v in (payload.inc or {}).items()}
+    unsets = {_check_path(k): "" for k in (payload.unset or [])}
+    if not (sets or incs or unsets):
+        raise HTTPException(status_code=422, detail="empty_patch")
+
+    # Mongo rejects overlapping paths in one update; report it as a client error instead.
+    paths = sorted(list(sets) + list(incs) + list(unsets))
+    for a, b in zip(paths, paths[1:]):
+        if a == b or b.startswith(a + "."):
+            raise HTTPException(status_code=422, detail=f"conflicting_paths: {a}, {b}")
+
+    update: Dict[str, Any] = {
+        "$set": {**sets, "updated_at": _utc_now_iso()},
+        "$inc": {**incs, "version": 1},
+    }
+    if unsets:
+        update["$unset"] = unsets
+
+    projection = {"_id": 0, "character_id": 1, "version": 1, "updated_at": 1}
+    for path in paths:
+        projection[path] = 1
 
-    db["characters"].update_one({"character_id": character_id}, {"$set": merged}, upsert=True)
-    return {"ok": True, "character": merged}
+    try:
+        doc = db["characters"].find_one_and_update(
+            _version_filter(character_id, payload.version),
+            update,
+            projection=projection,
+            return_document=ReturnDocument.AFTER,
+        )
+    except OperationFailure as e:
+        # e.g. $inc on a non-numeric field, or a path through a scalar
+        raise HTTPException(status_code=422, detail=f"patch_rejected: {e.details.get('errmsg') if e.details else e}")
+    if doc is None:
+        raise _conflict_or_missing(db, character_id)
+    return {"ok": True, "character": doc}
 
 
 @router.delete("/characters/{character_id}")
@@ -247,6 +604,7 @@ def delete_character(character_id: str):
     avatar_url = doc.get("avatar_url")
 
     db["characters"].delete_one({"character_id": character_id})
+    invalidate_derived(character_id)
 
     if avatar_url:
         # avatar_url is like /campaigns/<campaign>/assets/avatars/<file>
@@ -264,6 +622,33 @@ def delete_character(character_id: str):
     return {"ok": True, "deleted": True, "character_id": character_id}
 
 
+@router.get("/characters/{character_id}/derived")
+def get_character_derived(character_id: str):
+    """Ability mods, proficiency, saves, skills, spellcasting and features (SRD), cached per version."""
+    db = _get_db()
+    if db is None:
+        raise HTTPException(status_code=500, detail="Mongo unavailable")
+    derived = derived_by_id(db, character_id)
+    if derived is None:
+        raise HTTPException(status_code=404, detail="Character not found")
+    return {"ok": True, "derived": derived}
+
+
+@router.get("/characters/{character_id}/bonus/{stat}")
+def get_character_bonus(character_id: str, stat: str):
+    """Single bonus lookup, e.g. /bonus/stealth, /bonus/dex_save, /bonus/spell_attack."""
+    db = _get_db()
+    if db is None:
+        raise HTTPException(status_code=500, detail="Mongo unavailable")
+    derived = derived_by_id(db, character_id)
+    if derived is None:
+        raise HTTPException(status_code=404, detail="Character not found")
+    key = stat_key(stat)
+    if key not in derived["bonuses"]:
+        raise HTTPException(status_code=404, detail=f"unknown_stat: {stat}")
+    return {"character_id": character_id, "stat": key, "bonus": derived["bonuses"][key], "version": derived["version"]}
+
+
 @router.get("/characters/{character_id}/export")
 def export_character(character_id: str):
     db = _get_db()
@@ -284,18 +669,17 @@ def import_character(payload: Dict[str, Any]):
         raise HTTPException(status_code=500, detail="Mongo unavailable")
 
     active_campaign = _get_active_campaign_id(db)
+    payload = payload or {}
+    data = _prepare_import(payload, payload.get("campaign_id") or active_campaign, _utc_now_iso())
 
-    data = dict(payload or {})
-    if not data.get("character_id") or data.get("character_id") in ("TEMPLATE", ""):
-        data["character_id"] = str(uuid.uuid4())
-
-    data["campaign_id"] = data.get("campaign_id") or active_campaign
-    now = _utc_now_iso()
-    data["created_at"] = data.get("created_at") or now
-    data["updated_at"] = now
-
-    db["characters"].update_one({"character_id": data["character_id"]}, {"$set": data}, upsert=True)
-    return {"ok": True, "character": data}
+    doc = db["characters"].find_one_and_update(
+        {"character_id": data["character_id"]},
+        {"$set": data, "$inc": {"version": 1}},
+        upsert=True,
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER,
+    )
+    return {"ok": True, "character": doc}
 
 
 @router.post("/characters/{character_id}/avatar")
@@ -304,31 +688,28 @@ async def upload_avatar(character_id: str, file: UploadFile = File(...)):
     if db is None:
         raise HTTPException(status_code=500, detail="Mongo unavailable")
 
-    doc = db["characters"].find_one({"character_id": character_id}, {"_id": 0})
+    doc = await run_db(db["characters"].find_one, {"character_id": character_id}, {"_id": 0})
     if not doc:
         raise HTTPException(status_code=404, detail="Character not found")
 
-    campaign = doc.get("campaign_id") or _get_active_campaign_id(db)
-    os.makedirs(_avatar_dir(campaign), exist_ok=True)
+    campaign = doc.get("campaign_id") or await run_db(_get_active_campaign_id, db)
 
-    # sanitize extension
-    filename = file.filename or "avatar.png"
-    ext = os.path.splitext(filename)[1].lower()
-    if ext not in (".png", ".jpg", ".jpeg", ".webp"):
-        ext = ".png"
+    # Streamed to disk with a size cap; the real image type decides the extension.
+    upload = await receive_image(file, _avatar_dir(campaign))
+    ext = os.path.splitext(file.filename or "")[1].lower()
+    if not upload.matches_ext(ext):
+        ext = upload.ext
 
     base = _safe_slug(doc.get("name") or character_id)
     out_name = f"{base}-{character_id[:8]}{ext}"
     out_path = f"{_avatar_dir(campaign)}/{out_name}"
-
-    data = await file.read()
-    try:
-        with open(out_path, "wb") as f:
-            f.write(data)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to write avatar: {e}")
+    await commit_upload(upload, out_path)
 
     avatar_url = f"{_campaign_root(campaign)}/assets/avatars/{out_name}"
-    db["characters"].update_one({"character_id": character_id}, {"$set": {"avatar_url": avatar_url, "updated_at": _utc_now_iso()}})
+    await run_db(
+        db["characters"].update_one,
+        {"character_id": character_id},
+        {"$set": {"avatar_url": avatar_url, "updated_at": _utc_now_iso()}, "$inc": {"version": 1}},
+    )
 
     return {"ok": True, "avatar_url": avatar_url}
\ No newline at end of file
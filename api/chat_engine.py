@@ -2,7 +2,7 @@
 # Script Name: chat_engine.py
 # Script Location: /opt/RealmQuest/api/chat_engine.py
 # Date: 2026-01-31
-# Version: 21.1.1 (Canonical campaign id + imagine payload hardening)
+# Version: 21.4.0 (Rules retrieval keyed on the player message, category-filtered)
 # ===============================================================
 
 import os
@@ -13,15 +13,11 @@ import requests
 import time
 from fastapi import APIRouter, Response, BackgroundTasks, HTTPException
 from pydantic import BaseModel
-from pymongo import MongoClient
-
+from database import get_db, run_db
 from system_config import get_active_campaign_id
+from kenku_client import kenku
 
 router = APIRouter()
-try:
-    mongo = MongoClient(os.getenv("MONGO_URL", "mongodb://realmquest-mongo:27017/"), serverSelectionTimeoutMS=2000)
-    db = mongo["realmquest"]
-except: db = None
 
 try:
     from ai_engine import AIEngine
@@ -33,7 +29,6 @@ try: r_client = redis.from_url(os.getenv("REDIS_URL", "redis://realmquest-redis:
 except: r_client = None
 
 # --- CONFIG ---
-KENKU_URL = os.getenv("KENKU_URL", "http://realmquest-kenku:3333").rstrip("/")
 FALLBACK_VOICE_ID = "onwK4e9ZLuTAKqWW03F9" # Daniel
 
 # --- RUNTIME MEMORY ---
@@ -162,6 +157,7 @@ SYSTEM_PROMPT_OVERRIDE = ""
 
 def get_active_campaign_name():
     """Canonical active campaign id (split-brain hardened)."""
+    db = get_db()
     return get_active_campaign_id(db, default=os.getenv("RQ_DEFAULT_CAMPAIGN", "the_collision_stone"))
 
 def get_campaign_paths():
@@ -175,6 +171,7 @@ def get_campaign_paths():
     }
 
 def sync_voices_from_db():
+    db = get_db()
     global VOICE_DB, ARCHETYPE_DB, DM_VOICE_ID, LAST_DB_SYNC
     if db is None: return
     if time.time() - LAST_DB_SYNC < 10: return
@@ -218,23 +215,16 @@ def get_voice_for_role(actor_tag, audio_registry):
 
     return DM_VOICE_ID or FALLBACK_VOICE_ID
 
-def async_audio_manager(mapped_track_id):
-    if not mapped_track_id or str(mapped_track_id).startswith("sys_"): return
-    try:
-        requests.put(f"{KENKU_URL}/v1/playlist/volume", json={"volume": 0.3}, timeout=0.5)
-        requests.put(f"{KENKU_URL}/v1/playlist/play", json={"id": mapped_track_id}, timeout=0.5)
-        requests.put(f"{KENKU_URL}/v1/soundboard/play", json={"id": mapped_track_id}, timeout=0.5)
-    except: pass
-
 @router.post("/chat/generate")
 async def generate_response(payload: ChatRequest, background_tasks: BackgroundTasks):
+    db = get_db()
     if not ai_available: return {"response": "Brain Offline.", "voice_id": "default"}
-    sync_voices_from_db()
+    await run_db(sync_voices_from_db)
 
     audio_config = {"dmName": "DM", "dmVoice": DM_VOICE_ID, "soundscapes": []}
     if db is not None:
         try:
-            acr = db["system_config"].find_one({"config_id": "audio_registry"})
+            acr = await run_db(db["system_config"].find_one, {"config_id": "audio_registry"})
             if acr: audio_config = acr
         except: pass
 
@@ -263,7 +253,7 @@ async def generate_response(payload: ChatRequest, background_tasks: BackgroundTa
         full_prompt += f"{turn['role'].upper()}: {turn['content']}\n"
     full_prompt += "ASSISTANT:"
 
-    raw_response = ai.generate_story(system_instruction, full_prompt)
+    raw_response = ai.generate_story(system_instruction, full_prompt, rag_query=payload.message)
     raw_response = re.sub(r"\|\s*VOICE_ID:[^\]]+", "", raw_response)
     if payload.message[:10].lower() in raw_response.lower():
         raw_response = raw_response.replace(payload.message, "").strip()
@@ -287,7 +277,7 @@ async def generate_response(payload: ChatRequest, background_tasks: BackgroundTa
             if sound_tag.lower() in s.get("label", "").lower():
                 mapped_id = s.get("track_id"); break
         if mapped_id:
-            background_tasks.add_task(async_audio_manager, mapped_id)
+            kenku.cue(mapped_id)  # non-blocking; duplicate/rapid cues collapse in the client
         
         # SCENE TRIGGER
         pending_prompt = re.sub(r"\[.*?\]", "", clean_text).strip()[:400]
@@ -2,11 +2,11 @@
 # Script Name: config.py
 # Script Location: /opt/RealmQuest/bot/core/config.py
 # Date: 2026-01-27
-# Version: 21.0.0 (Tuned Hearing)
+# Version: 21.0.1 (Mongo via the shared pooled client in database.py)
 # ===============================================================
 
 import os
-from pymongo import MongoClient
+from database import get_db
 
 # ENV VARS
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://realmquest-mongo:27017/")
@@ -24,22 +24,15 @@ SILENCE_TIMEOUT = 2.5      # Wait for player to finish sentence
 MAX_RECORD_TIME = 45.0     
 PRE_BUFFER_LEN = 150       
 
-# DB CONNECTION
-_db = None
-
-def get_db():
-    global _db
-    if not _db:
-        client = MongoClient(MONGO_URL)
-        _db = client["realmquest"]
-    return _db
-
+# DB CONNECTION (shared pool: database.get_db)
 def get_settings():
     db = get_db()
+    if db is None: return {}
     conf = db["system_config"].find_one({"config_id": "main"})
     if not conf: return {} 
     return conf
 
 def update_settings(updates: dict):
     db = get_db()
+    if db is None: return
     db["system_config"].update_one({"config_id": "main"}, {"$set": updates})
\ No newline at end of file
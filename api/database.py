@@ -0,0 +1,114 @@
+#===============================================================
+#Script Name: database.py
+#Script Location: /opt/RealmQuest/api/database.py
+#Date: 10/19/2026
+#Created By: T03KNEE
+#Github: https://github.com/To3Knee/RealmQuest
+#Version: 1.0.1
+#About: Single pooled Mongo data-access layer for every API router.
+#       - One MongoClient per process (thread-safe, pooled), opened/closed by the FastAPI lifespan.
+#         Callers resolve get_db() per call (never cache it at import time), so a client the
+#         lifespan closed is never reused.
+#       - One env contract: RQ_MONGO_URI (or legacy MONGO_URL) + RQ_MONGO_DB, pool sizes tunable.
+#       - Health reporting and run_db() to keep driver calls off the event loop inside async
+#         endpoints.
+#===============================================================
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from fastapi.concurrency import run_in_threadpool
+from pymongo import MongoClient
+from pymongo.database import Database
+
+logger = logging.getLogger("api")
+
+T = TypeVar("T")
+
+MONGO_URI = os.getenv("RQ_MONGO_URI") or os.getenv("MONGO_URL") or "mongodb://realmquest-mongo:27017/"
+MONGO_DB = os.getenv("RQ_MONGO_DB", "realmquest")
+
+# Pool tuning: sync endpoints run in Starlette's threadpool (40 workers by default), so the
+# pool is sized to cover it without each request opening its own connection.
+MAX_POOL = int(os.getenv("RQ_MONGO_MAX_POOL", "64"))
+MIN_POOL = int(os.getenv("RQ_MONGO_MIN_POOL", "4"))
+IDLE_MS = int(os.getenv("RQ_MONGO_MAX_IDLE_MS", "300000"))
+SELECT_MS = int(os.getenv("RQ_MONGO_SELECT_TIMEOUT_MS", "2000"))
+
+_lock = threading.Lock()
+_client: Optional[MongoClient] = None
+
+
+def get_client() -> Optional[MongoClient]:
+    """The process-wide client. Created lazily (no network I/O until first operation)."""
+    global _client
+    if _client is not None:
+        return _client
+    with _lock:
+        if _client is None:
+            try:
+                _client = MongoClient(
+                    MONGO_URI,
+                    maxPoolSize=MAX_POOL,
+                    minPoolSize=MIN_POOL,
+                    maxIdleTimeMS=IDLE_MS,
+                    serverSelectionTimeoutMS=SELECT_MS,
+                    appname="realmquest-api",
+                )
+            except Exception as e:
+                logger.error(f"❌ Mongo client init failed: {e}")
+                return None
+    return _client
+
+
+def get_db() -> Optional[Database]:
+    client = get_client()
+    return client[MONGO_DB] if client is not None else None
+
+
+async def run_db(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking driver call from an async endpoint without stalling the event loop."""
+    return await run_in_threadpool(fn, *args, **kwargs)
+
+
+def health() -> Dict[str, Any]:
+    out: Dict[str, Any] = {"db": MONGO_DB, "max_pool": MAX_POOL, "min_pool": MIN_POOL}
+    client = get_client()
+    if client is None:
+        out["status"] = "unavailable"
+        return out
+    try:
+        start = time.perf_counter()
+        client.admin.command("ping")
+        out["status"] = "ok"
+        out["ping_ms"] = round((time.perf_counter() - start) * 1000.0, 2)
+    except Exception as e:
+        out["status"] = "error"
+        out["error"] = str(e)
+    return out
+
+
+def connect() -> None:
+    """Lifespan startup: open the pool and log reachability (never fatal; Mongo may start later)."""
+    h = health()
+    if h.get("status") == "ok":
+        logger.info(f"✅ Mongo pool ready ({MONGO_DB}, ping {h.get('ping_ms')}ms, max {MAX_POOL})")
+    else:
+        logger.warning(f"⚠️ Mongo not reachable yet: {h.get('error') or h.get('status')}")
+
+
+def close() -> None:
+    """Lifespan shutdown."""
+    global _client
+    with _lock:
+        if _client is not None:
+            try:
+                _client.close()
+            except Exception:
+                pass
+            _client = None
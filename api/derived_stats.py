@@ -0,0 +1,355 @@
+#===============================================================
+#Script Name: derived_stats.py
+#Script Location: /opt/RealmQuest/api/derived_stats.py
+#Date: 10/19/2026
+#Created By: T03KNEE
+#Github: https://github.com/To3Knee/RealmQuest
+#Version: 1.0.1
+#About: Server-side derived stats for character sheets.
+#       SRD Levels / Classes / Features / Skills are loaded once (from the SRD bundle when
+#       present) into compact lookup tables; ability mods, proficiency, saves, skills,
+#       spellcasting and class features are derived per character and cached by
+#       (character_id, version) so repeat lookups are O(1).
+#===============================================================
+
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import srd_bundle
+
+
+SRD_RULESET = "2014"
+
+ABILITIES = ("str", "dex", "con", "int", "wis", "cha")
+
+_ABILITY_ALIASES = {
+    "strength": "str", "dexterity": "dex", "constitution": "con",
+    "intelligence": "int", "wisdom": "wis", "charisma": "cha",
+}
+
+
+def _key(name: Any) -> str:
+    """'Sleight of Hand' / 'sleight_of_hand' / 'skill-sleight-of-hand' -> 'sleight-of-hand'."""
+    s = str(name or "").strip().lower().replace("_", "-").replace(" ", "-")
+    return s[len("skill-"):] if s.startswith("skill-") else s
+
+
+def _ability_key(name: Any) -> Optional[str]:
+    s = str(name or "").strip().lower()
+    s = _ABILITY_ALIASES.get(s, s)
+    return s if s in ABILITIES else None
+
+
+def ability_mod(score: Any) -> int:
+    try:
+        return (int(score) - 10) // 2
+    except Exception:
+        return 0
+
+
+class SrdTables:
+    """Compact, read-only views of the SRD files the engine needs."""
+
+    def __init__(self, ruleset: str = SRD_RULESET):
+        def load(name: str) -> Sequence[Dict[str, Any]]:
+            # Lazily decoded from the mmap'd bundle when bootstrap built one, else the JSON file.
+            return srd_bundle.records(ruleset, name)
+
+        # class -> (hit_die, save abilities, spellcasting ability)
+        self.classes: Dict[str, Tuple[int, Tuple[str, ...], Optional[str]]] = {}
+        self.class_names: Dict[str, str] = {}
+        for c in load("Classes"):
+            idx = c.get("index")
+            if not idx:
+                continue
+            saves = tuple(a for a in (_ability_key(s.get("index")) for s in c.get("saving_throws") or []) if a)
+            spell = _ability_key(((c.get("spellcasting") or {}).get("spellcasting_ability") or {}).get("index"))
+            self.classes[idx] = (int(c.get("hit_die") or 8), saves, spell)
+            self.class_names[_key(c.get("name"))] = idx
+
+        # (class, level) -> (prof_bonus, slots[1..9], cantrips_known, spells_known, class_specific)
+        self.levels: Dict[Tuple[str, int], Tuple[int, Tuple[int, ...], int, int, Dict[str, Any]]] = {}
+        for lv in load("Levels"):
+            if lv.get("subclass"):
+                continue
+            cls = (lv.get("class") or {}).get("index")
+            level = int(lv.get("level") or 0)
+            if not cls or level < 1:
+                continue
+            sc = lv.get("spellcasting") or {}
+            slots = tuple(int(sc.get(f"spell_slots_level_{i}") or 0) for i in range(1, 10))
+            self.levels[(cls, level)] = (
+                int(lv.get("prof_bonus") or 2),
+                slots,
+                int(sc.get("cantrips_known") or 0),
+                int(sc.get("spells_known") or 0),
+                dict(lv.get("class_specific") or {}),
+            )
+
+        # class -> [(level, name, subclass index or "")] sorted by level
+        self.features: Dict[str, List[Tuple[int, str, str]]] = {}
+        for ft in load("Features"):
+            cls = (ft.get("class") or {}).get("index")
+            if not cls or not ft.get("name"):
+                continue
+            sub = (ft.get("subclass") or {}).get("index") or ""
+            self.features.setdefault(cls, []).append((int(ft.get("level") or 1), str(ft["name"]), sub))
+        for rows in self.features.values():
+            rows.sort()
+
+        # skill -> ability
+        self.skills: Dict[str, str] = {}
+        for sk in load("Skills"):
+            ab = _ability_key((sk.get("ability_score") or {}).get("index"))
+            if sk.get("index") and ab:
+                self.skills[_key(sk["index"])] = ab
+
+    def class_index(self, class_name: Any) -> Optional[str]:
+        k = _key(class_name)
+        if k in self.classes:
+            return k
+        return self.class_names.get(k)
+
+
+_TABLES: Optional[SrdTables] = None
+_TABLES_LOCK = threading.Lock()
+
+
+def get_tables() -> SrdTables:
+    global _TABLES
+    if _TABLES is None:
+        with _TABLES_LOCK:
+            if _TABLES is None:
+                _TABLES = SrdTables()
+    return _TABLES
+
+
+# -----------------------------
+# Sheet readers (sheets are free-form; accept the common shapes)
+# -----------------------------
+
+def _abilities(sheet: Dict[str, Any]) -> Dict[str, int]:
+    raw = sheet.get("abilities") if isinstance(sheet.get("abilities"), dict) else {}
+    out: Dict[str, int] = {}
+    for k, v in raw.items():
+        ab = _ability_key(k)
+        if not ab:
+            continue
+        if isinstance(v, dict):
+            v = v.get("score", v.get("value", 10))
+        try:
+            out[ab] = int(v)
+        except Exception:
+            out[ab] = 10
+    for ab in ABILITIES:
+        out.setdefault(ab, 10)
+    return out
+
+
+def _proficiency_map(value: Any, normalize) -> Dict[str, int]:
+    """Proficiency multipliers (1 = proficient, 2 = expertise) from a list or dict."""
+    out: Dict[str, int] = {}
+    if isinstance(value, list):
+        for item in value:
+            k = normalize(item)
+            if k:
+                out[k] = max(out.get(k, 0), 1)
+    elif isinstance(value, dict):
+        for name, v in value.items():
+            k = normalize(name)
+            if not k:
+                continue
+            if isinstance(v, dict):
+                mult = 2 if v.get("expertise") else (1 if v.get("proficient") else 0)
+            elif isinstance(v, str):
+                mult = 2 if v.strip().lower() == "expertise" else (1 if v.strip() else 0)
+            else:
+                try:
+                    mult = int(v)
+                except Exception:
+                    mult = 1 if v else 0
+            if mult:
+                out[k] = max(out.get(k, 0), min(2, mult))
+    return out
+
+
+def _skill_profs(sheet: Dict[str, Any], skills: Dict[str, str]) -> Dict[str, int]:
+    norm = lambda n: _key(n) if _key(n) in skills else None
+    out = _proficiency_map(sheet.get("skills"), norm)
+    profs = sheet.get("proficiencies") if isinstance(sheet.get("proficiencies"), dict) else {}
+    for k, v in _proficiency_map(profs.get("skills"), norm).items():
+        out[k] = max(out.get(k, 0), v)
+    for k in _proficiency_map(sheet.get("expertise"), norm):
+        out[k] = 2
+    return out
+
+
+def _save_profs(sheet: Dict[str, Any]) -> Dict[str, int]:
+    out = _proficiency_map(sheet.get("saves") or sheet.get("saving_throws"), _ability_key)
+    profs = sheet.get("proficiencies") if isinstance(sheet.get("proficiencies"), dict) else {}
+    for k, v in _proficiency_map(profs.get("saves") or profs.get("saving_throws"), _ability_key).items():
+        out[k] = max(out.get(k, 0), v)
+    return out
+
+
+# -----------------------------
+# Engine
+# -----------------------------
+
+def derive(doc: Dict[str, Any], tables: Optional[SrdTables] = None) -> Dict[str, Any]:
+    """Derived values for one character document (pure; see derived_for() for the cached path)."""
+    t = tables or get_tables()
+    sheet = doc.get("sheet") if isinstance(doc.get("sheet"), dict) else {}
+    level = max(1, min(20, int(doc.get("level") or 1)))
+    cls = t.class_index(doc.get("class_name"))
+    subclass = _key(sheet.get("subclass") or doc.get("subclass"))
+
+    scores = _abilities(sheet)
+    mods = {ab: ability_mod(sc) for ab, sc in scores.items()}
+
+    lv = t.levels.get((cls, level)) if cls else None
+    prof = lv[0] if lv else 2 + (level - 1) // 4
+    hit_die, class_saves, spell_ability = t.classes.get(cls, (None, (), None)) if cls else (None, (), None)
+
+    save_mult = {ab: 1 for ab in class_saves}
+    for ab, m in _save_profs(sheet).items():
+        save_mult[ab] = max(save_mult.get(ab, 0), m)
+    saves = {ab: mods[ab] + prof * save_mult.get(ab, 0) for ab in ABILITIES}
+
+    skill_mult = _skill_profs(sheet, t.skills)
+    skills = {
+        sk: {"ability": ab, "bonus": mods[ab] + prof * skill_mult.get(sk, 0), "proficiency": skill_mult.get(sk, 0)}
+        for sk, ab in t.skills.items()
+    }
+
+    out: Dict[str, Any] = {
+        "character_id": doc.get("character_id"),
+        "version": int(doc.get("version") or 0),
+        "class": cls,
+        "level": level,
+        "hit_die": hit_die,
+        "proficiency_bonus": prof,
+        "abilities": {ab: {"score": scores[ab], "mod": mods[ab]} for ab in ABILITIES},
+        "saves": saves,
+        "skills": skills,
+        "initiative": mods["dex"],
+        "passive_perception": 10 + skills.get("perception", {}).get("bonus", mods["wis"]),
+        "class_specific": dict(lv[4]) if lv else {},
+        "features": [
+            name for (flv, name, sub) in t.features.get(cls, [])
+            if flv <= level and (not sub or sub == subclass)
+        ] if cls else [],
+    }
+
+    if spell_ability:
+        slots = lv[1] if lv else ()
+        out["spellcasting"] = {
+            "ability": spell_ability,
+            "save_dc": 8 + prof + mods[spell_ability],
+            "attack_bonus": prof + mods[spell_ability],
+            "slots": {str(i + 1): n for i, n in enumerate(slots) if n},
+            "cantrips_known": lv[2] if lv else 0,
+            "spells_known": lv[3] if lv else 0,
+        }
+
+    # Flat name -> bonus map for O(1) lookups ("stealth", "dex", "dex_save", "spell_attack", ...).
+    flat: Dict[str, int] = {"initiative": out["initiative"], "proficiency": prof}
+    for ab in ABILITIES:
+        flat[ab] = mods[ab]
+        flat[f"{ab}_save"] = saves[ab]
+    for sk, v in skills.items():
+        flat[sk] = v["bonus"]
+    if "spellcasting" in out:
+        flat["spell_attack"] = out["spellcasting"]["attack_bonus"]
+        flat["spell_save_dc"] = out["spellcasting"]["save_dc"]
+    out["bonuses"] = flat
+    return out
+
+
+def stat_key(stat: Any) -> str:
+    """Normalize a requested stat name to a key of derive()['bonuses']."""
+    s = _key(stat)
+    for suffix in ("-save", "-saving-throw", "-st"):
+        if s.endswith(suffix) and _ability_key(s[: -len(suffix)]):
+            return f"{_ability_key(s[: -len(suffix)])}_save"
+    if s.startswith("save-") and _ability_key(s[5:]):
+        return f"{_ability_key(s[5:])}_save"
+    if _ability_key(s):
+        return _ability_key(s)  # type: ignore[return-value]
+    return {"init": "initiative", "prof": "proficiency", "spell-attack": "spell_attack", "spell-save-dc": "spell_save_dc"}.get(s, s)
+
+
+# -----------------------------
+# Cache (per character version)
+# -----------------------------
+
+_CACHE_MAX = int(os.getenv("RQ_DERIVED_CACHE_SIZE", "2048"))
+_cache: "OrderedDict[Tuple[str, int, str], Dict[str, Any]]" = OrderedDict()
+_latest: Dict[str, Tuple[str, int, str]] = {}  # character_id -> its current cache key
+_cache_lock = threading.Lock()
+
+
+def cache_key(doc: Dict[str, Any]) -> Tuple[str, int, str]:
+    # version bumps on every write; updated_at covers documents written before versioning.
+    return str(doc.get("character_id") or ""), int(doc.get("version") or 0), str(doc.get("updated_at") or "")
+
+
+def cached(key: Tuple[str, int, str]) -> Optional[Dict[str, Any]]:
+    """Cached derived stats for an exact (character_id, version, updated_at), or None."""
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit is not None:
+            _cache.move_to_end(key)
+        return hit
+
+
+def derived_for(doc: Dict[str, Any]) -> Dict[str, Any]:
+    key = cache_key(doc)
+    hit = cached(key)
+    if hit is not None:
+        return hit
+    value = derive(doc)
+    with _cache_lock:
+        # A newer version supersedes the previous entry for the same character.
+        old = _latest.get(key[0])
+        if old is not None and old != key:
+            _cache.pop(old, None)
+        _latest[key[0]] = key
+        _cache[key] = value
+        while len(_cache) > _CACHE_MAX:
+            evicted, _ = _cache.popitem(last=False)
+            if _latest.get(evicted[0]) == evicted:
+                del _latest[evicted[0]]
+    return value
+
+
+def invalidate(character_id: str) -> None:
+    with _cache_lock:
+        old = _latest.pop(str(character_id), None)
+        if old is not None:
+            _cache.pop(old, None)
+
+
+def bonus_for(doc: Dict[str, Any], stat: Any) -> Optional[int]:
+    return derived_for(doc)["bonuses"].get(stat_key(stat))
+
+
+_HEAD = {"_id": 0, "character_id": 1, "version": 1, "updated_at": 1}
+
+
+def derived_by_id(db, character_id: str) -> Optional[Dict[str, Any]]:
+    """Derived stats for a stored character: a tiny head read, the full sheet only on a cache miss."""
+    if db is None or not character_id:
+        return None
+    head = db["characters"].find_one({"character_id": character_id}, _HEAD)
+    if not head:
+        return None
+    hit = cached(cache_key(head))
+    if hit is not None:
+        return hit
+    doc = db["characters"].find_one({"character_id": character_id}, {"_id": 0})
+    return derived_for(doc) if doc else None
@@ -0,0 +1,311 @@
+#===============================================================
+#Script Name: dice_odds.py
+#Script Location: /opt/RealmQuest/api/dice_odds.py
+#Date: 10/19/2026
+#Created By: T03KNEE
+#Github: https://github.com/To3Knee/RealmQuest
+#Version: 1.0.1
+#About: Exact probability distributions for the roll notation grammar (rolls.py).
+#       Sums are built with NumPy convolution (FFT for wide supports); keep/drop terms
+#       (kh/kl/dh/dl) use an order-statistics DP over faces. Distributions are cached in
+#       LRUs bounded by the bytes they hold (RQ_ODDS_CACHE_MB); expressions wider than
+#       _MAX_SUPPORT totals, or over the keep/drop work budget, are refused up front
+#       ("odds_too_complex").
+#===============================================================
+
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+# A PMF is (offset, probs): probs[i] is P(total == offset + i).
+Pmf = Tuple[int, np.ndarray]
+
+# Guard for the keep/drop DP: sides * kept^2 vector shifts over rows of kept * sides totals
+# (about 300 ms of NumPy work), summed over every keep/drop term of an expression.
+_KEEP_DROP_BUDGET = 300_000_000
+
+# Below this many output points a direct convolution beats the FFT round trip.
+_DIRECT_CONVOLVE_MAX = 4096
+
+# Widest distribution /roll/odds will build (number of distinct totals).
+_MAX_SUPPORT = 200_001
+
+_CACHE_BYTES = int(float(os.getenv("RQ_ODDS_CACHE_MB", "32")) * 1024 * 1024)
+
+DEFAULT_PERCENTILES: Tuple[int, ...] = (5, 10, 25, 50, 75, 90, 95)
+
+
+class _PmfCache:
+    """LRU over PMF results bounded by the bytes of their arrays, not by entry count."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._data: "OrderedDict[Tuple, Pmf]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, fn: Callable[..., Pmf]) -> Callable[..., Pmf]:
+        @wraps(fn)
+        def wrapper(*args):
+            with self._lock:
+                hit = self._data.get(args)
+                if hit is not None:
+                    self._data.move_to_end(args)
+                    return hit
+            value = fn(*args)
+            size = value[1].nbytes
+            if size > self.max_bytes:
+                return value
+            with self._lock:
+                if args not in self._data:
+                    self._data[args] = value
+                    self.bytes += size
+                while self.bytes > self.max_bytes:
+                    _, old = self._data.popitem(last=False)
+                    self.bytes -= old[1].nbytes
+            return value
+
+        wrapper.cache = self  # type: ignore[attr-defined]
+        return wrapper
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+
+# One byte budget shared by per-term and whole-expression results.
+_cache = _PmfCache(_CACHE_BYTES)
+
+
+def _freeze(p: np.ndarray) -> np.ndarray:
+    p.setflags(write=False)
+    return p
+
+
+def _convolve(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    n = len(a) + len(b) - 1
+    if min(len(a), len(b)) <= 64 or n <= _DIRECT_CONVOLVE_MAX:
+        return np.convolve(a, b)
+    size = 1 << (n - 1).bit_length()
+    out = np.fft.irfft(np.fft.rfft(a, size) * np.fft.rfft(b, size), size)[:n]
+    # FFT round-off leaves tiny negatives; clamp and renormalize.
+    np.clip(out, 0.0, None, out=out)
+    total = out.sum()
+    return out / total if total > 0 else out
+
+
+def _combine(x: Pmf, y: Pmf) -> Pmf:
+    return x[0] + y[0], _convolve(x[1], y[1])
+
+
+def _negate(x: Pmf) -> Pmf:
+    offset, probs = x
+    return -(offset + len(probs) - 1), probs[::-1].copy()
+
+
+@_cache
+def _die_sum_pmf(count: int, sides: int) -> Pmf:
+    """PMF of the sum of `count` fair dice with `sides` faces (repeated squaring)."""
+    single = np.full(sides, 1.0 / sides)
+    result: Optional[Pmf] = None
+    base: Pmf = (1, single)
+    n = count
+    while n:
+        if n & 1:
+            result = base if result is None else _combine(result, base)
+        n >>= 1
+        if n:
+            base = _combine(base, base)
+    assert result is not None
+    return result[0], _freeze(result[1])
+
+
+def _binom_row(n: int, p: float) -> np.ndarray:
+    """Binomial(n, p) probabilities for k = 0..n."""
+    if p >= 1.0:
+        row = np.zeros(n + 1)
+        row[n] = 1.0
+        return row
+    k = np.arange(n + 1)
+    log_c = np.cumsum(np.concatenate(([0.0], np.log(np.arange(n, 0, -1)) - np.log(np.arange(1, n + 1)))))
+    return np.exp(log_c + k * np.log(p) + (n - k) * np.log1p(-p))
+
+
+def _keep_highest_pmf(count: int, sides: int, keep: int) -> Pmf:
+    """PMF of the sum of the `keep` highest of `count` dice.
+
+    Faces are visited from high to low. Dice not yet placed are uniform on 1..v, so the
+    number landing on face v is Binomial(remaining, 1/v). State j counts dice placed so
+    far (all >= v); once j reaches `keep` nothing further is kept, so j == keep absorbs.
+    """
+    width = keep * sides + 1
+    state = np.zeros((keep + 1, width))
+    state[0, 0] = 1.0
+
+    for v in range(sides, 0, -1):
+        nxt = np.zeros_like(state)
+        nxt[keep] += state[keep]
+        p = 1.0 / v
+        for j in range(keep):
+            row = state[j]
+            if not row.any():
+                continue
+            binom = _binom_row(count - j, p)
+            room = keep - j
+            for m in range(min(room, count - j + 1)):
+                w = binom[m]
+                if w == 0.0:
+                    continue
+                shift = m * v
+                nxt[j + m, shift:] += w * row[: width - shift]
+            tail = binom[room:].sum() if room <= count - j else 0.0
+            if tail > 0.0:
+                shift = room * v
+                nxt[keep, shift:] += tail * row[: width - shift]
+        state = nxt
+
+    probs = state[keep][keep:]
+    return keep, probs
+
+
+@_cache
+def _term_pmf(count: int, sides: int, keep_drop: Optional[str], keep_drop_n: Optional[int]) -> Pmf:
+    """PMF of a single unsigned dice term, including keep/drop."""
+    if not keep_drop or not keep_drop_n:
+        return _die_sum_pmf(count, sides)
+
+    # Normalize every mode to "keep highest k" or "keep lowest k".
+    if keep_drop == "dl":
+        mode, keep = "kh", count - keep_drop_n
+    elif keep_drop == "dh":
+        mode, keep = "kl", count - keep_drop_n
+    else:
+        mode, keep = keep_drop, keep_drop_n
+
+    if keep <= 0:
+        return 0, _freeze(np.ones(1))
+    if keep >= count:
+        return _die_sum_pmf(count, sides)
+    if _keep_drop_work(sides, keep) > _KEEP_DROP_BUDGET:
+        raise ValueError("odds_too_complex")
+
+    offset, probs = _keep_highest_pmf(count, sides, keep)
+    if mode == "kl":
+        # Reflect faces x -> sides + 1 - x: the lowest k become the highest k.
+        offset, probs = keep * (sides + 1) - (offset + len(probs) - 1), probs[::-1].copy()
+    return offset, _freeze(probs)
+
+
+def _keep_drop_work(sides: int, keep: int) -> int:
+    return sides * keep * keep * (keep * sides + 1)
+
+
+def check_limits(terms: Iterable[Tuple[int, Dict[str, Any]]]) -> None:
+    """Refuse expressions whose support or keep/drop DP would be too large to build."""
+    width, work = 1, 0
+    for _, term in terms:
+        count, sides = int(term["count"]), int(term["sides"])
+        kd, kd_n = term.get("keep_drop"), int(term.get("keep_drop_n") or 0)
+        if kd and kd_n:
+            kept = count - kd_n if kd in ("dh", "dl") else min(kd_n, count)
+            if 0 < kept < count:
+                work += _keep_drop_work(sides, kept)
+            count = kept
+        width += max(count, 0) * (sides - 1)
+    if width > _MAX_SUPPORT or work > _KEEP_DROP_BUDGET:
+        raise ValueError("odds_too_complex")
+
+
+def expression_pmf(terms: Iterable[Tuple[int, Dict[str, Any]]], constant: int = 0) -> Pmf:
+    """Combine signed dice terms (as parsed by rolls._parse_term) plus a constant."""
+    terms = list(terms)
+    check_limits(terms)
+    result: Pmf = (int(constant), np.ones(1))
+    for sign, term in terms:
+        pmf = _term_pmf(int(term["count"]), int(term["sides"]), term.get("keep_drop"), term.get("keep_drop_n"))
+        if sign < 0:
+            pmf = _negate(pmf)
+        result = _combine(result, pmf)
+    return result
+
+
+def summarize(
+    pmf: Pmf,
+    dc: Optional[int] = None,
+    percentiles: Iterable[int] = DEFAULT_PERCENTILES,
+    include_pmf: bool = False,
+) -> Dict[str, Any]:
+    """Mean, variance, percentiles and optional P(total >= dc) for a PMF."""
+    offset, probs = pmf
+    values = np.arange(offset, offset + len(probs))
+    mean = float(np.dot(values, probs))
+    variance = float(np.dot((values - mean) ** 2, probs))
+    cdf = np.cumsum(probs)
+
+    pct: Dict[str, int] = {}
+    for q in percentiles:
+        q = int(q)
+        if q < 0 or q > 100:
+            continue
+        idx = int(np.searchsorted(cdf, q / 100.0 - 1e-12))
+        pct[f"p{q}"] = int(offset + min(idx, len(probs) - 1))
+
+    nz = np.nonzero(probs > 0)[0]
+    out: Dict[str, Any] = {
+        "min": int(offset + (nz[0] if len(nz) else 0)),
+        "max": int(offset + (nz[-1] if len(nz) else len(probs) - 1)),
+        "mean": round(mean, 6),
+        "variance": round(variance, 6),
+        "stddev": round(float(np.sqrt(variance)), 6),
+        "percentiles": pct,
+    }
+    if dc is not None:
+        idx = int(dc) - offset
+        if idx <= 0:
+            p_ge = 1.0
+        elif idx >= len(probs):
+            p_ge = 0.0
+        else:
+            p_ge = float(probs[idx:].sum())
+        out["dc"] = int(dc)
+        out["p_at_least_dc"] = round(min(max(p_ge, 0.0), 1.0), 8)
+    if include_pmf:
+        out["pmf"] = [
+            {"total": int(offset + i), "p": float(p)}
+            for i, p in enumerate(probs)
+            if p > 1e-12
+        ]
+    return out
+
+
+def term_key(terms: List[Tuple[int, Dict[str, Any]]], constant: int) -> Tuple:
+    """Hashable cache key for a parsed expression (order-insensitive over terms)."""
+    parts = sorted(
+        (int(s), int(t["count"]), int(t["sides"]), t.get("keep_drop") or "", int(t.get("keep_drop_n") or 0))
+        for s, t in terms
+    )
+    return tuple(parts), int(constant)
+
+
+@_cache
+def _cached_expression(key: Tuple) -> Pmf:
+    parts, constant = key
+    terms = [
+        (s, {"count": c, "sides": sd, "keep_drop": kd or None, "keep_drop_n": kdn or None})
+        for s, c, sd, kd, kdn in parts
+    ]
+    offset, probs = expression_pmf(terms, constant)
+    return offset, _freeze(probs)
+
+
+def cached_expression_pmf(terms: List[Tuple[int, Dict[str, Any]]], constant: int = 0) -> Pmf:
+    check_limits(terms)
+    return _cached_expression(term_key(terms, constant))
@@ -0,0 +1,183 @@
+#===============================================================
+#Script Name: dice_rng.py
+#Script Location: /opt/RealmQuest/api/dice_rng.py
+#Date: 10/19/2026
+#Created By: T03KNEE
+#Github: https://github.com/To3Knee/RealmQuest
+#Version: 1.0.0
+#About: Dice RNG service for the roll engine.
+#       - Default: NumPy PCG64 generator seeded from OS entropy, drawn in bulk into
+#         per-die-size buffers (one refill per few thousand dice instead of a syscall per die).
+#       - RQ_DICE_SEED: deterministic seeding for benchmarks and tests.
+#       - Commit-reveal sessions: a secret per-session seed whose SHA-256 commit is published
+#         up front; every roll in the session is re-derivable (HMAC stream) once revealed.
+#===============================================================
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+SESSIONS = "roll_sessions"
+
+_BUFFER_SIZE = 2048
+_RESEED_EVERY = 1_000_000  # dice drawn before pulling fresh OS entropy (unseeded mode only)
+
+
+class DiceRNG:
+    """Thread-safe bulk dice generator with per-die-size buffers."""
+
+    def __init__(self, seed: Optional[int] = None, buffer_size: int = _BUFFER_SIZE):
+        self._lock = threading.Lock()
+        self._buffer_size = max(16, int(buffer_size))
+        self.reset(seed)
+
+    @property
+    def seeded(self) -> bool:
+        return self._seed is not None
+
+    def reset(self, seed: Optional[int] = None) -> None:
+        """Restart the stream; seed=None pulls fresh OS entropy."""
+        with self._lock:
+            self._seed = seed
+            self._gen = np.random.Generator(np.random.PCG64(np.random.SeedSequence(seed)))
+            self._buffers: Dict[int, np.ndarray] = {}
+            self._pos: Dict[int, int] = {}
+            self._drawn = 0
+
+    def _refill(self, sides: int, need: int) -> None:
+        if self._seed is None and self._drawn >= _RESEED_EVERY:
+            self._gen = np.random.Generator(np.random.PCG64(np.random.SeedSequence()))
+            self._drawn = 0
+        size = max(self._buffer_size, need)
+        self._buffers[sides] = self._gen.integers(1, sides + 1, size=size, dtype=np.int16)
+        self._pos[sides] = 0
+        self._drawn += size
+
+    def draw(self, count: int, sides: int) -> List[int]:
+        count, sides = int(count), int(sides)
+        if count <= 0:
+            return []
+        with self._lock:
+            buf = self._buffers.get(sides)
+            pos = self._pos.get(sides, 0)
+            if buf is None or pos + count > len(buf):
+                self._refill(sides, count)
+                buf, pos = self._buffers[sides], 0
+            self._pos[sides] = pos + count
+            return buf[pos:pos + count].tolist()
+
+
+class CommittedStream:
+    """Reproducible dice stream for a commit-reveal session.
+
+    Derivation (verifiable with any HMAC-SHA256 implementation):
+      block_i = HMAC-SHA256(key=seed_bytes, msg=f"{nonce}:{i}")   for i = 0, 1, 2, ...
+      The blocks are consumed as big-endian uint32 words. A die with `sides` faces takes
+      the next word w, rejecting w >= 2**32 - (2**32 % sides); the face is w % sides + 1.
+    The nonce is the roll_id, so every roll in a session has an independent stream.
+    """
+
+    def __init__(self, seed_hex: str, nonce: str):
+        self._key = bytes.fromhex(seed_hex)
+        self._nonce = str(nonce)
+        self._counter = 0
+        self._pool = b""
+
+    def _word(self) -> int:
+        if len(self._pool) < 4:
+            self._pool += hmac.new(self._key, f"{self._nonce}:{self._counter}".encode(), hashlib.sha256).digest()
+            self._counter += 1
+        w, self._pool = int.from_bytes(self._pool[:4], "big"), self._pool[4:]
+        return w
+
+    def draw(self, count: int, sides: int) -> List[int]:
+        sides = int(sides)
+        limit = (1 << 32) - ((1 << 32) % sides)
+        out: List[int] = []
+        while len(out) < int(count):
+            w = self._word()
+            if w < limit:
+                out.append(w % sides + 1)
+        return out
+
+
+def commit_for(seed_hex: str) -> str:
+    return hashlib.sha256(bytes.fromhex(seed_hex)).hexdigest()
+
+
+# -----------------------------
+# Process-wide generator
+# -----------------------------
+
+def _env_seed() -> Optional[int]:
+    raw = (os.getenv("RQ_DICE_SEED") or "").strip()
+    if not raw:
+        return None
+    try:
+        return int(raw, 0)
+    except ValueError:
+        return int.from_bytes(hashlib.sha256(raw.encode()).digest()[:8], "big")
+
+
+_RNG = DiceRNG(seed=_env_seed())
+
+
+def get_rng() -> DiceRNG:
+    return _RNG
+
+
+# -----------------------------
+# Commit-reveal sessions
+# -----------------------------
+
+def create_session(db, campaign_id: str, session_id: Optional[str] = None) -> Dict[str, Any]:
+    """Create a committed session; the seed stays server-side until reveal."""
+    sid = (session_id or "").strip() or str(uuid.uuid4())
+    seed_hex = secrets.token_hex(32)
+    doc = {
+        "session_id": sid,
+        "campaign_id": campaign_id,
+        "seed": seed_hex,
+        "commit": commit_for(seed_hex),
+        "created_at_epoch": time.time(),
+        "revealed": False,
+        "revealed_at_epoch": None,
+    }
+    db[SESSIONS].create_index([("session_id", 1)], name="session_id", unique=True)
+    db[SESSIONS].insert_one(dict(doc))
+    return public_session(doc)
+
+
+def get_session(db, session_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    sid = (session_id or "").strip()
+    if db is None or not sid:
+        return None
+    return db[SESSIONS].find_one({"session_id": sid}, {"_id": 0})
+
+
+def reveal_session(db, session_id: str) -> Optional[Dict[str, Any]]:
+    doc = get_session(db, session_id)
+    if not doc:
+        return None
+    if not doc.get("revealed"):
+        now = time.time()
+        db[SESSIONS].update_one({"session_id": doc["session_id"]}, {"$set": {"revealed": True, "revealed_at_epoch": now}})
+        doc["revealed"], doc["revealed_at_epoch"] = True, now
+    return public_session(doc, include_seed=True)
+
+
+def public_session(doc: Dict[str, Any], include_seed: bool = False) -> Dict[str, Any]:
+    out = {k: doc.get(k) for k in ("session_id", "campaign_id", "commit", "created_at_epoch", "revealed", "revealed_at_epoch")}
+    if include_seed and doc.get("revealed"):
+        out["seed"] = doc.get("seed")
+    return out
@@ -0,0 +1,506 @@
+#===============================================================
+#Script Name: encounters.py
+#Script Location: /opt/RealmQuest/api/encounters.py
+#Date: 10/19/2026
+#Created By: T03KNEE
+#Github: https://github.com/To3Knee/RealmQuest
+#Version: 1.0.4
+#About: Encounter balance checks. Loads SRD monster stat blocks once (SRD bundle or JSON)
+#       into compact NumPy arrays and runs vectorized Monte Carlo combats against party
+#       characters from the characters collection (rounds-to-defeat, damage taken, knockout odds).
+#       Request size is bounded: at most MAX_MONSTERS monsters in total, attacks_per_round clamped
+#       to 1..MAX_ATTACKS_PER_ROUND, and the estimated work (estimate_work: trials x max_rounds x
+#       per-attack cost over every attack of both sides) within MAX_ENCOUNTER_WORK. The worst
+#       case at the cap (durable party, 100 rounds) measured about 0.8 s.
+#===============================================================
+
+import re
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel, Field
+
+import srd_bundle
+from database import get_db
+from system_config import get_active_campaign_id
+
+
+router = APIRouter(tags=["encounters"])
+
+SRD_RULESET = "2014"
+
+MAX_MONSTERS = 100
+MAX_ATTACKS_PER_ROUND = 10
+MAX_ENCOUNTER_WORK = 50_000_000
+
+
+# -----------------------------
+# Models
+# -----------------------------
+
+class EncounterMonster(BaseModel):
+    monster: str                      # SRD index ("goblin") or name ("Goblin")
+    count: int = Field(default=1, ge=1, le=50)
+
+
+class EncounterRequest(BaseModel):
+    monsters: List[EncounterMonster] = Field(max_length=20)
+    campaign_id: Optional[str] = None
+    character_ids: Optional[List[str]] = Field(default=None, max_length=50)   # default: every character in the campaign
+    trials: int = Field(default=5000, ge=100, le=50000)
+    max_rounds: int = Field(default=20, ge=1, le=100)
+    roll_hp: bool = False                        # roll monster hit dice instead of using average HP
+    seed: Optional[int] = None
+
+
+# -----------------------------
+# Monster table (loaded once)
+# -----------------------------
+
+# Damage is stored per attack as up to two dice groups plus a flat bonus:
+#   (to_hit, count1, sides1, count2, sides2, bonus)
+_MAX_DICE_GROUPS = 2
+_DICE_RE = re.compile(r"^(?:(\d+)d(\d+))?([+-]\d+)?$")
+
+
+def _parse_dice(expr: Any) -> Optional[Tuple[int, int, int]]:
+    """'2d10+8' -> (2, 10, 8); '5' -> (0, 0, 5). None when unparseable."""
+    s = re.sub(r"\s+", "", str(expr or ""))
+    if not s:
+        return None
+    m = _DICE_RE.match(s)
+    if not m or not (m.group(1) or m.group(3)):
+        return None
+    count = int(m.group(1) or 0)
+    sides = int(m.group(2) or 0)
+    bonus = int(m.group(3) or 0)
+    return count, sides, bonus
+
+
+def _action_attack(action: Dict[str, Any]) -> Optional[Tuple[int, List[Tuple[int, int]], int]]:
+    """Extract (to_hit, [(count, sides)...], bonus) from an SRD attack action."""
+    if "attack_bonus" not in action:
+        return None
+    groups: List[Tuple[int, int]] = []
+    bonus = 0
+    for dmg in action.get("damage") or []:
+        if not isinstance(dmg, dict):
+            continue
+        if "damage_dice" not in dmg:
+            # "choose one of" damage (e.g. versatile): take the first option.
+            opts = (((dmg.get("from") or {}).get("options")) or [])
+            dmg = opts[0] if opts and isinstance(opts[0], dict) else {}
+        parsed = _parse_dice(dmg.get("damage_dice"))
+        if not parsed:
+            continue
+        c, s, b = parsed
+        if c and s:
+            groups.append((c, s))
+        bonus += b
+    if not groups and not bonus:
+        return None
+    return int(action.get("attack_bonus") or 0), groups, bonus
+
+
+def _expected_damage(atk: Tuple[int, List[Tuple[int, int]], int]) -> float:
+    return sum(c * (s + 1) / 2.0 for c, s in atk[1]) + atk[2]
+
+
+def _attack_routine(mon: Dict[str, Any]) -> List[Tuple[int, List[Tuple[int, int]], int]]:
+    """One turn of attacks: the Multiattack breakdown when present, else the best single attack."""
+    actions = [a for a in (mon.get("actions") or []) if isinstance(a, dict)]
+    by_name = {str(a.get("name") or "").lower(): a for a in actions}
+
+    for a in actions:
+        if a.get("multiattack_type") == "actions" and a.get("actions"):
+            routine = []
+            for sub in a["actions"]:
+                ref = by_name.get(str(sub.get("action_name") or "").lower())
+                atk = _action_attack(ref) if ref else None
+                if atk:
+                    try:
+                        count = int(sub.get("count") or 1)
+                    except (TypeError, ValueError):
+                        count = 1  # e.g. the hydra's "Number of Heads"
+                    routine.extend([atk] * max(1, count))
+            if routine:
+                return routine
+
+    attacks = [atk for atk in (_action_attack(a) for a in actions) if atk]
+    if not attacks:
+        return []
+    return [max(attacks, key=_expected_damage)]
+
+
+class MonsterTable:
+    """Column-oriented monster stats; attacks are stored CSR-style (atk_start/atk_end)."""
+
+    def __init__(self, monsters: Iterable[Dict[str, Any]]):
+        self.index: Dict[str, int] = {}
+        self.names: List[str] = []
+        ac, hp, hp_c, hp_s, hp_b, dex, cr = [], [], [], [], [], [], []
+        atk_rows: List[Tuple[int, int, int, int, int, int]] = []
+        starts: List[int] = []
+
+        for mon in monsters:
+            if not isinstance(mon, dict) or not mon.get("name"):
+                continue
+            row = len(self.names)
+            self.names.append(str(mon["name"]))
+            if mon.get("index"):
+                self.index[str(mon["index"]).lower()] = row
+            self.index[str(mon["name"]).lower()] = row
+
+            ac_raw = mon.get("armor_class")
+            if isinstance(ac_raw, list) and ac_raw:
+                ac_val = ac_raw[0].get("value", 10) if isinstance(ac_raw[0], dict) else ac_raw[0]
+            else:
+                ac_val = ac_raw or 10
+            ac.append(int(ac_val))
+            hp.append(int(mon.get("hit_points") or 1))
+            parsed = _parse_dice(mon.get("hit_points_roll") or mon.get("hit_dice")) or (0, 0, 0)
+            hp_c.append(parsed[0]); hp_s.append(parsed[1]); hp_b.append(parsed[2])
+            dex.append((int(mon.get("dexterity") or 10) - 10) // 2)
+            cr.append(float(mon.get("challenge_rating") or 0))
+
+            starts.append(len(atk_rows))
+            for to_hit, groups, bonus in _attack_routine(mon):
+                g = (groups + [(0, 0)] * _MAX_DICE_GROUPS)[:_MAX_DICE_GROUPS]
+                atk_rows.append((to_hit, g[0][0], g[0][1], g[1][0], g[1][1], bonus))
+
+        starts.append(len(atk_rows))
+        self.ac = np.asarray(ac, dtype=np.int16)
+        self.hp = np.asarray(hp, dtype=np.int32)
+        self.hp_dice = np.asarray(list(zip(hp_c, hp_s, hp_b)), dtype=np.int32).reshape(-1, 3)
+        self.dex_mod = np.asarray(dex, dtype=np.int8)
+        self.cr = np.asarray(cr, dtype=np.float32)
+        self.atk_start = np.asarray(starts[:-1], dtype=np.int32)
+        self.atk_end = np.asarray(starts[1:], dtype=np.int32)
+        self.attacks = np.asarray(atk_rows, dtype=np.int16).reshape(-1, 6)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def lookup(self, key: str) -> Optional[int]:
+        k = (key or "").strip().lower()
+        return self.index.get(k, self.index.get(k.replace(" ", "-")))
+
+    def attacks_for(self, row: int) -> np.ndarray:
+        return self.attacks[self.atk_start[row]:self.atk_end[row]]
+
+
+_TABLE: Optional[MonsterTable] = None
+_TABLE_LOCK = threading.Lock()
+
+
+def get_monster_table() -> MonsterTable:
+    global _TABLE
+    if _TABLE is None:
+        with _TABLE_LOCK:
+            if _TABLE is None:
+                _TABLE = MonsterTable(srd_bundle.records(SRD_RULESET, "Monsters"))
+    return _TABLE
+
+
+# -----------------------------
+# Party
+# -----------------------------
+
+_MARTIAL_CLASSES = {"fighter", "barbarian", "paladin", "ranger", "monk"}
+
+
+def _mod(score: Any) -> int:
+    try:
+        return (int(score) - 10) // 2
+    except Exception:
+        return 0
+
+
+def _party_member(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Combat stats for a character sheet; derives sensible defaults for missing fields."""
+    sheet = doc.get("sheet") if isinstance(doc.get("sheet"), dict) else {}
+    abilities = sheet.get("abilities") if isinstance(sheet.get("abilities"), dict) else {}
+    combat = sheet.get("combat") if isinstance(sheet.get("combat"), dict) else {}
+    hp = combat.get("hp") if isinstance(combat.get("hp"), dict) else {}
+
+    try:
+        level = max(1, int(doc.get("level") or 1))
+    except Exception:
+        level = 1
+    prof = 2 + (level - 1) // 4
+    str_mod, dex_mod = _mod(abilities.get("str", 10)), _mod(abilities.get("dex", 10))
+    atk_mod = max(str_mod, dex_mod)
+
+    to_hit, dmg = prof + atk_mod, (1, 8, atk_mod)
+    attacks = combat.get("attacks")
+    if isinstance(attacks, list) and attacks and isinstance(attacks[0], dict):
+        first = attacks[0]
+        try:
+            to_hit = int(first.get("to_hit", first.get("bonus", to_hit)))
+        except Exception:
+            pass
+        dmg = _parse_dice(first.get("damage")) or dmg
+
+    per_round = 2 if (level >= 5 and str(doc.get("class_name") or "").lower() in _MARTIAL_CLASSES) else 1
+    if combat.get("attacks_per_round") is not None:
+        try:
+            per_round = int(combat["attacks_per_round"])
+        except Exception:
+            pass
+
+    try:
+        ac = int(combat.get("ac") or (10 + dex_mod))
+    except Exception:
+        ac = 10 + dex_mod
+    try:
+        cur_hp = int(hp.get("current") or hp.get("max") or 10)
+    except Exception:
+        cur_hp = 10
+    try:
+        init = int(combat.get("initiative") or dex_mod)
+    except Exception:
+        init = dex_mod
+
+    return {
+        "character_id": doc.get("character_id"),
+        "name": doc.get("name") or "Unknown",
+        "ac": ac,
+        "hp": max(1, cur_hp),
+        "init": init,
+        "to_hit": to_hit,
+        "damage": dmg,
+        "attacks_per_round": min(MAX_ATTACKS_PER_ROUND, max(1, per_round)),
+    }
+
+
+# -----------------------------
+# Simulation
+# -----------------------------
+
+def _roll_damage(rng: np.random.Generator, count: int, sides: int, crit: np.ndarray) -> np.ndarray:
+    """Sum of `count`d`sides` per trial; critical hits roll the dice twice."""
+    if count <= 0 or sides <= 0:
+        return np.zeros(crit.shape[0], dtype=np.int32)
+    dice = rng.integers(1, sides + 1, size=(crit.shape[0], 2 * count), dtype=np.int32)
+    return dice[:, :count].sum(axis=1) + np.where(crit, dice[:, count:].sum(axis=1), 0)
+
+
+def _attack(rng, to_hit: int, target_ac: np.ndarray, active: np.ndarray, groups, bonus: int) -> np.ndarray:
+    """Damage dealt by one attack per trial (0 where inactive or missed)."""
+    n = active.shape[0]
+    d20 = rng.integers(1, 21, size=n, dtype=np.int16)
+    crit = d20 == 20
+    hit = active & (d20 != 1) & (crit | (d20 + to_hit >= target_ac))
+    dmg = np.full(n, bonus, dtype=np.int32)
+    for count, sides in groups:
+        dmg += _roll_damage(rng, int(count), int(sides), crit)
+    return np.where(hit, np.maximum(dmg, 0), 0)
+
+
+def estimate_work(table: MonsterTable, party: List[Dict[str, Any]], rows: List[int], trials: int, max_rounds: int) -> int:
+    """
+    Cost model for simulate(). Every attack touches an (trials x side) alive mask and rolls its
+    damage dice twice (crits), plus a fixed per-call overhead worth ~500 trials; all attacks
+    run every round in the worst case (nobody goes down).
+    """
+    combatants = len(party) + len(rows)
+    per_round = sum(int(c["attacks_per_round"]) * (combatants + 2 * int(c["damage"][0]) + 16) for c in party)
+    for r in rows:
+        for atk in table.attacks_for(r):
+            per_round += combatants + 2 * (int(atk[1]) + int(atk[3])) + 16
+    return (int(trials) + 500) * int(max_rounds) * per_round
+
+
+def simulate(
+    table: MonsterTable,
+    party: List[Dict[str, Any]],
+    rows: List[int],
+    trials: int,
+    max_rounds: int,
+    roll_hp: bool = False,
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    rng = np.random.default_rng(seed)
+    n, p, m = int(trials), len(party), len(rows)
+    trial_idx = np.arange(n)
+
+    party_ac = np.array([c["ac"] for c in party], dtype=np.int16)
+    party_hp = np.tile(np.array([c["hp"] for c in party], dtype=np.int32), (n, 1))
+    party_dmg_taken = np.zeros((n, p), dtype=np.int64)
+    party_ko = np.zeros((n, p), dtype=bool)
+
+    mon_ac = table.ac[rows]
+    if roll_hp:
+        mon_hp = np.empty((n, m), dtype=np.int32)
+        for j, row in enumerate(rows):
+            c, s, b = (int(x) for x in table.hp_dice[row])
+            rolled = rng.integers(1, s + 1, size=(n, c), dtype=np.int32).sum(axis=1) + b if c and s else np.full(n, table.hp[row])
+            mon_hp[:, j] = np.maximum(rolled, 1)
+    else:
+        mon_hp = np.tile(table.hp[rows].astype(np.int32), (n, 1))
+    mon_attacks = [table.attacks_for(r) for r in rows]
+
+    # Side initiative: best party roll vs best monster roll, fixed per trial.
+    party_init = max((c["init"] for c in party), default=0)
+    mon_init = int(table.dex_mod[rows].max()) if m else 0
+    party_first = rng.integers(1, 21, n) + party_init >= rng.integers(1, 21, n) + mon_init
+
+    rounds_to_win = np.full(n, -1, dtype=np.int32)
+    rounds_to_wipe = np.full(n, -1, dtype=np.int32)
+
+    def party_phase(active_trials: np.ndarray):
+        for ci, c in enumerate(party):
+            for _ in range(c["attacks_per_round"]):
+                alive_mon = mon_hp > 0
+                act = active_trials & (party_hp[:, ci] > 0) & alive_mon.any(axis=1)
+                if not act.any():
+                    continue
+                target = np.argmax(alive_mon, axis=1)  # focus fire on the first standing monster
+                groups = [(c["damage"][0], c["damage"][1])]
+                dealt = _attack(rng, c["to_hit"], mon_ac[target], act, groups, c["damage"][2])
+                mon_hp[trial_idx, target] -= dealt
+
+    def monster_phase(active_trials: np.ndarray):
+        for j in range(m):
+            for atk in mon_attacks[j]:
+                alive_party = party_hp > 0
+                act = active_trials & (mon_hp[:, j] > 0) & alive_party.any(axis=1)
+                if not act.any():
+                    continue
+                # Random standing target per trial.
+                target = np.argmax(rng.random((n, p)) * alive_party, axis=1)
+                to_hit, c1, s1, c2, s2, bonus = (int(x) for x in atk)
+                dealt = _attack(rng, to_hit, party_ac[target], act, [(c1, s1), (c2, s2)], bonus)
+                party_dmg_taken[trial_idx, target] += dealt
+                party_hp[trial_idx, target] -= dealt
+                party_ko[trial_idx, target] |= act & (party_hp[trial_idx, target] <= 0)
+
+    for rnd in range(1, max_rounds + 1):
+        ongoing = (rounds_to_win < 0) & (rounds_to_wipe < 0)
+        if not ongoing.any():
+            break
+        monster_phase(ongoing & ~party_first)
+        party_phase(ongoing)
+        monster_phase(ongoing & party_first)
+
+        won = ongoing & ~(mon_hp > 0).any(axis=1)
+        wiped = ongoing & ~won & ~(party_hp > 0).any(axis=1)
+        rounds_to_win[won] = rnd
+        rounds_to_wipe[wiped] = rnd
+
+    victories = rounds_to_win > 0
+    wipes = rounds_to_wipe > 0
+    win_rounds = rounds_to_win[victories]
+
+    return {
+        "trials": n,
+        "victory_rate": round(float(victories.mean()), 4),
+        "party_wipe_rate": round(float(wipes.mean()), 4),
+        "unresolved_rate": round(float((~victories & ~wipes).mean()), 4),
+        "rounds_to_defeat": {
+            "mean": round(float(win_rounds.mean()), 3) if win_rounds.size else None,
+            "p50": int(np.percentile(win_rounds, 50)) if win_rounds.size else None,
+            "p90": int(np.percentile(win_rounds, 90)) if win_rounds.size else None,
+        },
+        "party": [
+            {
+                "character_id": c["character_id"],
+                "name": c["name"],
+                "ac": c["ac"],
+                "hp": c["hp"],
+                "damage_taken_mean": round(float(party_dmg_taken[:, i].mean()), 2),
+                "knockout_probability": round(float(party_ko[:, i].mean()), 4),
+            }
+            for i, c in enumerate(party)
+        ],
+        "any_knockout_probability": round(float(party_ko.any(axis=1).mean()), 4) if p else 0.0,
+    }
+
+
+# -----------------------------
+# Endpoints
+# -----------------------------
+
+@router.get("/encounter/monsters")
+def search_monsters(q: str = Query("", description="Substring match on monster name"), limit: int = Query(25, ge=1, le=200)):
+    """Monster lookup for the encounter builder (name, CR, AC, HP, attacks per turn)."""
+    try:
+        table = get_monster_table()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"monsters_unavailable: {e}")
+
+    needle = (q or "").strip().lower()
+    out = []
+    for row, name in enumerate(table.names):
+        if needle and needle not in name.lower():
+            continue
+        out.append({
+            "name": name,
+            "challenge_rating": float(table.cr[row]),
+            "ac": int(table.ac[row]),
+            "hp": int(table.hp[row]),
+            "attacks_per_turn": int(table.atk_end[row] - table.atk_start[row]),
+        })
+        if len(out) >= limit:
+            break
+    return {"items": out}
+
+
+@router.post("/encounter/simulate")
+def simulate_encounter(payload: EncounterRequest):
+    """Monte Carlo balance check: party (characters collection) vs a list of SRD monsters."""
+    db = get_db()
+    try:
+        table = get_monster_table()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"monsters_unavailable: {e}")
+
+    rows: List[int] = []
+    unknown: List[str] = []
+    for entry in payload.monsters:
+        row = table.lookup(entry.monster)
+        if row is None:
+            unknown.append(entry.monster)
+        else:
+            rows.extend([row] * int(entry.count))
+    if unknown:
+        raise HTTPException(status_code=404, detail={"reason": "unknown_monsters", "monsters": unknown})
+    if not rows:
+        raise HTTPException(status_code=422, detail="no_monsters")
+    if len(rows) > MAX_MONSTERS:
+        raise HTTPException(status_code=422, detail={"reason": "too_many_monsters", "max": MAX_MONSTERS})
+
+    if db is None:
+        raise HTTPException(status_code=503, detail="database_unavailable")
+    cid = (payload.campaign_id or "").strip() or get_active_campaign_id(db)
+    q: Dict[str, Any] = {"campaign_id": cid}
+    if payload.character_ids:
+        q["character_id"] = {"$in": list(payload.character_ids)}
+    try:
+        docs = list(db["characters"].find(q, {"_id": 0, "character_id": 1, "name": 1, "class_name": 1, "level": 1, "sheet": 1}))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"character_query_failed: {e}")
+    if not docs:
+        raise HTTPException(status_code=404, detail="no_party_characters")
+
+    party = [_party_member(d) for d in docs]
+    work = estimate_work(table, party, rows, payload.trials, payload.max_rounds)
+    if work > MAX_ENCOUNTER_WORK:
+        per_trial = work / (payload.trials + 500)
+        raise HTTPException(status_code=422, detail={
+            "reason": "encounter_too_large", "work": work, "max_work": MAX_ENCOUNTER_WORK,
+            "max_trials": max(0, int(MAX_ENCOUNTER_WORK / per_trial) - 500),
+            "max_rounds": int(MAX_ENCOUNTER_WORK * payload.max_rounds // work),
+        })
+    started = time.perf_counter()
+    result = simulate(table, party, rows, payload.trials, payload.max_rounds, roll_hp=payload.roll_hp, seed=payload.seed)
+    result["campaign_id"] = cid
+    result["monsters"] = [
+        {"name": table.names[r], "ac": int(table.ac[r]), "hp": int(table.hp[r]), "challenge_rating": float(table.cr[r])}
+        for r in rows
+    ]
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000.0, 2)
+    return result
@@ -0,0 +1,239 @@
+#===============================================================
+#Script Name: kenku_client.py
+#Script Location: /opt/RealmQuest/api/kenku_client.py
+#Date: 10/19/2026
+#Created By: T03KNEE
+#Github: https://github.com/To3Knee/RealmQuest
+#Version: 1.0.1
+#About: Persistent async control client for Kenku FM's remote API.
+#       - One pooled keep-alive httpx.AsyncClient for the process (closed by the API lifespan).
+#       - Cached model of what is playing (playlist track + volume), refreshed from
+#         /v1/playlist/playback when stale, so a repeated cue for the current track is a no-op.
+#       - Ids are routed to the playlist OR soundboard API via a cached id -> kind map.
+#       - cue() never awaits Kenku: the latest desired track sits in a single slot that a
+#         worker task drains after a short coalescing window, crossfading by volume ramps.
+#       - The model only changes for requests Kenku accepted; a rejected play counts as an error.
+#===============================================================
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger("api")
+
+KENKU_URL = os.getenv("KENKU_URL", "http://realmquest-kenku:3333").rstrip("/")
+MUSIC_VOLUME = float(os.getenv("RQ_KENKU_VOLUME", "0.3"))
+CROSSFADE_S = float(os.getenv("RQ_KENKU_CROSSFADE_S", "1.5"))
+COALESCE_S = float(os.getenv("RQ_KENKU_COALESCE_S", "0.25"))
+STATE_TTL_S = float(os.getenv("RQ_KENKU_STATE_TTL_S", "10"))
+KINDS_TTL_S = float(os.getenv("RQ_KENKU_KINDS_TTL_S", "300"))
+SFX_REPEAT_S = float(os.getenv("RQ_KENKU_SFX_REPEAT_S", "2"))
+FADE_STEPS = 6
+
+
+@dataclass
+class PlaybackState:
+    track_id: Optional[str] = None
+    playing: bool = False
+    volume: float = MUSIC_VOLUME
+    checked_at: float = 0.0
+
+
+def _walk_ids(data: Any, out: List[str]) -> None:
+    if isinstance(data, dict):
+        if "id" in data and ("url" in data or "title" in data):
+            out.append(str(data["id"]))
+        for v in data.values():
+            _walk_ids(v, out)
+    elif isinstance(data, list):
+        for v in data:
+            _walk_ids(v, out)
+
+
+class KenkuClient:
+    def __init__(self, base_url: str = KENKU_URL):
+        self.base_url = base_url
+        self._http: Optional[httpx.AsyncClient] = None
+        self.state = PlaybackState()
+        self._kinds: Dict[str, str] = {}
+        self._kinds_at = 0.0
+        self._pending: Optional[str] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._sfx_at: Dict[str, float] = {}
+        self.stats = {"cues": 0, "coalesced": 0, "noop": 0, "played": 0, "errors": 0}
+
+    # -----------------------------
+    # HTTP
+    # -----------------------------
+
+    def http(self) -> httpx.AsyncClient:
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(2.0, connect=1.0),
+                limits=httpx.Limits(max_connections=4, max_keepalive_connections=2, keepalive_expiry=60.0),
+            )
+        return self._http
+
+    async def _get(self, path: str) -> Optional[Any]:
+        r = await self.http().get(path)
+        return r.json() if r.status_code == 200 else None
+
+    async def _put(self, path: str, payload: Optional[Dict[str, Any]] = None) -> bool:
+        r = await self.http().put(path, json=payload or {})
+        return r.status_code < 300
+
+    async def _put_or_raise(self, path: str, payload: Optional[Dict[str, Any]] = None) -> None:
+        if not await self._put(path, payload):
+            raise RuntimeError(f"Kenku rejected PUT {path}")
+
+    async def close(self) -> None:
+        worker, self._worker = self._worker, None
+        if worker is not None:
+            worker.cancel()
+            try:
+                await worker
+            except (asyncio.CancelledError, Exception):
+                pass
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    # -----------------------------
+    # Catalog + state
+    # -----------------------------
+
+    async def kinds(self, force: bool = False) -> Dict[str, str]:
+        """Track/sound id -> 'playlist' | 'soundboard' (cached for KINDS_TTL_S)."""
+        if not force and self._kinds and time.monotonic() - self._kinds_at < KINDS_TTL_S:
+            return self._kinds
+        kinds: Dict[str, str] = {}
+        for kind in ("soundboard", "playlist"):  # playlist wins on id collisions
+            ids: List[str] = []
+            _walk_ids(await self._get(f"/v1/{kind}"), ids)
+            kinds.update({i: kind for i in ids})
+        self._kinds, self._kinds_at = kinds, time.monotonic()
+        return kinds
+
+    async def refresh_state(self, force: bool = False) -> PlaybackState:
+        st = self.state
+        if not force and time.monotonic() - st.checked_at < STATE_TTL_S:
+            return st
+        data = await self._get("/v1/playlist/playback")
+        if isinstance(data, dict):
+            track = data.get("track") or {}
+            st.track_id = str(track.get("id")) if track.get("id") else None
+            st.playing = bool(data.get("playing"))
+            if data.get("volume") is not None:
+                st.volume = float(data["volume"])
+        st.checked_at = time.monotonic()
+        return st
+
+    # -----------------------------
+    # Cueing
+    # -----------------------------
+
+    def cue(self, track_id: Optional[str]) -> None:
+        """Request a track/sound. Returns immediately; rapid cues collapse to the last one."""
+        if not track_id or str(track_id).startswith("sys_"):
+            return
+        self.stats["cues"] += 1
+        if self._pending is not None:
+            self.stats["coalesced"] += 1
+        self._pending = str(track_id)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            logger.warning("⚠️ Kenku cue outside the event loop dropped")
+            return
+        if self._wake is None:
+            self._wake = asyncio.Event()
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._run(), name="rq-kenku")
+        self._wake.set()
+
+    async def _run(self) -> None:
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            await asyncio.sleep(COALESCE_S)
+            target, self._pending = self._pending, None
+            if not target:
+                continue
+            try:
+                await self._apply(target)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                self.state.checked_at = 0.0  # our model may be wrong now; re-read next time
+                logger.warning(f"⚠️ Kenku cue {target} failed: {e}")
+
+    async def _apply(self, target: str) -> None:
+        kinds = await self.kinds()
+        kind = kinds.get(target)
+        if kind is None:
+            kinds = await self.kinds(force=True)
+            kind = kinds.get(target, "playlist")
+
+        if kind == "soundboard":
+            now = time.monotonic()
+            if now - self._sfx_at.get(target, 0.0) < SFX_REPEAT_S:
+                self.stats["noop"] += 1
+                return
+            await self._put_or_raise("/v1/soundboard/play", {"id": target})
+            self._sfx_at[target] = now
+            self.stats["played"] += 1
+            return
+
+        st = await self.refresh_state()
+        if st.track_id == target and st.playing:
+            self.stats["noop"] += 1
+            return
+
+        if st.playing and CROSSFADE_S > 0:
+            if not await self._ramp(st.volume, 0.0):
+                return  # superseded mid-fade; the newer cue takes over from here
+        else:
+            vol = 0.0 if CROSSFADE_S > 0 else MUSIC_VOLUME
+            if await self._put("/v1/playlist/playback/volume", {"volume": vol}):
+                st.volume = vol
+        await self._put_or_raise("/v1/playlist/play", {"id": target})
+        st.track_id, st.playing, st.checked_at = target, True, time.monotonic()
+        if CROSSFADE_S > 0:
+            await self._ramp(0.0, MUSIC_VOLUME, abort_on_cue=False)
+        self.stats["played"] += 1
+
+    async def _ramp(self, start: float, end: float, abort_on_cue: bool = True) -> bool:
+        """Step the playlist volume over CROSSFADE_S / 2. False if a newer cue arrived."""
+        step_s = (CROSSFADE_S / 2.0) / FADE_STEPS
+        for i in range(1, FADE_STEPS + 1):
+            if abort_on_cue and self._pending is not None:
+                return False
+            vol = round(start + (end - start) * i / FADE_STEPS, 3)
+            if await self._put("/v1/playlist/playback/volume", {"volume": vol}):
+                self.state.volume = vol
+            await asyncio.sleep(step_s)
+        return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        st = self.state
+        return {
+            "track_id": st.track_id,
+            "playing": st.playing,
+            "volume": st.volume,
+            "state_age_s": round(time.monotonic() - st.checked_at, 1) if st.checked_at else None,
+            "pending": self._pending,
+            **self.stats,
+        }
+
+
+kenku = KenkuClient()
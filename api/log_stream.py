@@ -0,0 +1,317 @@
+#===============================================================
+#Script Name: log_stream.py
+#Script Location: /opt/RealmQuest/api/log_stream.py
+#Date: 10/19/2026
+#Created By: T03KNEE
+#Github: https://github.com/To3Knee/RealmQuest
+#Version: 1.0.0
+#About: Follow-mode container log fan-out for /system/control/logs/{service}/stream.
+#       - One Docker client per process (shared with the control endpoints).
+#       - One follow stream per container, read by a daemon thread and fanned out to every
+#         viewer; the reader stops when the last viewer leaves.
+#       - Lines carry Docker's RFC3339Nano timestamp as a cursor (SSE id), so a reconnect with
+#         Last-Event-ID / ?since= resumes with new lines only.
+#       - Each viewer has a bounded queue; a slow viewer loses its oldest lines (and is told
+#         how many) instead of stalling the reader or other viewers.
+#===============================================================
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+import docker
+
+logger = logging.getLogger("api")
+
+DOCKER_URL = "unix:///var/run/docker.sock"
+BACKLOG_LINES = int(os.getenv("RQ_LOG_BACKLOG", "1000"))
+VIEWER_QUEUE = int(os.getenv("RQ_LOG_VIEWER_QUEUE", "2000"))
+HEARTBEAT_S = float(os.getenv("RQ_LOG_HEARTBEAT_S", "15"))
+
+_client_lock = threading.Lock()
+_client: Optional[docker.DockerClient] = None
+
+
+def docker_client() -> Optional[docker.DockerClient]:
+    """Process-wide Docker client (lazy; None when the socket is unavailable)."""
+    global _client
+    if _client is not None:
+        return _client
+    with _client_lock:
+        if _client is None:
+            try:
+                _client = docker.DockerClient(base_url=DOCKER_URL)
+            except Exception as e:
+                logger.warning(f"⚠️ Docker socket unavailable: {e}")
+                return None
+    return _client
+
+
+def container_name(service: str) -> str:
+    return service if "realmquest" in service else f"realmquest-{service.replace('rq-', '')}"
+
+
+# -----------------------------
+# Cursors
+# -----------------------------
+
+def cursor_ns(cursor: Optional[str]) -> Optional[int]:
+    """RFC3339(Nano) timestamp -> epoch nanoseconds (Docker trims trailing zeros, so compare numerically)."""
+    if not cursor:
+        return None
+    s = str(cursor).strip().rstrip("Z")
+    if "." in s:
+        base, frac = s.split(".", 1)
+    else:
+        base, frac = s, "0"
+    try:
+        secs = datetime.strptime(base, "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc).timestamp()
+        return int(secs) * 1_000_000_000 + int((frac + "000000000")[:9])
+    except ValueError:
+        return None
+
+
+def split_line(raw: bytes) -> Tuple[str, str]:
+    """'<ts> <text>' from a timestamps=True log line."""
+    text = raw.decode("utf-8", "ignore").rstrip("\r\n")
+    ts, sep, rest = text.partition(" ")
+    if sep and cursor_ns(ts) is not None:
+        return ts, rest
+    return "", text
+
+
+def since_arg(ns: int) -> float:
+    """Docker's since= takes a float epoch; step back slightly and filter by cursor instead."""
+    return max(0.0, ns / 1_000_000_000 - 0.001)
+
+
+# -----------------------------
+# Fan-out
+# -----------------------------
+
+class Viewer:
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int = VIEWER_QUEUE):
+        self.loop = loop
+        self.queue: "asyncio.Queue[Tuple[str, str]]" = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self.closed = False
+
+    def offer(self, item: Tuple[str, str]) -> None:
+        # Runs on the event loop (call_soon_threadsafe).
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(item)
+
+    def push(self, item: Tuple[str, str]) -> None:
+        if not self.closed:
+            try:
+                self.loop.call_soon_threadsafe(self.offer, item)
+            except RuntimeError:
+                self.closed = True  # loop gone
+
+
+class ContainerTail:
+    """One docker follow stream for one container, shared by all of its viewers."""
+
+    def __init__(self, hub: "LogHub", name: str):
+        self.hub = hub
+        self.name = name
+        self.backlog: Deque[Tuple[str, str]] = deque(maxlen=BACKLOG_LINES)
+        self.viewers: List[Viewer] = []
+        self.lock = threading.Lock()
+        self.thread: Optional[threading.Thread] = None
+        self.stream: Any = None
+        self.stopping = False
+        self.error: Optional[str] = None
+        self.primed = threading.Event()
+
+    def start(self) -> None:
+        self.thread = threading.Thread(target=self._run, name=f"rq-logs-{self.name}", daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        cli = docker_client()
+        try:
+            if cli is None:
+                raise RuntimeError("Docker Socket Unavailable")
+            container = cli.containers.get(self.name)
+            # Prime the backlog in one read, then follow from its last cursor.
+            last = 0
+            for raw in container.logs(timestamps=True, tail=BACKLOG_LINES).splitlines():
+                item = split_line(raw)
+                last = cursor_ns(item[0]) or last
+                self.backlog.append(item)
+            follow = {"since": since_arg(last)} if last else {"tail": 0}
+            self.stream = container.logs(stream=True, follow=True, timestamps=True, **follow)
+            self.primed.set()
+            if self.stopping:
+                self.stop()  # last viewer left during the priming read
+                return
+            pending = b""
+            for chunk in self.stream:
+                if self.stopping:
+                    break
+                # Frames are not guaranteed to align with lines.
+                *lines, pending = (pending + chunk).split(b"\n")
+                for raw in lines:
+                    item = split_line(raw)
+                    n = cursor_ns(item[0])
+                    if n is not None and n <= last:
+                        continue  # overlap with the priming read
+                    last = 0
+                    with self.lock:
+                        self.backlog.append(item)
+                        viewers = list(self.viewers)
+                    for v in viewers:
+                        v.push(item)
+        except Exception as e:
+            if not self.stopping:
+                self.error = str(e)
+                logger.warning(f"⚠️ Log stream {self.name} ended: {e}")
+        finally:
+            self.primed.set()
+            with self.lock:
+                viewers = list(self.viewers)
+            for v in viewers:
+                v.push(("", None))  # type: ignore[arg-type]  # end-of-stream marker
+            self.hub._retire(self)
+
+    def stop(self) -> None:
+        self.stopping = True
+        stream = self.stream
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+
+class LogHub:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tails: Dict[str, ContainerTail] = {}
+
+    def _retire(self, tail: ContainerTail) -> None:
+        with self._lock:
+            if self._tails.get(tail.name) is tail:
+                self._tails.pop(tail.name, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {name: {"viewers": len(t.viewers), "backlog": len(t.backlog)} for name, t in self._tails.items()}
+
+    def subscribe(self, name: str, viewer: Viewer, since_ns: Optional[int], tail: int) -> Tuple[ContainerTail, List[Tuple[str, str]]]:
+        """Attach a viewer; returns the replay lines (after since, else the last `tail`)."""
+        with self._lock:
+            t = self._tails.get(name)
+            if t is None or t.stopping:
+                t = ContainerTail(self, name)
+                self._tails[name] = t
+                t.start()
+        t.primed.wait(timeout=5.0)
+        with t.lock:
+            t.viewers.append(viewer)
+            lines = list(t.backlog)
+        if since_ns is not None:
+            lines = [it for it in lines if (cursor_ns(it[0]) or 0) > since_ns]
+        elif tail >= 0:
+            lines = lines[-tail:] if tail else []
+        return t, lines
+
+    def unsubscribe(self, t: ContainerTail, viewer: Viewer) -> None:
+        viewer.closed = True
+        with t.lock:
+            if viewer in t.viewers:
+                t.viewers.remove(viewer)
+            idle = not t.viewers
+        if idle:
+            with self._lock:
+                if self._tails.get(t.name) is t:
+                    self._tails.pop(t.name, None)
+            t.stop()
+
+
+hub = LogHub()
+
+
+def _sse(data: str, event: Optional[str] = None, id_: Optional[str] = None) -> str:
+    out = ""
+    if event:
+        out += f"event: {event}\n"
+    if id_:
+        out += f"id: {id_}\n"
+    for part in data.split("\n"):
+        out += f"data: {part}\n"
+    return out + "\n"
+
+
+def _older_than_backlog(t: ContainerTail, since: int) -> bool:
+    with t.lock:
+        if len(t.backlog) < (t.backlog.maxlen or 0):
+            return False
+        first = cursor_ns(t.backlog[0][0]) if t.backlog else None
+    return first is not None and since < first
+
+
+def _fetch_gap(name: str, since: int, until: int) -> List[Tuple[str, str]]:
+    """One-shot read for a resume cursor older than the shared backlog."""
+    cli = docker_client()
+    if cli is None:
+        return []
+    raw = cli.containers.get(name).logs(timestamps=True, since=since_arg(since), until=until / 1_000_000_000)
+    out = []
+    for line in raw.splitlines():
+        ts, text = split_line(line)
+        n = cursor_ns(ts) or 0
+        if since < n <= until:
+            out.append((ts, text))
+    return out
+
+
+async def sse_stream(name: str, since: Optional[str], tail: int) -> AsyncIterator[str]:
+    """SSE body: replay after the cursor, then live lines; heartbeats keep proxies from closing."""
+    loop = asyncio.get_running_loop()
+    viewer = Viewer(loop)
+    since_ns = cursor_ns(since)
+    t, replay = await loop.run_in_executor(None, hub.subscribe, name, viewer, since_ns, tail)
+    try:
+        if t.error and not replay:
+            yield _sse(json.dumps({"error": t.error}), event="error")
+            return
+        if since_ns is not None and replay and _older_than_backlog(t, since_ns):
+            first = cursor_ns(replay[0][0]) or since_ns
+            try:
+                replay = await loop.run_in_executor(None, _fetch_gap, name, since_ns, first - 1) + replay
+            except Exception as e:
+                yield _sse(json.dumps({"error": f"gap_fetch_failed: {e}"}), event="gap")
+        # Replay and live lines never overlap: backlog snapshot and viewer attach share t.lock.
+        for ts, text in replay:
+            yield _sse(text, id_=ts or None)
+        yield _sse(json.dumps({"container": name, "replayed": len(replay)}), event="ready")
+
+        while True:
+            try:
+                ts, text = await asyncio.wait_for(viewer.queue.get(), timeout=HEARTBEAT_S)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if text is None:
+                yield _sse(json.dumps({"error": t.error or "stream ended"}), event="end")
+                return
+            if viewer.dropped:
+                yield _sse(json.dumps({"dropped": viewer.dropped}), event="gap")
+                viewer.dropped = 0
+            yield _sse(text, id_=ts or None)
+    finally:
+        hub.unsubscribe(t, viewer)
@@ -2,24 +2,45 @@
 # Script Name: main.py
 # Script Location: /opt/RealmQuest/api/main.py
 # Date: 2026-01-31
-# Version: 18.88.2 (Added roll engine router)
+# Version: 18.94.2 (multipart bodies capped before parsing: UploadLimitMiddleware)
 # ===============================================================
 
 import os
 import logging
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from chat_engine import router as chat_router
-from campaign_manager import router as system_router
-from characters import router as characters_router
+from campaign_manager import router as system_router, warm_audio_catalogs
+from characters import router as characters_router, ensure_character_indexes
 from rolls import router as rolls_router
+from encounters import router as encounters_router
+import database
+from kenku_client import kenku
+import srd_lookup
+from uploads import UploadLimitMiddleware
 
 # Setup Logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("api")
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One Mongo pool for every router: opened here, closed on shutdown.
+    await run_in_threadpool(database.connect)
+    await run_in_threadpool(ensure_character_indexes, database.get_db())
+    warm_audio_catalogs()
+    srd_lookup.warm()
+    yield
+    await kenku.close()
+    database.close()
+
+app = FastAPI(lifespan=lifespan)
+
+# Upload size cap on the raw body (inside CORS, so a 413 still carries the CORS headers).
+app.add_middleware(UploadLimitMiddleware)
 
 # --- CORS FIX (CONFIRMED) ---
 app.add_middleware(
@@ -28,6 +49,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # roster pagination (characters.py)
 )
 logger.info("✅ CORS Policy: ENABLED (All Origins)")
 
@@ -44,13 +66,21 @@ try:
 except Exception as e:
     logger.error(f"❌ Campaign Path Error: {e}")
 
+class CampaignFiles(StaticFiles):
+    # Dot-paths are internal: .snapshots (trees + character dumps) and in-flight job dirs.
+    async def get_response(self, path, scope):
+        if any(part.startswith(".") for part in path.replace("\\", "/").split("/")):
+            raise HTTPException(status_code=404)
+        return await super().get_response(path, scope)
+
 # Mount the ENTIRE campaigns folder
-app.mount("/campaigns", StaticFiles(directory="/campaigns"), name="campaigns")
+app.mount("/campaigns", CampaignFiles(directory="/campaigns"), name="campaigns")
 
 # --- ROUTERS ---
 app.include_router(chat_router, prefix="/game")
 app.include_router(characters_router, prefix="/game")
 app.include_router(rolls_router, prefix="/game")
+app.include_router(encounters_router, prefix="/game")
 app.include_router(system_router, prefix="/system")
 
 @app.get("/")
@@ -59,4 +89,8 @@ def health_check():
         "status": "active", 
         "service": "RealmQuest API", 
         "cors": "enabled"
-    }
\ No newline at end of file
+    }
+
+@app.get("/health")
+def health_detail():
+    return {"status": "active", "mongo": database.health()}
\ No newline at end of file
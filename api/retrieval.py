@@ -0,0 +1,373 @@
+#===============================================================
+#Script Name: retrieval.py
+#Script Location: /opt/RealmQuest/api/retrieval.py
+#Date: 10/19/2026
+#Created By: T03KNEE
+#Github: https://github.com/To3Knee/RealmQuest
+#Version: 1.1.1
+#About: Federated rules retrieval for the story prompt.
+#       - Vector search over every configured Chroma collection (dnd_rules, game_physics,
+#         rq_dnd_dictionary) in parallel; the query is embedded once per embedding model.
+#       - In-process BM25 over the same documents (pulled from Chroma, refreshed
+#         stale-while-revalidate) catches exact terms the embeddings blur.
+#       - Rankings are merged with reciprocal-rank fusion, near-identical passages are
+#         dropped and the result is trimmed to a prompt token budget.
+#       - While Chroma is unreachable, vector search runs on the bootstrap's NumPy exports
+#         (vector_index) and BM25 is rebuilt from the same files.
+#===============================================================
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import vector_index
+from swr_cache import SWRCache
+
+logger = logging.getLogger("api")
+
+COLLECTIONS = [c.strip() for c in os.getenv("RQ_RAG_COLLECTIONS", "dnd_rules,game_physics,rq_dnd_dictionary").split(",") if c.strip()]
+# RRF weight per source; the dictionary is flavour, rules and physics are authority.
+WEIGHTS = {"dnd_rules": 1.0, "game_physics": 1.0, "rq_dnd_dictionary": 0.6, "bm25": 0.8}
+# rq-pack-manager embeds the dictionary with RQ_EMBED_PROVIDER; the rest use Chroma's default model.
+EMBED_PROVIDERS = {"rq_dnd_dictionary": os.getenv("RQ_EMBED_PROVIDER", "")}
+
+PER_SOURCE = int(os.getenv("RQ_RAG_PER_SOURCE", "6"))
+TOKEN_BUDGET = int(os.getenv("RQ_RAG_TOKEN_BUDGET", "900"))
+QUERY_TIMEOUT_S = float(os.getenv("RQ_RAG_TIMEOUT_S", "2.5"))
+BM25_TTL_S = float(os.getenv("RQ_BM25_TTL_S", "600"))
+RRF_K = 60
+MISSING_RETRY_S = 60.0
+
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv("RQ_RAG_WORKERS", "4")), thread_name_prefix="rq-rag")
+
+
+@dataclass
+class Hit:
+    key: str                      # "<collection>:<id>"
+    collection: str
+    doc: str
+    meta: Dict[str, Any] = field(default_factory=dict)
+    score: float = 0.0
+    via: List[str] = field(default_factory=list)
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+# -----------------------------
+# BM25
+# -----------------------------
+
+_TOKEN_RX = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_STOP = frozenset("a an and are as at be by can do does for from has have how i if in is it its me my of on or so that the their them then there they this to was what when where which who will with you your".split())
+
+
+def _stem(t: str) -> str:
+    # Crude suffix folding so grapple / grappled / grappling share a term.
+    if len(t) > 4:
+        for suf in ("ing", "ed", "es", "s"):
+            if t.endswith(suf) and len(t) - len(suf) >= 3:
+                t = t[:-len(suf)]
+                break
+        if t.endswith("e") and len(t) > 3:
+            t = t[:-1]
+    return t
+
+
+def tokenize(text: str) -> List[str]:
+    return [_stem(t) for t in _TOKEN_RX.findall(str(text or "").lower()) if t not in _STOP]
+
+
+class BM25Index:
+    """Okapi BM25 with an inverted index; documents are (key, collection, doc, meta)."""
+
+    def __init__(self, docs: Sequence[Tuple[str, str, str, Dict[str, Any]]], k1: float = 1.5, b: float = 0.75):
+        self.docs = list(docs)
+        self.k1, self.b = k1, b
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.lengths: List[int] = []
+        for i, (_, _, text, _) in enumerate(self.docs):
+            tf = Counter(tokenize(text))
+            self.lengths.append(sum(tf.values()))
+            for term, n in tf.items():
+                self.postings.setdefault(term, []).append((i, n))
+        self.avgdl = (sum(self.lengths) / len(self.lengths)) if self.lengths else 1.0
+        n_docs = len(self.docs)
+        self.idf = {t: math.log(1 + (n_docs - len(p) + 0.5) / (len(p) + 0.5)) for t, p in self.postings.items()}
+
+    def search(self, query: str, n: int, accept: Optional[Callable[[int], bool]] = None) -> List[int]:
+        scores: Dict[int, float] = {}
+        k1, b, avgdl, lengths = self.k1, self.b, self.avgdl, self.lengths
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for i, tf in self.postings[term]:
+                scores[i] = scores.get(i, 0.0) + idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * lengths[i] / avgdl))
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        if accept is not None:
+            ranked = [i for i in ranked if accept(i)]
+        return ranked[:n]
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+
+# -----------------------------
+# Fusion
+# -----------------------------
+
+def _fingerprint(text: str) -> str:
+    norm = " ".join(tokenize(text))[:240]
+    return hashlib.sha1(norm.encode("utf-8")).hexdigest()
+
+
+def fuse(rankings: Sequence[Tuple[str, List[Hit]]], k: int = RRF_K) -> List[Hit]:
+    """Reciprocal-rank fusion: sum(weight / (k + rank)) per document, then drop near-duplicates."""
+    merged: Dict[str, Hit] = {}
+    for source, hits in rankings:
+        w = WEIGHTS.get(source, 1.0)
+        for rank, h in enumerate(hits, start=1):
+            cur = merged.get(h.key)
+            if cur is None:
+                cur = merged[h.key] = Hit(h.key, h.collection, h.doc, h.meta)
+            cur.score += w / (k + rank)
+            cur.via.append(source)
+    out, seen = [], set()
+    for h in sorted(merged.values(), key=lambda h: h.score, reverse=True):
+        fp = _fingerprint(h.doc)
+        if fp in seen:
+            continue
+        seen.add(fp)
+        out.append(h)
+    return out
+
+
+def trim_to_budget(hits: List[Hit], budget: int = TOKEN_BUDGET) -> List[Hit]:
+    """Best-first until the budget is spent; the passage that crosses it is cut, not skipped."""
+    out, left = [], budget
+    for h in hits:
+        cost = estimate_tokens(h.doc)
+        if cost <= left:
+            out.append(h)
+            left -= cost
+        elif left >= 80:
+            out.append(Hit(h.key, h.collection, h.doc[:left * 4].rsplit(" ", 1)[0] + " …", h.meta, h.score, h.via))
+            break
+        else:
+            break
+    return out
+
+
+def format_context(hits: List[Hit]) -> str:
+    if not hits:
+        return ""
+    lines = []
+    for h in hits:
+        m = h.meta or {}
+        if h.collection == "dnd_rules":
+            tag = " ".join(str(v) for v in (m.get("category", "rule"), m.get("ruleset")) if v)
+        elif h.collection == "game_physics":
+            tag = "mechanic"
+        else:
+            tag = "term"
+        lines.append(f"[{tag}] {h.doc}")
+    return "\nRELEVANT RULES:\n" + "\n".join(lines)
+
+
+# -----------------------------
+# Retriever
+# -----------------------------
+
+class Retriever:
+    def __init__(self, client: Any = None, collections: Sequence[str] = COLLECTIONS):
+        self.client = client
+        self.collections = list(collections)
+        self._lock = threading.Lock()
+        self._handles: Dict[str, Any] = {}
+        self._missing: Dict[str, float] = {}
+        self._efs: Dict[str, Any] = {}
+        self._qcache: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+        self.stats_counts = {"local": 0}
+        self._bm25: SWRCache[BM25Index] = SWRCache("bm25", ttl=BM25_TTL_S, max_stale=float("inf"), load_timeout=30.0, error_backoff=60.0)
+
+    def set_client(self, client: Any) -> None:
+        with self._lock:
+            self.client = client
+            self._handles.clear()
+            self._missing.clear()
+        self._bm25.refresh("all", self._load_bm25)  # rebuild from the new source; the old index serves meanwhile
+
+    # --- Chroma handles / embeddings ---
+
+    def _handle(self, name: str) -> Optional[Any]:
+        client = self.client
+        if client is None:
+            return None
+        with self._lock:
+            h = self._handles.get(name)
+            if h is not None:
+                return h
+            if time.monotonic() - self._missing.get(name, -MISSING_RETRY_S) < MISSING_RETRY_S:
+                return None
+        try:
+            h = client.get_collection(name)
+        except Exception:
+            with self._lock:
+                self._missing[name] = time.monotonic()  # not built yet (e.g. no dictionary packs)
+            return None
+        with self._lock:
+            self._handles[name] = h
+        return h
+
+    def _embedder(self, provider: str) -> Any:
+        ef = self._efs.get(provider)
+        if ef is None:
+            from chromadb.utils import embedding_functions
+            if provider == "openai":
+                ef = embedding_functions.OpenAIEmbeddingFunction(api_key=os.getenv("OPENAI_API_KEY"), model_name="text-embedding-3-small")
+            else:
+                ef = embedding_functions.DefaultEmbeddingFunction()  # same all-MiniLM-L6-v2 as the "st" provider
+            self._efs[provider] = ef
+        return ef
+
+    def embed(self, query: str, provider: str = "") -> List[float]:
+        provider = "openai" if provider == "openai" else ""
+        key = (provider, query)
+        with self._lock:
+            if key in self._qcache:
+                self._qcache.move_to_end(key)
+                return self._qcache[key]
+        vec = [float(x) for x in self._embedder(provider)([query])[0]]
+        with self._lock:
+            self._qcache[key] = vec
+            while len(self._qcache) > 256:
+                self._qcache.popitem(last=False)
+        return vec
+
+    # --- Sources ---
+
+    def _vector(self, name: str, query: str, n: int, where: Optional[Dict[str, Any]]) -> List[Hit]:
+        provider = EMBED_PROVIDERS.get(name, "")
+        if self.client is not None:
+            coll = self._handle(name)
+            if coll is None:
+                return []
+            kwargs: Dict[str, Any] = {
+                "query_embeddings": [self.embed(query, provider)],
+                "n_results": n, "include": ["documents", "metadatas"],
+            }
+            if where:
+                kwargs["where"] = where
+            try:
+                res = coll.query(**kwargs)
+            except Exception as e:
+                logger.warning(f"⚠️ RAG: {name} unreachable ({e}); using the local vector index")
+            else:
+                ids = (res.get("ids") or [[]])[0]
+                docs = (res.get("documents") or [[]])[0]
+                metas = (res.get("metadatas") or [[]])[0] or [{}] * len(ids)
+                return [Hit(f"{name}:{i}", name, d, m or {}) for i, d, m in zip(ids, docs, metas) if d]
+        return self._vector_local(name, query, n, where)
+
+    def _vector_local(self, name: str, query: str, n: int, where: Optional[Dict[str, Any]]) -> List[Hit]:
+        """Chroma is down: same query against the bootstrap export (vector_index)."""
+        idx = vector_index.get_index(name)
+        if idx is None:
+            return []
+        self.stats_counts["local"] += 1
+        rows = idx.query(self.embed(query, idx.provider), n, where)
+        return [Hit(f"{name}:{i}", name, d, m) for i, d, m, _ in rows if d]
+
+    def _load_bm25(self) -> BM25Index:
+        docs: List[Tuple[str, str, str, Dict[str, Any]]] = []
+        if self.client is None:
+            # Offline: the vector exports carry the same documents.
+            for name in self.collections:
+                idx = vector_index.get_index(name)
+                if idx is not None:
+                    docs.extend((f"{name}:{i}", name, d, m) for i, d, m in zip(idx.ids, idx.documents, idx.metadatas) if d)
+            if not docs:
+                raise RuntimeError("Chroma offline and no local vector exports")
+            return BM25Index(docs)
+        for name in self.collections:
+            coll = self._handle(name)
+            if coll is None:
+                continue
+            offset = 0
+            while True:
+                page = coll.get(include=["documents", "metadatas"], limit=1000, offset=offset)
+                ids = page.get("ids") or []
+                for i, d, m in zip(ids, page.get("documents") or [], page.get("metadatas") or [{}] * len(ids)):
+                    if d:
+                        docs.append((f"{name}:{i}", name, d, m or {}))
+                if len(ids) < 1000:
+                    break
+                offset += 1000
+        if not docs:
+            raise RuntimeError("no documents to index")
+        return BM25Index(docs)
+
+    def warm(self) -> None:
+        self._bm25.warm("all", self._load_bm25)
+
+    def _lexical(self, query: str, n: int, categories: Optional[Sequence[str]]) -> List[Hit]:
+        if not self._bm25.peek("all").get("cached"):
+            self.warm()  # never block a chat turn on the first build
+            return []
+        idx = self._bm25.get("all", self._load_bm25)
+        if idx is None:
+            return []
+        accept = None
+        if categories:
+            cats = set(categories)
+            accept = lambda i: idx.docs[i][1] != "dnd_rules" or idx.docs[i][3].get("category") in cats
+        return [Hit(*idx.docs[i]) for i in idx.search(query, n, accept)]
+
+    # --- Public ---
+
+    def retrieve(self, query: str, categories: Optional[Sequence[str]] = None, budget: int = TOKEN_BUDGET) -> List[Hit]:
+        if not query:
+            return []
+        where = {"category": {"$in": list(categories)}} if categories else None
+        futures = {
+            _executor.submit(self._vector, name, query, PER_SOURCE, where if name == "dnd_rules" else None): name
+            for name in self.collections
+        }
+        rankings: List[Tuple[str, List[Hit]]] = []
+        try:
+            rankings.append(("bm25", self._lexical(query, PER_SOURCE, categories)))
+        except Exception as e:
+            logger.warning(f"⚠️ BM25 search failed: {e}")
+        done, _ = wait(futures, timeout=QUERY_TIMEOUT_S)
+        for fut, name in futures.items():
+            if fut not in done:
+                logger.warning(f"⚠️ RAG: {name} timed out")
+                continue
+            try:
+                rankings.append((name, fut.result()))
+            except Exception as e:
+                logger.warning(f"⚠️ RAG: {name} query failed: {e}")
+        fused = fuse(rankings)
+        if not fused and categories:
+            return self.retrieve(query, None, budget)  # the filter was too narrow
+        return trim_to_budget(fused, budget)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connected": self.client is not None,
+            "local_queries": self.stats_counts["local"],
+            "collections": {n: (n in self._handles) for n in self.collections},
+            "bm25": self._bm25.peek("all"),
+        }
@@ -0,0 +1,179 @@
+#===============================================================
+#Script Name: roll_analytics.py
+#Script Location: /opt/RealmQuest/api/roll_analytics.py
+#Date: 10/19/2026
+#Created By: T03KNEE
+#Github: https://github.com/To3Knee/RealmQuest
+#Version: 1.0.0
+#About: Per-character roll analytics maintained with atomic counters.
+#       One doc per (campaign, character, die size, roll_type) holds counts, sums, a face
+#       histogram and hot/cold streaks, so "how lucky is everyone" reads O(characters).
+#===============================================================
+
+from __future__ import annotations
+
+import logging
+import math
+from typing import Any, Dict, List, Optional
+
+from pymongo import ReturnDocument
+
+from roll_retention import ANALYTICS, character_key
+
+logger = logging.getLogger("api")
+
+
+def rolled_by_sides(event: Dict[str, Any]) -> Dict[int, List[int]]:
+    """Group every rolled die of an event by size.
+
+    Raw faces (not just kept ones) so advantage/disadvantage does not skew luck.
+    """
+    out: Dict[int, List[int]] = {}
+    expr = event.get("expression")
+    if isinstance(expr, dict) and expr.get("terms"):
+        for t in expr["terms"]:
+            if not isinstance(t, dict):
+                continue
+            sides = int(t.get("sides") or 0)
+            if sides >= 2:
+                out.setdefault(sides, []).extend(int(x) for x in (t.get("rolls") or []))
+        return {k: v for k, v in out.items() if v}
+
+    sides = int(event.get("sides") or 0)
+    faces = event.get("rolls")
+    if sides >= 2 and faces:
+        out[sides] = [int(x) for x in faces]
+    return out
+
+
+def record_analytics(db, event: Dict[str, Any]) -> None:
+    """$inc the analytics doc for every die size in the event, then fold in streak highs."""
+    if db is None or event.get("roll_type") == "stat_block":
+        return
+    cid = event.get("campaign_id")
+    char = character_key(event)
+    roll_type = str(event.get("roll_type") or "roll").strip().lower() or "roll"
+    epoch = float(event.get("created_at_epoch") or 0.0)
+
+    for sides, faces in rolled_by_sides(event).items():
+        expected = len(faces) * (sides + 1) / 2.0
+        total = sum(faces)
+        hot, cold = total > expected, total < expected
+
+        inc: Dict[str, Any] = {
+            "rolls": 1,
+            "dice": len(faces),
+            "sum": total,
+            "max_faces": sum(1 for f in faces if f == sides),
+            "min_faces": sum(1 for f in faces if f == 1),
+        }
+        for f in faces:
+            inc[f"hist.{f}"] = inc.get(f"hist.{f}", 0) + 1
+
+        update: Dict[str, Any] = {
+            "$inc": inc,
+            "$set": {"character_name": event.get("character_name"), "last_epoch": epoch},
+        }
+        # Streaks: consecutive rolls above (hot) / below (cold) the die average.
+        if hot:
+            update["$inc"]["streak.hot"] = 1
+            update["$set"]["streak.cold"] = 0
+        elif cold:
+            update["$inc"]["streak.cold"] = 1
+            update["$set"]["streak.hot"] = 0
+        else:
+            update["$set"]["streak.hot"] = 0
+            update["$set"]["streak.cold"] = 0
+
+        key = {"campaign_id": cid, "character": char, "sides": sides, "roll_type": roll_type}
+        try:
+            doc = db[ANALYTICS].find_one_and_update(
+                key,
+                update,
+                upsert=True,
+                projection={"_id": 0, "streak": 1},
+                return_document=ReturnDocument.AFTER,
+            ) or {}
+            streak = doc.get("streak") or {}
+            # $max is monotonic, so concurrent writers cannot lower a recorded best.
+            best = {}
+            if hot:
+                best["streak.best_hot"] = int(streak.get("hot") or 0)
+            elif cold:
+                best["streak.best_cold"] = int(streak.get("cold") or 0)
+            if best:
+                db[ANALYTICS].update_one(key, {"$max": best})
+        except Exception as e:
+            logger.warning(f"⚠️ Roll analytics update failed ({char} d{sides}): {e}")
+
+
+def _bucket(doc: Dict[str, Any]) -> Dict[str, Any]:
+    sides = int(doc.get("sides") or 0)
+    dice = int(doc.get("dice") or 0)
+    total = int(doc.get("sum") or 0)
+    mean = (sides + 1) / 2.0
+    var = (sides * sides - 1) / 12.0
+    hist_raw = doc.get("hist") or {}
+    streak = doc.get("streak") or {}
+    return {
+        "sides": sides,
+        "roll_type": doc.get("roll_type"),
+        "rolls": int(doc.get("rolls") or 0),
+        "dice": dice,
+        "avg_face": round(total / dice, 3) if dice else None,
+        "expected_face": mean,
+        # Standard score of the face sum vs a fair die: >0 lucky, <0 unlucky.
+        "luck_z": round((total - dice * mean) / math.sqrt(dice * var), 3) if dice and var else None,
+        "max_faces": int(doc.get("max_faces") or 0),
+        "min_faces": int(doc.get("min_faces") or 0),
+        "histogram": [int(hist_raw.get(str(f), 0)) for f in range(1, sides + 1)] if sides <= 100 else None,
+        "streak": {
+            "hot": int(streak.get("hot") or 0),
+            "cold": int(streak.get("cold") or 0),
+            "best_hot": int(streak.get("best_hot") or 0),
+            "best_cold": int(streak.get("best_cold") or 0),
+        },
+        "last_epoch": doc.get("last_epoch"),
+    }
+
+
+def summarize_characters(docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Group analytics docs into per-character summaries with an overall luck score."""
+    chars: Dict[str, Dict[str, Any]] = {}
+    for doc in docs:
+        key = str(doc.get("character") or "unknown")
+        entry = chars.setdefault(key, {
+            "character": key,
+            "character_name": doc.get("character_name"),
+            "rolls": 0,
+            "_dev": 0.0,
+            "_var": 0.0,
+            "buckets": [],
+        })
+        b = _bucket(doc)
+        entry["buckets"].append(b)
+        entry["rolls"] += b["rolls"]
+        if b["dice"]:
+            sides = b["sides"]
+            entry["_dev"] += int(doc.get("sum") or 0) - b["dice"] * (sides + 1) / 2.0
+            entry["_var"] += b["dice"] * (sides * sides - 1) / 12.0
+        if doc.get("character_name"):
+            entry["character_name"] = doc.get("character_name")
+
+    out = []
+    for entry in chars.values():
+        dev, var = entry.pop("_dev"), entry.pop("_var")
+        entry["luck_z"] = round(dev / math.sqrt(var), 3) if var else None
+        entry["buckets"].sort(key=lambda b: (b["sides"], str(b["roll_type"])))
+        out.append(entry)
+    out.sort(key=lambda e: (e["luck_z"] is None, -(e["luck_z"] or 0.0)))
+    return out
+
+
+def clear_analytics(db, campaign_id: str, character: Optional[str] = None) -> int:
+    if db is None:
+        return 0
+    q: Dict[str, Any] = {"campaign_id": campaign_id}
+    if character:
+        q["character"] = character
+    return int(db[ANALYTICS].delete_many(q).deleted_count)
@@ -0,0 +1,235 @@
+#===============================================================
+#Script Name: roll_retention.py
+#Script Location: /opt/RealmQuest/api/roll_retention.py
+#Date: 10/19/2026
+#Created By: T03KNEE
+#Github: https://github.com/To3Knee/RealmQuest
+#Version: 1.1.1
+#About: Storage layout + retention for roll_events, and incrementally maintained rollups.
+#       - New installs get roll_events as a Mongo time-series collection (meta: campaign_id).
+#       - Raw events expire after RQ_ROLL_RETENTION_DAYS (TTL on created_at_ts).
+#       - roll_rollups holds per-session / per-character counters updated on every insert,
+#         so stats never scan raw events.
+#       1.1.0: roll_analytics index (per character/die/roll_type counters, roll_analytics.py).
+#       1.1.1: one-time backfill of created_at_ts on legacy (pre-1.0) events so the TTL reaches
+#              them too: from created_at_epoch, else created_at, else the backfill time.
+#===============================================================
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("api")
+
+EVENTS = "roll_events"
+ROLLUPS = "roll_rollups"
+ANALYTICS = "roll_analytics"
+
+# 0 disables expiry.
+RETENTION_DAYS = int(os.getenv("RQ_ROLL_RETENTION_DAYS", "180") or 0)
+USE_TIMESERIES = os.getenv("RQ_ROLL_TIMESERIES", "1").strip().lower() not in ("0", "false", "no")
+
+ROLLUP_SCOPES = ("session", "character", "campaign")
+
+_ready_lock = threading.Lock()
+_ready: set = set()
+_last_attempt: Dict[str, float] = {}
+_RETRY_SECONDS = 60.0
+
+
+def _ttl_seconds() -> Optional[int]:
+    return RETENTION_DAYS * 86400 if RETENTION_DAYS > 0 else None
+
+
+def ensure_roll_storage(db) -> None:
+    """Create roll_events/roll_rollups layout and indexes once per process (idempotent)."""
+    if db is None:
+        return
+    key = db.name
+    if key in _ready:
+        return
+    with _ready_lock:
+        if key in _ready or time.time() - _last_attempt.get(key, 0.0) < _RETRY_SECONDS:
+            return
+        _last_attempt[key] = time.time()
+        try:
+            _ensure_events(db)
+            _ensure_rollups(db)
+            _ready.add(key)
+        except Exception as e:
+            logger.warning(f"⚠️ Roll storage setup deferred: {e}")
+
+
+def _ensure_events(db) -> None:
+    ttl = _ttl_seconds()
+    existing = db.list_collection_names(filter={"name": EVENTS})
+
+    if not existing and USE_TIMESERIES:
+        opts: Dict[str, Any] = {
+            "timeseries": {"timeField": "created_at_ts", "metaField": "campaign_id", "granularity": "seconds"},
+        }
+        if ttl:
+            opts["expireAfterSeconds"] = ttl
+        db.create_collection(EVENTS, **opts)
+        logger.info(f"✅ roll_events created as time-series (retention: {RETENTION_DAYS or 'forever'} days)")
+    else:
+        info = list(db.list_collections(filter={"name": EVENTS}))
+        is_ts = bool(info) and info[0].get("type") == "timeseries"
+        if is_ts:
+            # Keep the collection-level expiry in sync with config.
+            db.command("collMod", EVENTS, expireAfterSeconds=ttl if ttl else "off")
+        else:
+            _ensure_ttl_index(db[EVENTS], ttl)
+            _backfill_ts(db[EVENTS])
+
+    coll = db[EVENTS]
+    # Feed query: latest N for a campaign.
+    coll.create_index([("campaign_id", 1), ("created_at_epoch", -1)], name="campaign_feed")
+    coll.create_index([("roll_id", 1)], name="roll_id")
+
+
+def _backfill_ts(coll) -> None:
+    """Give legacy events the TTL time field (idempotent: only documents still missing it)."""
+    try:
+        res = coll.update_many(
+            {"created_at_ts": {"$exists": False}},
+            [{"$set": {"created_at_ts": {"$cond": [
+                {"$isNumber": "$created_at_epoch"},
+                {"$toDate": {"$multiply": ["$created_at_epoch", 1000]}},
+                # rolls.py wrote created_at as "%Y-%m-%d %H:%M:%S" (container time, UTC).
+                {"$dateFromString": {
+                    "dateString": {"$toString": "$created_at"}, "format": "%Y-%m-%d %H:%M:%S",
+                    "onError": "$$NOW", "onNull": "$$NOW",
+                }},
+            ]}}}],
+        )
+        if res.modified_count:
+            logger.info(f"✅ roll_events: backfilled created_at_ts on {res.modified_count} legacy events")
+    except Exception as e:
+        logger.warning(f"⚠️ roll_events created_at_ts backfill skipped: {e}")
+
+
+def _ensure_ttl_index(coll, ttl: Optional[int]) -> None:
+    name = "created_at_ttl"
+    current = coll.index_information().get(name)
+    if ttl is None:
+        if current:
+            coll.drop_index(name)
+        return
+    if current is None:
+        coll.create_index([("created_at_ts", 1)], name=name, expireAfterSeconds=ttl)
+    elif current.get("expireAfterSeconds") != ttl:
+        coll.database.command("collMod", coll.name, index={"name": name, "expireAfterSeconds": ttl})
+
+
+def _ensure_rollups(db) -> None:
+    db[ROLLUPS].create_index(
+        [("campaign_id", 1), ("scope", 1), ("key", 1)],
+        name="rollup_key",
+        unique=True,
+    )
+    db[ANALYTICS].create_index(
+        [("campaign_id", 1), ("character", 1), ("sides", 1), ("roll_type", 1)],
+        name="analytics_key",
+        unique=True,
+    )
+
+
+# -----------------------------
+# Rollups
+# -----------------------------
+
+def session_key(event: Dict[str, Any]) -> str:
+    """Explicit session_id, else the UTC play day of the event."""
+    sid = str(event.get("session_id") or "").strip()
+    if sid:
+        return sid
+    epoch = float(event.get("created_at_epoch") or 0.0)
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def character_key(event: Dict[str, Any]) -> str:
+    for k in ("character_id", "character_name", "owner_discord_id", "player_name"):
+        v = str(event.get(k) or "").strip()
+        if v:
+            return v
+    return "unknown"
+
+
+def kept_d20s(event: Dict[str, Any]) -> List[int]:
+    """Kept d20 faces across all d20 terms (handles adv/dis and multi-term notation)."""
+    expr = event.get("expression")
+    if isinstance(expr, dict) and expr.get("terms"):
+        out: List[int] = []
+        for t in expr["terms"]:
+            if isinstance(t, dict) and int(t.get("sides") or 0) == 20:
+                out.extend(int(x) for x in (t.get("kept") or []))
+        return out
+    if int(event.get("sides") or 0) == 20:
+        return [int(x) for x in (event.get("kept") or event.get("rolls") or [])]
+    return []
+
+
+def rollup_increments(event: Dict[str, Any]) -> Dict[str, Any]:
+    d20 = kept_d20s(event)
+    roll_type = str(event.get("roll_type") or "roll").strip().lower() or "roll"
+    inc: Dict[str, Any] = {
+        "count": 1,
+        "nat20": sum(1 for v in d20 if v == 20),
+        "nat1": sum(1 for v in d20 if v == 1),
+        "d20_count": len(d20),
+        "d20_sum": sum(d20),
+        f"by_type.{roll_type.replace('.', '_').replace('$', '_')}": 1,
+    }
+    if roll_type == "damage":
+        inc["damage_total"] = int(event.get("grand_total") or 0)
+        inc["damage_count"] = 1
+    return inc
+
+
+def record_rollups(db, event: Dict[str, Any]) -> None:
+    """Apply one event to its session, character and campaign rollups (upsert + $inc)."""
+    if db is None:
+        return
+    cid = event.get("campaign_id")
+    epoch = float(event.get("created_at_epoch") or 0.0)
+    inc = rollup_increments(event)
+    keys = {
+        "session": session_key(event),
+        "character": character_key(event),
+        "campaign": str(cid),
+    }
+    for scope, key in keys.items():
+        update: Dict[str, Any] = {
+            "$inc": inc,
+            "$min": {"first_epoch": epoch},
+            "$max": {"last_epoch": epoch},
+        }
+        if scope == "character":
+            update["$set"] = {"character_name": event.get("character_name"), "owner_discord_id": event.get("owner_discord_id")}
+        try:
+            db[ROLLUPS].update_one({"campaign_id": cid, "scope": scope, "key": key}, update, upsert=True)
+        except Exception as e:
+            logger.warning(f"⚠️ Roll rollup update failed ({scope}:{key}): {e}")
+
+
+def present_rollup(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Add derived averages to a stored rollup doc."""
+    out = dict(doc)
+    out.pop("_id", None)
+    d20_count = int(out.get("d20_count") or 0)
+    dmg_count = int(out.get("damage_count") or 0)
+    out["avg_d20"] = round(out.get("d20_sum", 0) / d20_count, 3) if d20_count else None
+    out["avg_damage"] = round(out.get("damage_total", 0) / dmg_count, 3) if dmg_count else None
+    return out
+
+
+def clear_rollups(db, campaign_id: str) -> int:
+    if db is None:
+        return 0
+    return int(db[ROLLUPS].delete_many({"campaign_id": campaign_id}).deleted_count)
@@ -4,35 +4,51 @@
 #Date: 01/31/2026
 #Created By: T03KNEE
 #Github: https://github.com/To3Knee/RealmQuest
-#Version: 1.1.3
+#Version: 1.7.3
 #About: Canonical roll event endpoints for bot-aware dice and shared player roll feed.
 #       Adds advanced dice notation parsing (kh/kl/dh/dl), advantage/disadvantage,
 #       d100/percentile (d%), and stat-block rolling (4d6 drop-lowest x6).
 #       Additive and backward-compatible: existing clients that send dice_count+sides+rolls still work.
+#       1.2.0: /roll/odds exact probability distributions (dice_odds.py).
+#       1.3.0: roll_events retention (TTL / time-series) + incremental rollups (roll_retention.py).
+#       1.4.0: /rolls/analytics per-character luck, histograms and streaks (roll_analytics.py).
+#       1.5.0: dice come from dice_rng.py (bulk NumPy draws, RQ_DICE_SEED, commit-reveal sessions
+#              with per-roll verification).
+#       1.6.0: /rolls?since_epoch= returns only newer events, oldest first (per-campaign bot cursors).
+#       1.6.1: shared pooled client from database.py.
+#       1.7.0: auto_modifier fills the modifier from the character's derived stats (derived_stats.py).
+#       1.7.1: notation caps (20 terms, 200 dice in total); /roll/odds refuses over-wide supports.
+#       1.7.2: committed rolls are only flagged client_supplied when the supplied rolls were used.
+#       1.7.3: since_id tie-breaker: the feed cursor is (created_at_epoch, roll_id), so events sharing
+#              an epoch are not skipped between pages.
 #===============================================================
 
-import os
 import re
 import time
 import uuid
-import secrets
-from typing import Any, Dict, List, Optional, Tuple, Union
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel, Field
-from pymongo import MongoClient
 
 from system_config import get_active_campaign_id
+from derived_stats import derived_by_id, stat_key
+from dice_odds import DEFAULT_PERCENTILES, cached_expression_pmf, summarize
+from database import get_db
+from dice_rng import CommittedStream, commit_for, create_session, get_rng, get_session, public_session, reveal_session
+from roll_analytics import clear_analytics, record_analytics, summarize_characters
+from roll_retention import (
+    ROLLUP_SCOPES,
+    clear_rollups,
+    ensure_roll_storage,
+    present_rollup,
+    record_rollups,
+)
 
 
 router = APIRouter()
 
-try:
-    mongo = MongoClient(os.getenv("MONGO_URL", "mongodb://realmquest-mongo:27017/"), serverSelectionTimeoutMS=2000)
-    db = mongo["realmquest"]
-except Exception:
-    db = None
-
 
 # -----------------------------
 # Models
@@ -45,6 +61,7 @@ class RollCreate(BaseModel):
     character_name: Optional[str] = None
     owner_discord_id: Optional[str] = None
     player_name: Optional[str] = None
+    session_id: Optional[str] = None  # groups rolls into a play session for rollups (default: UTC day)
 
     # Core dice data (either provide dice_count+sides or provide notation)
     dice_count: int = Field(default=1, ge=1, le=100)
@@ -55,6 +72,8 @@ class RollCreate(BaseModel):
     modifier: int = 0
     bonus: int = 0
     attribute: Optional[str] = None
+    # Fill `modifier` from the character's derived `attribute` bonus (e.g. "stealth", "dex_save")
+    auto_modifier: bool = False
 
     # Total (client may provide; server will validate/compute if possible)
     grand_total: Optional[int] = None
@@ -98,6 +117,7 @@ class RollEvent(BaseModel):
     character_name: Optional[str] = None
     owner_discord_id: Optional[str] = None
     player_name: Optional[str] = None
+    session_id: Optional[str] = None
 
     # For backwards compatibility, keep the original single-group fields.
     dice_count: int
@@ -120,6 +140,9 @@ class RollEvent(BaseModel):
     kept: Optional[List[int]] = None
     dropped: Optional[List[int]] = None
 
+    # Dice source; committed sessions carry {mode, session_id, commit, nonce} for verification.
+    rng: Optional[Dict[str, Any]] = None
+
 
 class StatsRequest(BaseModel):
     # Identity (same as RollCreate, subset)
@@ -128,6 +151,7 @@ class StatsRequest(BaseModel):
     character_name: Optional[str] = None
     owner_discord_id: Optional[str] = None
     player_name: Optional[str] = None
+    session_id: Optional[str] = None
 
     # Stat rolling config
     method: str = "4d6dl1"  # classic 5e method
@@ -138,6 +162,20 @@ class StatsRequest(BaseModel):
     visibility: str = "public"
 
 
+class RollSessionCreate(BaseModel):
+    campaign_id: Optional[str] = None
+    session_id: Optional[str] = None  # default: generated uuid
+
+
+class OddsRequest(BaseModel):
+    notation: str                     # e.g. "2d20kh1+5", "8d6", "4d6dl1"
+    modifier: int = 0
+    bonus: int = 0
+    dc: Optional[int] = None          # when set, response includes P(total >= dc)
+    percentiles: List[int] = Field(default_factory=lambda: list(DEFAULT_PERCENTILES))
+    include_pmf: bool = False
+
+
 # -----------------------------
 # Notation parsing and evaluation
 # -----------------------------
@@ -148,6 +186,16 @@ class StatsRequest(BaseModel):
 _DICE_TERM_RE = re.compile(r"^(?P<count>\d*)[dD](?P<sides>\d+|%)(?P<kd>(?:kh|kl|dh|dl)\d+)?$")
 
 
+# Whole-expression caps (each term is separately capped at 100 dice / 1000 sides).
+_MAX_TERMS = 20
+_MAX_TOTAL_DICE = 200
+
+
+def _check_dice_total(total: int) -> None:
+    if total > _MAX_TOTAL_DICE:
+        raise ValueError("too_many_dice")
+
+
 def _split_signed(expr: str) -> List[Tuple[int, str]]:
     """Tokenize by +/-, keeping signs, after stripping whitespace."""
     s = (expr or "").strip()
@@ -172,6 +220,8 @@ def _split_signed(expr: str) -> List[Tuple[int, str]]:
         i += 1
     if buf:
         parts.append((sign, buf))
+    if len(parts) > _MAX_TERMS:
+        raise ValueError("too_many_terms")
     return parts
 
 
@@ -255,7 +305,29 @@ def _apply_keep_drop(rolls: List[int], keep_drop: Optional[str], n: Optional[int
     return kept, dropped
 
 
-def _ensure_rolls(count: int, sides: int, provided: Optional[List[int]] = None) -> List[int]:
+def _parse_notation(notation: str) -> Tuple[List[Tuple[int, Dict[str, Any]]], int]:
+    """Parse notation into signed dice terms plus the summed constant (no rolling)."""
+    parts = _split_signed(notation)
+    if not parts:
+        raise ValueError("empty_notation")
+
+    terms: List[Tuple[int, Dict[str, Any]]] = []
+    constants = 0
+    for sign, tok in parts:
+        term = _parse_term(tok)
+        if isinstance(term, int):
+            constants += sign * term
+        else:
+            terms.append((sign, term))
+    _check_dice_total(sum(int(t["count"]) for _, t in terms))
+    return terms, constants
+
+
+DrawFn = Callable[[int, int], List[int]]
+
+
+def _ensure_rolls(count: int, sides: int, provided: Optional[List[int]] = None, draw: Optional[DrawFn] = None) -> List[int]:
+    draw = draw or get_rng().draw
     if provided and isinstance(provided, list) and len(provided) > 0:
         out: List[int] = []
         for r in provided[:count]:
@@ -268,10 +340,10 @@ def _ensure_rolls(count: int, sides: int, provided: Optional[List[int]] = None)
             if rv > sides:
                 rv = sides
             out.append(rv)
-        while len(out) < count:
-            out.append(secrets.randbelow(sides) + 1)
+        if len(out) < count:
+            out.extend(draw(count - len(out), sides))
         return out
-    return [secrets.randbelow(sides) + 1 for _ in range(count)]
+    return draw(count, sides)
 
 
 def _evaluate_notation(
@@ -279,6 +351,7 @@ def _evaluate_notation(
     provided_rolls: Optional[List[int]],
     fallback_modifier: int,
     fallback_bonus: int,
+    draw: Optional[DrawFn] = None,
 ) -> Tuple[ExpressionDetail, int, int, List[int], List[int], List[int], int, int, int]:
     """
     Evaluate a dice notation expression.
@@ -300,6 +373,7 @@ def _evaluate_notation(
     constants = 0
     dice_terms: List[DiceTermDetail] = []
     is_percentile = False
+    dice_seen = 0
 
     # If there is exactly one dice term and the caller provided rolls, allow them to be used.
     can_use_provided_rolls = bool(provided_rolls) and len(parts) == 1
@@ -315,11 +389,13 @@ def _evaluate_notation(
         sides = int(term["sides"])
         kd = term.get("keep_drop")
         kd_n = term.get("keep_drop_n")
+        dice_seen += count
+        _check_dice_total(dice_seen)
 
         if can_use_provided_rolls:
-            rolls_for_term = _ensure_rolls(count, sides, provided_rolls)
+            rolls_for_term = _ensure_rolls(count, sides, provided_rolls, draw)
         else:
-            rolls_for_term = _ensure_rolls(count, sides, None)
+            rolls_for_term = _ensure_rolls(count, sides, None, draw)
 
         kept, dropped = _apply_keep_drop(rolls_for_term, kd, kd_n)
         subtotal = sign * sum(kept)
@@ -371,11 +447,55 @@ def _evaluate_notation(
     return expr_detail, rep_count, rep_sides, rep_rolls, kept_flat, dropped_flat, modifier_used, bonus_used, computed_total
 
 
+def _uses_provided_rolls(notation: Optional[str], provided_rolls: Optional[List[int]]) -> bool:
+    """Whether create_roll takes the caller's rolls: plain dice, or a notation with exactly one dice term."""
+    if not provided_rolls:
+        return False
+    if not notation or not str(notation).strip():
+        return True
+    parts = _split_signed(str(notation))
+    return len(parts) == 1 and not isinstance(_parse_term(parts[0][1]), int)
+
+
 def _compute_total_simple(rolls: List[int], modifier: int, bonus: int) -> int:
     base = sum(int(x) for x in (rolls or []))
     return base + int(modifier or 0) + int(bonus or 0)
 
 
+def _dice_source(session_id: Optional[str], roll_id: str, client_supplied: bool = False) -> Tuple[Optional[DrawFn], Optional[Dict[str, Any]]]:
+    """Pick the dice stream for a roll: a committed session stream, or the shared RNG."""
+    db = get_db()
+    session = get_session(db, session_id)
+    if session:
+        if session.get("revealed"):
+            raise HTTPException(status_code=409, detail="roll_session_revealed")
+        meta = {
+            "mode": "committed",
+            "session_id": session["session_id"],
+            "commit": session["commit"],
+            "nonce": roll_id,
+        }
+        if client_supplied:
+            meta["client_supplied"] = True
+        return CommittedStream(session["seed"], roll_id).draw, meta
+    return None, ({"mode": "seeded"} if get_rng().seeded else None)
+
+
+def _store_event(event: Dict[str, Any]) -> None:
+    """Insert a roll event and fold it into the session/character/campaign rollups."""
+    db = get_db()
+    ensure_roll_storage(db)
+    doc = {k: v for k, v in event.items() if v is not None}
+    # Time field for TTL / time-series bucketing (not part of the API response).
+    doc["created_at_ts"] = datetime.fromtimestamp(float(event["created_at_epoch"]), tz=timezone.utc)
+    try:
+        db["roll_events"].insert_one(doc)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"roll_insert_failed: {e}")
+    record_rollups(db, event)
+    record_analytics(db, event)
+
+
 # -----------------------------
 # Endpoints
 # -----------------------------
@@ -383,6 +503,7 @@ def _compute_total_simple(rolls: List[int], modifier: int, bonus: int) -> int:
 @router.post("/roll", response_model=RollEvent)
 def create_roll(payload: RollCreate):
     """Create a canonical roll event for shared feed + bot awareness."""
+    db = get_db()
     if db is None:
         raise HTTPException(status_code=503, detail="database_unavailable")
 
@@ -396,10 +517,25 @@ def create_roll(payload: RollCreate):
     modifier = int(payload.modifier or 0)
     bonus = int(payload.bonus or 0)
 
+    if payload.auto_modifier and payload.attribute and payload.character_id and not modifier:
+        derived = derived_by_id(db, payload.character_id)
+        if derived is None:
+            raise HTTPException(status_code=404, detail="character_not_found")
+        found = derived["bonuses"].get(stat_key(payload.attribute))
+        if found is None:
+            raise HTTPException(status_code=422, detail=f"unknown_attribute: {payload.attribute}")
+        modifier = int(found)
+
     expression: Optional[ExpressionDetail] = None
     kept: Optional[List[int]] = None
     dropped: Optional[List[int]] = None
 
+    try:
+        client_supplied = _uses_provided_rolls(payload.notation, rolls)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"invalid_notation: {e}")
+    draw, rng_meta = _dice_source(payload.session_id, roll_id, client_supplied=client_supplied)
+
     if payload.notation and str(payload.notation).strip():
         try:
             expression, rep_count, rep_sides, rep_rolls, kept_flat, dropped_flat, mod_used, bonus_used, computed_total = _evaluate_notation(
@@ -407,6 +543,7 @@ def create_roll(payload: RollCreate):
                 provided_rolls=rolls,
                 fallback_modifier=modifier,
                 fallback_bonus=bonus,
+                draw=draw,
             )
             dice_count = int(rep_count)
             sides = int(rep_sides)
@@ -420,7 +557,7 @@ def create_roll(payload: RollCreate):
     else:
         if sides is None:
             raise HTTPException(status_code=422, detail="missing_required: sides or notation")
-        rolls = _ensure_rolls(dice_count, int(sides), rolls)
+        rolls = _ensure_rolls(dice_count, int(sides), rolls, draw)
         computed_total = _compute_total_simple(rolls, modifier, bonus)
         kept = list(rolls)
         dropped = []
@@ -445,6 +582,7 @@ def create_roll(payload: RollCreate):
         "character_name": payload.character_name,
         "owner_discord_id": payload.owner_discord_id,
         "player_name": payload.player_name,
+        "session_id": (payload.session_id or "").strip() or None,
 
         "dice_count": int(dice_count),
         "sides": int(sides if sides is not None else 20),
@@ -464,13 +602,10 @@ def create_roll(payload: RollCreate):
         "expression": expression.model_dump() if expression is not None else None,
         "kept": kept,
         "dropped": dropped,
+        "rng": rng_meta,
     }
 
-    try:
-        db["roll_events"].insert_one({k: v for k, v in event.items() if v is not None})
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"roll_insert_failed: {e}")
-
+    _store_event(event)
     return event
 
 
@@ -478,17 +613,38 @@ def create_roll(payload: RollCreate):
 def list_rolls(
     limit: int = Query(50, ge=1, le=200),
     campaign_id: Optional[str] = Query(None),
+    since_epoch: Optional[float] = Query(None, description="Only events after this epoch, oldest first"),
+    since_id: Optional[str] = Query(None, description="roll_id of the last event seen at since_epoch"),
 ):
-    """List recent roll events for the active campaign (or specified campaign_id)."""
+    """List recent roll events for the active campaign (or specified campaign_id).
+
+    With since_epoch the feed acts as a cursor: only newer events, in ascending order, so a
+    consumer never rescans what it has already announced and bursts larger than `limit` page.
+    Passing the last roll_id as since_id makes the cursor (created_at_epoch, roll_id), so
+    events sharing the boundary epoch are still returned.
+    """
+    db = get_db()
     if db is None:
         raise HTTPException(status_code=503, detail="database_unavailable")
 
     cid = (campaign_id or "").strip() or get_active_campaign_id(db)
+    ensure_roll_storage(db)
+    q: Dict[str, Any] = {"campaign_id": cid}
+    direction = -1
+    if since_epoch is not None:
+        if since_id:
+            q["$or"] = [
+                {"created_at_epoch": {"$gt": float(since_epoch)}},
+                {"created_at_epoch": float(since_epoch), "roll_id": {"$gt": since_id}},
+            ]
+        else:
+            q["created_at_epoch"] = {"$gt": float(since_epoch)}
+        direction = 1
     try:
         cur = (
             db["roll_events"]
-            .find({"campaign_id": cid}, {"_id": 0})
-            .sort("created_at_epoch", -1)
+            .find(q, {"_id": 0})
+            .sort([("created_at_epoch", direction), ("roll_id", direction)])
             .limit(int(limit))
         )
         return list(cur)
@@ -500,12 +656,15 @@ def list_rolls(
 @router.delete("/rolls")
 def clear_rolls(
     campaign_id: Optional[str] = Query(None),
+    older_than_days: Optional[float] = Query(None, gt=0, description="Only prune raw events older than this"),
+    include_stats: bool = Query(False, description="Also reset the campaign's roll rollups"),
 ):
     """Clear roll events for the active campaign (or an explicit campaign_id).
 
     This is used by the Portal trash-can action so the shared feed does not repopulate
-    on the next poll cycle.
+    on the next poll cycle. Rollups survive a clear unless include_stats=true.
     """
+    db = get_db()
     if db is None:
         raise HTTPException(status_code=503, detail="mongo_unavailable")
 
@@ -513,32 +672,96 @@ def clear_rolls(
     if not cid:
         raise HTTPException(status_code=400, detail="missing_campaign_id")
 
+    q: Dict[str, Any] = {"campaign_id": cid}
+    if older_than_days is not None:
+        q["created_at_epoch"] = {"$lt": time.time() - float(older_than_days) * 86400.0}
+
     try:
-        res = db["roll_events"].delete_many({"campaign_id": cid})
-        return {"campaign_id": cid, "deleted": int(res.deleted_count)}
+        res = db["roll_events"].delete_many(q)
+        out: Dict[str, Any] = {"campaign_id": cid, "deleted": int(res.deleted_count)}
+        if include_stats:
+            out["rollups_deleted"] = clear_rollups(db, cid)
+            out["analytics_deleted"] = clear_analytics(db, cid)
+        return out
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"roll_clear_failed: {e}")
 @router.post("/rolls/clear")
 def clear_rolls_post(
     campaign_id: Optional[str] = Query(None),
+    older_than_days: Optional[float] = Query(None, gt=0),
+    include_stats: bool = Query(False),
 ):
     """POST-based clear endpoint (browser/proxy friendly).
 
     Some environments (or security middleware) block DELETE requests from browsers.
     The Portal will prefer this endpoint and fall back to DELETE.
     """
-    return clear_rolls(campaign_id=campaign_id)
+    return clear_rolls(campaign_id=campaign_id, older_than_days=older_than_days, include_stats=include_stats)
+
+
+@router.get("/rolls/stats")
+def roll_stats(
+    campaign_id: Optional[str] = Query(None),
+    scope: str = Query("character", description="session | character | campaign"),
+    key: Optional[str] = Query(None, description="Single session_id / character key"),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """Rollup stats (counts, nat20/nat1, average d20, damage totals) without scanning raw events."""
+    db = get_db()
+    if db is None:
+        raise HTTPException(status_code=503, detail="database_unavailable")
+    if scope not in ROLLUP_SCOPES:
+        raise HTTPException(status_code=422, detail=f"invalid_scope: {scope}")
+
+    cid = (campaign_id or "").strip() or get_active_campaign_id(db)
+    ensure_roll_storage(db)
+    q: Dict[str, Any] = {"campaign_id": cid, "scope": scope}
+    if key:
+        q["key"] = key
+    try:
+        docs = db["roll_rollups"].find(q, {"_id": 0}).sort("last_epoch", -1).limit(int(limit))
+        return {"campaign_id": cid, "scope": scope, "items": [present_rollup(d) for d in docs]}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"roll_stats_failed: {e}")
+
+
+@router.get("/rolls/analytics")
+def roll_analytics(
+    campaign_id: Optional[str] = Query(None),
+    character: Optional[str] = Query(None, description="character_id (or name) to restrict to"),
+):
+    """Per-character luck: face histograms, averages vs expected, and hot/cold streaks.
+
+    Reads the incrementally maintained roll_analytics docs (O(characters x dice kinds)).
+    """
+    db = get_db()
+    if db is None:
+        raise HTTPException(status_code=503, detail="database_unavailable")
+
+    cid = (campaign_id or "").strip() or get_active_campaign_id(db)
+    ensure_roll_storage(db)
+    q: Dict[str, Any] = {"campaign_id": cid}
+    if character:
+        q["character"] = character
+    try:
+        docs = list(db["roll_analytics"].find(q, {"_id": 0}))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"roll_analytics_failed: {e}")
+    return {"campaign_id": cid, "characters": summarize_characters(docs)}
 
 
 @router.post("/roll/stats", response_model=RollEvent)
 def roll_stats_block(payload: StatsRequest):
     """Roll a full stat block (default: 4d6dl1, x6) and store as a single canonical event."""
+    db = get_db()
     if db is None:
         raise HTTPException(status_code=503, detail="database_unavailable")
 
     campaign_id = (payload.campaign_id or "").strip() or get_active_campaign_id(db)
     method = (payload.method or "4d6dl1").strip()
     n_stats = int(payload.stats or 6)
+    roll_id = str(uuid.uuid4())
+    draw, rng_meta = _dice_source(payload.session_id, roll_id)
 
     stats: List[Dict[str, Any]] = []
     totals: List[int] = []
@@ -548,6 +771,7 @@ def roll_stats_block(payload: StatsRequest):
             provided_rolls=None,
             fallback_modifier=0,
             fallback_bonus=0,
+            draw=draw,
         )
         # Expect first dice term to hold the dice breakdown.
         term0 = expr.terms[0] if expr.terms else None
@@ -566,7 +790,6 @@ def roll_stats_block(payload: StatsRequest):
         totals.append(int(computed_total))
 
     now = float(time.time())
-    roll_id = str(uuid.uuid4())
 
     event: Dict[str, Any] = {
         "roll_id": roll_id,
@@ -578,6 +801,7 @@ def roll_stats_block(payload: StatsRequest):
         "character_name": payload.character_name,
         "owner_discord_id": payload.owner_discord_id,
         "player_name": payload.player_name,
+        "session_id": (payload.session_id or "").strip() or None,
 
         "dice_count": 4,
         "sides": 6,
@@ -598,14 +822,140 @@ def roll_stats_block(payload: StatsRequest):
             "totals": totals,
         },
         "visibility": payload.visibility or "public",
+        "rng": rng_meta,
     }
 
+    _store_event(event)
+    return event
+
+
+# -----------------------------
+# Commit-reveal roll sessions
+# -----------------------------
+
+@router.post("/rolls/sessions")
+def create_roll_session(payload: RollSessionCreate):
+    """Open a committed dice session. The returned commit is SHA-256(seed); the seed stays secret until reveal."""
+    db = get_db()
+    if db is None:
+        raise HTTPException(status_code=503, detail="database_unavailable")
+    cid = (payload.campaign_id or "").strip() or get_active_campaign_id(db)
+    if payload.session_id and get_session(db, payload.session_id):
+        raise HTTPException(status_code=409, detail="roll_session_exists")
     try:
-        db["roll_events"].insert_one(event)
+        return create_session(db, cid, payload.session_id)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"roll_insert_failed: {e}")
+        raise HTTPException(status_code=500, detail=f"roll_session_create_failed: {e}")
 
-    return event
+
+@router.get("/rolls/sessions/{session_id}")
+def get_roll_session(session_id: str):
+    db = get_db()
+    if db is None:
+        raise HTTPException(status_code=503, detail="database_unavailable")
+    doc = get_session(db, session_id)
+    if not doc:
+        raise HTTPException(status_code=404, detail="roll_session_not_found")
+    return public_session(doc, include_seed=True)
+
+
+@router.post("/rolls/sessions/{session_id}/reveal")
+def reveal_roll_session(session_id: str):
+    """Close a committed session and publish its seed; no further rolls may use it."""
+    db = get_db()
+    if db is None:
+        raise HTTPException(status_code=503, detail="database_unavailable")
+    out = reveal_session(db, session_id)
+    if not out:
+        raise HTTPException(status_code=404, detail="roll_session_not_found")
+    return out
+
+
+def _replay_dice(event: Dict[str, Any], draw: DrawFn) -> Tuple[List[List[int]], List[List[int]]]:
+    """Re-derive an event's dice from its stream; returns (expected, stored) per dice group."""
+    ctx = event.get("context") if isinstance(event.get("context"), dict) else {}
+    if ctx.get("method") and isinstance(ctx.get("stats"), list):
+        expected: List[List[int]] = []
+        stored: List[List[int]] = []
+        for stat in ctx["stats"]:
+            expr, *_ = _evaluate_notation(str(ctx["method"]), None, 0, 0, draw=draw)
+            expected.append(expr.terms[0].rolls if expr.terms else [])
+            stored.append([int(x) for x in (stat.get("rolls") or [])])
+        return expected, stored
+
+    expr_stored = event.get("expression")
+    if event.get("notation") and isinstance(expr_stored, dict):
+        expr, *_ = _evaluate_notation(str(event["notation"]), None, 0, 0, draw=draw)
+        return (
+            [list(t.rolls) for t in expr.terms],
+            [[int(x) for x in (t.get("rolls") or [])] for t in (expr_stored.get("terms") or [])],
+        )
+
+    expected_flat = draw(int(event.get("dice_count") or 1), int(event.get("sides") or 20))
+    return [expected_flat], [[int(x) for x in (event.get("rolls") or [])]]
+
+
+@router.get("/roll/{roll_id}/verify")
+def verify_roll(roll_id: str):
+    """Re-derive a committed roll from its revealed session seed and compare with what was stored."""
+    db = get_db()
+    if db is None:
+        raise HTTPException(status_code=503, detail="database_unavailable")
+    event = db["roll_events"].find_one({"roll_id": roll_id}, {"_id": 0})
+    if not event:
+        raise HTTPException(status_code=404, detail="roll_not_found")
+
+    rng_meta = event.get("rng") or {}
+    out: Dict[str, Any] = {"roll_id": roll_id, "rng": rng_meta or None, "verified": None}
+    if rng_meta.get("mode") != "committed":
+        out["reason"] = "not_committed"
+        return out
+    if rng_meta.get("client_supplied"):
+        out["reason"] = "client_supplied_rolls"
+        return out
+
+    session = get_session(db, rng_meta.get("session_id"))
+    if not session:
+        out["reason"] = "session_not_found"
+        return out
+    if not session.get("revealed"):
+        out["reason"] = "session_not_revealed"
+        return out
+
+    commit_ok = commit_for(session["seed"]) == rng_meta.get("commit") == session.get("commit")
+    try:
+        expected, stored = _replay_dice(event, CommittedStream(session["seed"], rng_meta.get("nonce") or roll_id).draw)
+    except ValueError as e:
+        out["reason"] = f"replay_failed: {e}"
+        return out
+
+    out.update({
+        "verified": bool(commit_ok and expected == stored),
+        "commit_matches": commit_ok,
+        "expected_rolls": expected,
+        "stored_rolls": stored,
+        "seed": session["seed"],
+    })
+    return out
+
+
+@router.post("/roll/odds")
+def roll_odds(payload: OddsRequest):
+    """Exact distribution for a notation: mean, variance, percentiles and P(total >= dc).
+
+    Totals follow create_roll: dice + notation constants + modifier + bonus.
+    """
+    try:
+        terms, constants = _parse_notation(str(payload.notation or ""))
+        pmf = cached_expression_pmf(terms, constants + int(payload.modifier or 0) + int(payload.bonus or 0))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"invalid_notation: {e}")
+
+    out = summarize(pmf, dc=payload.dc, percentiles=payload.percentiles, include_pmf=payload.include_pmf)
+    out["notation"] = re.sub(r"\s+", "", payload.notation.strip())
+    out["modifier"] = int(payload.modifier or 0)
+    out["bonus"] = int(payload.bonus or 0)
+    return out
 
 
 @router.get("/roll/templates")
@@ -0,0 +1,330 @@
+#===============================================================
+#Script Name: srd_bundle.py
+#Script Location: /opt/RealmQuest/api/srd_bundle.py
+#Date: 10/19/2026
+#Created By: T03KNEE
+#Github: https://github.com/To3Knee/RealmQuest
+#Version: 1.0.1
+#About: Precompiled, memory-mappable SRD bundle (rules/2014 + rules/2024 in one file).
+#       bootstrap compiles it once (RQ_SRD_BUNDLE, default /app/data/cache/srd.bundle, i.e.
+#       ${RQ_DATA}/api-cache/srd.bundle on the host); readers mmap it, so the pages are shared
+#       by every process and nothing is parsed until a record is actually touched.
+#
+#       Layout (little endian, stdlib only):
+#         magic "RQSRDB1\n" | u32 header length | header JSON | pad to 8
+#         u64[N+1] record offsets | u64[N+1] key offsets | u64[N+1] name offsets
+#         record blob (compact JSON per record) | key blob (SRD index) | name blob
+#       Header: {"version", "built_at", "source_sig", "records", "sections", "files":
+#                {"2014/Monsters": {"path", "first", "count"}}}.
+#       Within a file, records are sorted by key, so get() is a bisect over the key table.
+#       get_bundle() re-checks the bundle mtime and the rules signature every RQ_SRD_BUNDLE_CHECK_S
+#       seconds (default 30), like vector_index.get_index does for its exports.
+#===============================================================
+
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+RULES_ROOT = os.getenv("RULES_ROOT", "/rules")
+BUNDLE_PATH = os.getenv("RQ_SRD_BUNDLE", "/app/data/cache/srd.bundle")
+
+MAGIC = b"RQSRDB1\n"
+FORMAT_VERSION = 1
+
+
+def file_key(path: str, rules_root: str = RULES_ROOT) -> str:
+    """rules/2014/5e-SRD-Monsters.json -> '2014/Monsters'."""
+    rel = os.path.relpath(os.path.dirname(path), rules_root)
+    ruleset = "core" if rel in (".", "") else rel.replace(os.sep, "/")
+    stem = os.path.splitext(os.path.basename(path))[0].replace("5e-SRD-", "")
+    return f"{ruleset}/{stem}"
+
+
+def _sources(rules_root: str) -> List[str]:
+    return sorted(glob.glob(os.path.join(rules_root, "**", "*.json"), recursive=True))
+
+
+def source_signature(rules_root: str = RULES_ROOT) -> str:
+    """Cheap staleness check: relative path, size and mtime of every rules file."""
+    h = hashlib.sha1()
+    for p in _sources(rules_root):
+        st = os.stat(p)
+        h.update(f"{os.path.relpath(p, rules_root)}:{st.st_size}:{int(st.st_mtime)}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def _record_key(rec: Any, pos: int) -> str:
+    if isinstance(rec, dict):
+        if rec.get("index"):
+            return str(rec["index"])
+        if rec.get("name"):
+            return re.sub(r"[^a-z0-9]+", "-", str(rec["name"]).lower()).strip("-")
+    return f"#{pos}"
+
+
+# -----------------------------
+# Build
+# -----------------------------
+
+def build(rules_root: str = RULES_ROOT, path: str = BUNDLE_PATH) -> Dict[str, Any]:
+    """Compile every rules JSON file into one bundle (written atomically)."""
+    started = time.time()
+    files: Dict[str, Dict[str, Any]] = {}
+    records: List[bytes] = []
+    keys: List[bytes] = []
+    names: List[bytes] = []
+    for src in _sources(rules_root):
+        with open(src, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, list):
+            continue
+        rows = sorted(((_record_key(rec, i), i, rec) for i, rec in enumerate(data)), key=lambda r: (r[0], r[1]))
+        files[file_key(src, rules_root)] = {
+            "path": os.path.relpath(src, rules_root), "first": len(records), "count": len(rows),
+        }
+        for key, _, rec in rows:
+            records.append(json.dumps(rec, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+            keys.append(key.encode("utf-8"))
+            name = rec.get("name") if isinstance(rec, dict) else None
+            names.append(str(name or "").encode("utf-8"))
+
+    n = len(records)
+    header = {
+        "version": FORMAT_VERSION, "built_at": int(started), "source_sig": source_signature(rules_root),
+        "records": n, "files": files, "sections": {},
+    }
+
+    def offsets(blobs: List[bytes], base: int) -> bytes:
+        out, pos = [base], base
+        for b in blobs:
+            pos += len(b)
+            out.append(pos)
+        return struct.pack(f"<{n + 1}Q", *out)
+
+    # Header size depends on the section offsets it records; iterate until it stops moving.
+    head_len = -1
+    while True:
+        raw_header = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        size = len(MAGIC) + 4 + len(raw_header)
+        size += (-size) % 8
+        if size == head_len:
+            break
+        head_len = size
+        table = 8 * (n + 1)
+        rec_at = head_len + 3 * table
+        key_at = rec_at + sum(map(len, records))
+        name_at = key_at + sum(map(len, keys))
+        header["sections"] = {
+            "rec_offsets": head_len, "key_offsets": head_len + table, "name_offsets": head_len + 2 * table,
+            "records": rec_at, "keys": key_at, "names": name_at,
+        }
+    pad = b"\0" * ((-(len(MAGIC) + 4 + len(raw_header))) % 8)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(raw_header)) + raw_header + pad)
+        f.write(offsets(records, rec_at))
+        f.write(offsets(keys, key_at))
+        f.write(offsets(names, name_at))
+        for blob in (records, keys, names):
+            f.writelines(blob)
+    os.replace(tmp, path)
+    return {"path": path, "files": len(files), "records": n, "bytes": os.path.getsize(path), "seconds": round(time.time() - started, 2)}
+
+
+def ensure_built(rules_root: str = RULES_ROOT, path: str = BUNDLE_PATH) -> Optional[Dict[str, Any]]:
+    """Rebuild when missing or when the rules files changed; None when already current."""
+    try:
+        b = SrdBundle(path)
+        try:
+            if b.header.get("source_sig") == source_signature(rules_root):
+                return None
+        finally:
+            b.close()
+    except (OSError, ValueError):
+        pass
+    return build(rules_root, path)
+
+
+# -----------------------------
+# Read
+# -----------------------------
+
+class RecordList(Sequence):
+    """One rules file as a lazy sequence: records are decoded only when indexed/iterated."""
+
+    def __init__(self, bundle: "SrdBundle", first: int, count: int):
+        self._b = bundle
+        self._first = first
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._count))]
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        return self._b.record(self._first + i)
+
+    def __iter__(self) -> Iterator[Any]:
+        for i in range(self._count):
+            yield self._b.record(self._first + i)
+
+    def keys(self) -> List[str]:
+        return [self._b.key(self._first + i) for i in range(self._count)]
+
+    def names(self) -> List[str]:
+        return [self._b.name(self._first + i) for i in range(self._count)]
+
+    def get(self, key: str) -> Optional[Any]:
+        """Record by SRD index (bisect over the sorted key table)."""
+        target = str(key).encode("utf-8")
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._b.raw_key(self._first + mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count and self._b.raw_key(self._first + lo) == target:
+            return self._b.record(self._first + lo)
+        return None
+
+
+class SrdBundle:
+    def __init__(self, path: str = BUNDLE_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        mm = self._mm
+        if mm[:len(MAGIC)] != MAGIC:
+            mm.close()
+            raise ValueError(f"not an SRD bundle: {path}")
+        (hlen,) = struct.unpack_from("<I", mm, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.header: Dict[str, Any] = json.loads(mm[start:start + hlen])
+        if self.header.get("version") != FORMAT_VERSION:
+            mm.close()
+            raise ValueError(f"unsupported SRD bundle version {self.header.get('version')}")
+        n = int(self.header["records"])
+        sec = self.header["sections"]
+        self._view = view = memoryview(mm)
+        # Zero-copy views over the offset tables.
+        self._rec = view[sec["rec_offsets"]:sec["rec_offsets"] + 8 * (n + 1)].cast("Q")
+        self._key = view[sec["key_offsets"]:sec["key_offsets"] + 8 * (n + 1)].cast("Q")
+        self._name = view[sec["name_offsets"]:sec["name_offsets"] + 8 * (n + 1)].cast("Q")
+        self.files: Dict[str, Dict[str, Any]] = self.header["files"]
+
+    def close(self) -> None:
+        for v in (self._rec, self._key, self._name, self._view):
+            v.release()
+        try:
+            self._mm.close()
+        except BufferError:
+            pass  # a caller still holds a view; the map goes away with the process
+
+    def record(self, i: int) -> Any:
+        return json.loads(self._mm[self._rec[i]:self._rec[i + 1]])
+
+    def raw_key(self, i: int) -> bytes:
+        return self._mm[self._key[i]:self._key[i + 1]]
+
+    def key(self, i: int) -> str:
+        return self.raw_key(i).decode("utf-8")
+
+    def name(self, i: int) -> str:
+        return self._mm[self._name[i]:self._name[i + 1]].decode("utf-8")
+
+    def records(self, fkey: str) -> Optional[RecordList]:
+        f = self.files.get(fkey)
+        return RecordList(self, f["first"], f["count"]) if f else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path, "bytes": len(self._mm), "files": len(self.files),
+            "records": self.header["records"], "built_at": self.header.get("built_at"),
+        }
+
+
+_BUNDLE: Optional[SrdBundle] = None
+_BUNDLE_STATE: Optional[Tuple[Optional[float], Optional[str]]] = None  # (bundle mtime, rules source_sig)
+_BUNDLE_CHECKED_AT = float("-inf")
+_BUNDLE_LOCK = threading.Lock()
+
+CHECK_S = float(os.getenv("RQ_SRD_BUNDLE_CHECK_S", "30"))
+
+
+def _open_current(source_sig: Optional[str]) -> Optional[SrdBundle]:
+    try:
+        b = SrdBundle(BUNDLE_PATH)
+    except (OSError, ValueError):
+        return None
+    if source_sig is not None and b.header.get("source_sig") != source_sig:
+        b.close()  # rules changed since the last bootstrap; JSON is the truth
+        return None
+    return b
+
+
+def get_bundle() -> Optional[SrdBundle]:
+    """
+    The process-wide bundle, or None when it is missing / stale (callers read the JSON).
+
+    The bundle mtime and the rules source_sig are re-checked at most every CHECK_S seconds,
+    so a rebuilt bundle is picked up and edited rules stop being served from a stale one.
+    """
+    global _BUNDLE, _BUNDLE_STATE, _BUNDLE_CHECKED_AT
+    if time.monotonic() - _BUNDLE_CHECKED_AT < CHECK_S:
+        return _BUNDLE
+    with _BUNDLE_LOCK:
+        if time.monotonic() - _BUNDLE_CHECKED_AT < CHECK_S:
+            return _BUNDLE
+        try:
+            mtime: Optional[float] = os.path.getmtime(BUNDLE_PATH)
+        except OSError:
+            mtime = None
+        sig = source_signature(RULES_ROOT) if os.path.isdir(RULES_ROOT) else None
+        if (mtime, sig) != _BUNDLE_STATE:
+            # The previous map is left to the GC: RecordLists handed out earlier may still read it.
+            _BUNDLE = _open_current(sig) if mtime is not None else None
+            _BUNDLE_STATE = (mtime, sig)
+        _BUNDLE_CHECKED_AT = time.monotonic()
+    return _BUNDLE
+
+
+def file_keys() -> List[str]:
+    """'<ruleset>/<stem>' for every rules file (from the bundle header, else a directory scan)."""
+    b = get_bundle()
+    if b is not None:
+        return sorted(b.files)
+    return [file_key(p) for p in _sources(RULES_ROOT)]
+
+
+def records(ruleset: str, stem: str) -> Sequence[Any]:
+    """Records of rules/<ruleset>/5e-SRD-<stem>.json: lazy from the bundle, else parsed JSON."""
+    b = get_bundle()
+    if b is not None:
+        found = b.records(f"{ruleset}/{stem}")
+        if found is not None:
+            return found
+    path = os.path.join(RULES_ROOT, ruleset, f"5e-SRD-{stem}.json")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, list) else []
+    except FileNotFoundError:
+        return []
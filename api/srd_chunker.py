@@ -0,0 +1,413 @@
+#===============================================================
+#Script Name: srd_chunker.py
+#Script Location: /opt/RealmQuest/api/srd_chunker.py
+#Date: 10/19/2026
+#Created By: T03KNEE
+#Github: https://github.com/To3Knee/RealmQuest
+#Version: 1.0.0
+#About: Structure-aware chunking of the 5e SRD JSON (rules/2014, rules/2024) for retrieval.
+#       One compact, field-aware document per entity (spell line, monster stat block, item
+#       stats, condition, feature...) with scalar metadata Chroma can filter on:
+#       category, ruleset, name, index, level, school, cr, type, rarity.
+#       Long rule sections are split on their markdown headings.
+#===============================================================
+
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+# Retrieval categories (metadata "category").
+SPELL = "spell"
+MONSTER = "monster"
+ITEM = "item"
+CONDITION = "condition"
+RULE = "rule"
+CLASS = "class"
+FEATURE = "feature"
+RACE = "race"
+FEAT = "feat"
+BACKGROUND = "background"
+REFERENCE = "reference"
+
+CATEGORIES = (SPELL, MONSTER, ITEM, CONDITION, RULE, CLASS, FEATURE, RACE, FEAT, BACKGROUND, REFERENCE)
+
+MAX_SECTION_CHARS = 1500
+
+
+@dataclass
+class Chunk:
+    id: str
+    doc: str
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+
+# -----------------------------
+# Field helpers
+# -----------------------------
+
+def _text(v: Any) -> str:
+    if v is None:
+        return ""
+    if isinstance(v, list):
+        return "\n".join(_text(x) for x in v if x not in (None, ""))
+    if isinstance(v, dict):
+        return str(v.get("name") or v.get("desc") or "")
+    return str(v)
+
+
+def _desc(item: Dict[str, Any]) -> str:
+    return _text(item.get("desc") if item.get("desc") is not None else item.get("description")).strip()
+
+
+def _names(v: Any) -> str:
+    if not v:
+        return ""
+    if isinstance(v, list):
+        return ", ".join(_text(x) for x in v if x)
+    return _text(v)
+
+
+def _slug(s: Any) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", str(s).lower()).strip("-")
+
+
+def _ordinal(n: int) -> str:
+    return {1: "1st", 2: "2nd", 3: "3rd"}.get(n, f"{n}th")
+
+
+def _cr_text(cr: Any) -> str:
+    try:
+        f = float(cr)
+    except (TypeError, ValueError):
+        return str(cr)
+    return {0.125: "1/8", 0.25: "1/4", 0.5: "1/2"}.get(f, str(int(f)) if f.is_integer() else str(f))
+
+
+def _mod(score: Any) -> str:
+    try:
+        m = (int(score) - 10) // 2
+    except (TypeError, ValueError):
+        return ""
+    return f"{'+' if m >= 0 else ''}{m}"
+
+
+def _clean_meta(meta: Dict[str, Any]) -> Dict[str, Any]:
+    """Chroma metadata must be str/int/float/bool; drop empties."""
+    out = {}
+    for k, v in meta.items():
+        if v is None or v == "":
+            continue
+        out[k] = v if isinstance(v, (str, int, float, bool)) else str(v)
+    return out
+
+
+# -----------------------------
+# Per-category formatters: item -> (doc, extra meta)
+# -----------------------------
+
+def _spell(item: Dict[str, Any]):
+    level = int(item.get("level") or 0)
+    school = _text(item.get("school"))
+    head = f"{school} cantrip" if level == 0 else f"{_ordinal(level)}-level {school.lower()}"
+    bits = [b for b in (
+        _text(item.get("casting_time")),
+        _text(item.get("range")),
+        ",".join(item.get("components") or []),
+        ("Concentration, " if item.get("concentration") else "") + _text(item.get("duration")),
+        "ritual" if item.get("ritual") else "",
+    ) if b]
+    lines = [f"{item['name']} ({head}; {'; '.join(bits)})", _desc(item)]
+    if item.get("higher_level"):
+        lines.append("At Higher Levels: " + _text(item["higher_level"]))
+    classes = _names(item.get("classes"))
+    if classes:
+        lines.append(f"Classes: {classes}")
+    return "\n".join(l for l in lines if l), {
+        "level": level, "school": school.lower(), "classes": classes,
+        "concentration": bool(item.get("concentration")), "ritual": bool(item.get("ritual")),
+    }
+
+
+def _monster(item: Dict[str, Any]):
+    ac = item.get("armor_class")
+    if isinstance(ac, list) and ac:
+        ac_txt = ", ".join(
+            f"{a.get('value')}" + (f" ({a.get('type')})" if a.get("type") and a.get("type") != "dex" else "")
+            for a in ac if isinstance(a, dict)
+        )
+    else:
+        ac_txt = _text(ac)
+    speed = ", ".join(f"{k} {v}" for k, v in (item.get("speed") or {}).items())
+    abil = " ".join(
+        f"{k[:3].upper()} {item.get(k)}({_mod(item.get(k))})"
+        for k in ("strength", "dexterity", "constitution", "intelligence", "wisdom", "charisma")
+        if item.get(k) is not None
+    )
+    profs = ", ".join(
+        f"{_text(p.get('proficiency')).replace('Saving Throw: ', 'Save ').replace('Skill: ', '')} +{p.get('value')}"
+        for p in item.get("proficiencies") or [] if isinstance(p, dict)
+    )
+    senses = ", ".join(f"{k.replace('_', ' ')} {v}" for k, v in (item.get("senses") or {}).items())
+    lines = [
+        f"{item['name']} — {item.get('size', '')} {item.get('type', '')}"
+        + (f" ({item['subtype']})" if item.get("subtype") else "") + f", {item.get('alignment', '')}",
+        f"AC {ac_txt}; HP {item.get('hit_points')} ({item.get('hit_points_roll') or item.get('hit_dice')}); Speed {speed}",
+        abil,
+    ]
+    for label, key in (("Vulnerable", "damage_vulnerabilities"), ("Resist", "damage_resistances"),
+                       ("Immune", "damage_immunities"), ("Condition immune", "condition_immunities")):
+        if item.get(key):
+            lines.append(f"{label}: {_names(item[key])}")
+    if profs:
+        lines.append(f"Proficiencies: {profs}")
+    if senses:
+        lines.append(f"Senses: {senses}")
+    if item.get("languages"):
+        lines.append(f"Languages: {item['languages']}")
+    lines.append(f"CR {_cr_text(item.get('challenge_rating'))} ({item.get('xp', '?')} XP)")
+    for label, key in (("Traits", "special_abilities"), ("Actions", "actions"),
+                       ("Reactions", "reactions"), ("Legendary", "legendary_actions")):
+        entries = [a for a in item.get(key) or [] if isinstance(a, dict)]
+        if entries:
+            lines.append(f"{label}: " + " | ".join(f"{a.get('name')}: {_text(a.get('desc'))}" for a in entries))
+    try:
+        cr = float(item.get("challenge_rating"))
+    except (TypeError, ValueError):
+        cr = None
+    return "\n".join(l for l in lines if l), {
+        "cr": cr, "type": str(item.get("type") or "").lower(), "size": item.get("size"),
+        "ac": (ac[0].get("value") if isinstance(ac, list) and ac and isinstance(ac[0], dict) else None),
+        "hp": item.get("hit_points"),
+    }
+
+
+def _cost(c: Any) -> str:
+    return f"{c.get('quantity')} {c.get('unit')}" if isinstance(c, dict) else ""
+
+
+def _equipment(item: Dict[str, Any]):
+    cat = _text(item.get("equipment_category")) or _names(item.get("equipment_categories"))
+    bits = [cat]
+    if item.get("category_range"):
+        bits.append(item["category_range"])
+    dmg = item.get("damage")
+    if isinstance(dmg, dict):
+        bits.append(f"{dmg.get('damage_dice')} {_text(dmg.get('damage_type')).lower()}")
+    if isinstance(item.get("two_handed_damage"), dict):
+        bits.append(f"versatile {item['two_handed_damage'].get('damage_dice')}")
+    ac = item.get("armor_class")
+    if isinstance(ac, dict):
+        dex = "" if not ac.get("dex_bonus") else (" + Dex" + (f" (max {ac['max_bonus']})" if ac.get("max_bonus") else ""))
+        bits.append(f"AC {ac.get('base')}{dex}")
+    if item.get("str_minimum"):
+        bits.append(f"Str {item['str_minimum']}")
+    if item.get("stealth_disadvantage"):
+        bits.append("stealth disadvantage")
+    rng = item.get("range")
+    if isinstance(rng, dict) and rng.get("long"):
+        bits.append(f"range {rng.get('normal')}/{rng.get('long')}")
+    if item.get("properties"):
+        bits.append(_names(item["properties"]))
+    if item.get("mastery"):
+        bits.append(f"mastery {_text(item['mastery'])}")
+    if item.get("cost"):
+        bits.append(_cost(item["cost"]))
+    if item.get("weight"):
+        bits.append(f"{item['weight']} lb")
+    doc = f"{item['name']} ({'; '.join(b for b in bits if b)})"
+    d = _desc(item)
+    return (doc + ("\n" + d if d else "")), {"equipment_category": cat.lower()}
+
+
+def _magic_item(item: Dict[str, Any]):
+    rarity = _text(item.get("rarity"))
+    cat = _text(item.get("equipment_category"))
+    return f"{item['name']} ({cat}, {rarity.lower()})\n{_desc(item)}", {"rarity": rarity.lower(), "equipment_category": cat.lower()}
+
+
+def _level(item: Dict[str, Any]):
+    cls = _text(item.get("class"))
+    sub = _text(item.get("subclass"))
+    who = f"{cls} ({sub})" if sub else cls
+    parts = []
+    if item.get("prof_bonus"):
+        parts.append(f"proficiency +{item['prof_bonus']}")
+    if item.get("features"):
+        parts.append(f"features: {_names(item['features'])}")
+    if item.get("ability_score_bonuses"):
+        parts.append(f"ASIs so far: {item['ability_score_bonuses']}")
+    for key in ("class_specific", "subclass_specific"):
+        spec = item.get(key)
+        if isinstance(spec, dict) and spec:
+            parts.append(", ".join(f"{k.replace('_', ' ')} {v}" for k, v in spec.items() if not isinstance(v, (list, dict))))
+    sc = item.get("spellcasting")
+    if isinstance(sc, dict) and sc:
+        slots = ", ".join(f"{k.replace('spell_slots_level_', 'L')}:{v}" for k, v in sc.items() if v and k.startswith("spell_slots"))
+        known = ", ".join(f"{k.replace('_', ' ')} {v}" for k, v in sc.items() if v and not k.startswith("spell_slots"))
+        parts.append("; ".join(p for p in (known, f"slots {slots}" if slots else "") if p))
+    return f"{who} level {item.get('level')}: " + "; ".join(p for p in parts if p), {
+        "name": f"{who} {item.get('level')}", "level": item.get("level"), "class": cls.lower(),
+    }
+
+
+def _class(item: Dict[str, Any]):
+    lines = [f"{item['name']} (hit die d{item.get('hit_die')})"]
+    if item.get("saving_throws"):
+        lines.append(f"Saving throws: {_names(item['saving_throws'])}")
+    if item.get("proficiencies"):
+        lines.append(f"Proficiencies: {_names(item['proficiencies'])}")
+    if item.get("subclasses"):
+        lines.append(f"Subclasses: {_names(item['subclasses'])}")
+    sc = item.get("spellcasting")
+    if isinstance(sc, dict) and sc.get("spellcasting_ability"):
+        lines.append(f"Spellcasting ability: {_text(sc['spellcasting_ability'])}")
+    return "\n".join(lines), {}
+
+
+def _feature(item: Dict[str, Any]):
+    owner = _text(item.get("class")) or _names(item.get("races"))
+    lvl = item.get("level")
+    head = f"{item['name']}" + (f" ({owner}" + (f" {lvl}" if lvl else "") + ")" if owner else "")
+    return f"{head}\n{_desc(item)}", {"level": lvl, "class": owner.lower()}
+
+
+def _race(item: Dict[str, Any]):
+    bonuses = ", ".join(f"{_text(b.get('ability_score'))} +{b.get('bonus')}" for b in item.get("ability_bonuses") or [] if isinstance(b, dict))
+    lines = [f"{item['name']} (speed {item.get('speed', '?')}, {item.get('size', '')})"]
+    if bonuses:
+        lines.append(f"Ability bonuses: {bonuses}")
+    for key in ("traits", "racial_traits"):
+        if item.get(key):
+            lines.append(f"Traits: {_names(item[key])}")
+    for key in ("age", "alignment", "size_description", "language_desc", "desc"):
+        if item.get(key):
+            lines.append(_text(item[key]))
+    return "\n".join(lines), {}
+
+
+def _background(item: Dict[str, Any]):
+    lines = [item["name"]]
+    if item.get("starting_proficiencies") or item.get("proficiencies"):
+        lines.append(f"Proficiencies: {_names(item.get('starting_proficiencies') or item.get('proficiencies'))}")
+    if item.get("feat"):
+        lines.append(f"Feat: {_text(item['feat'])}")
+    feat = item.get("feature")
+    if isinstance(feat, dict):
+        lines.append(f"Feature — {feat.get('name')}: {_text(feat.get('desc'))}")
+    d = _desc(item)
+    if d:
+        lines.append(d)
+    return "\n".join(lines), {}
+
+
+def _generic(item: Dict[str, Any]):
+    d = _desc(item)
+    return (f"{item['name']}: {d}" if d else ""), {}
+
+
+# file stem (minus "5e-SRD-") -> (category, formatter)
+_FORMATTERS: Dict[str, tuple] = {
+    "Spells": (SPELL, _spell),
+    "Monsters": (MONSTER, _monster),
+    "Equipment": (ITEM, _equipment),
+    "Magic-Items": (ITEM, _magic_item),
+    "Conditions": (CONDITION, _generic),
+    "Rule-Sections": (RULE, _generic),
+    "Rules": (RULE, _generic),
+    "Classes": (CLASS, _class),
+    "Levels": (CLASS, _level),
+    "Subclasses": (CLASS, _feature),
+    "Features": (FEATURE, _feature),
+    "Traits": (FEATURE, _feature),
+    "Races": (RACE, _race),
+    "Subraces": (RACE, _race),
+    "Feats": (FEAT, _feature),
+    "Backgrounds": (BACKGROUND, _background),
+}
+
+# Pure cross-reference tables (lists of links, no prose) are not worth embedding.
+SKIP_STEMS = {"Equipment-Categories", "Proficiencies"}
+
+
+def category_for(filename: str) -> Optional[str]:
+    stem = os.path.splitext(os.path.basename(filename))[0].replace("5e-SRD-", "")
+    if stem in SKIP_STEMS:
+        return None
+    return _FORMATTERS.get(stem, (REFERENCE, _generic))[0]
+
+
+def _split_sections(text: str, limit: int = MAX_SECTION_CHARS) -> List[str]:
+    """Split long markdown on headings, then pack paragraphs up to `limit` chars."""
+    parts = [p for p in re.split(r"(?m)^(?=#{2,6}\s)", text) if p.strip()]
+    out: List[str] = []
+    for part in parts:
+        if len(part) <= limit:
+            out.append(part.strip())
+            continue
+        heading = part.splitlines()[0] if part.startswith("#") else ""
+        buf = ""
+        for para in re.split(r"\n\s*\n", part):
+            if buf and len(buf) + len(para) > limit:
+                out.append(buf.strip())
+                buf = (heading + "\n") if heading and not para.startswith("#") else ""
+            buf += para + "\n\n"
+        if buf.strip():
+            out.append(buf.strip())
+    return out
+
+
+def chunk_items(ruleset: str, filename: str, data: Any) -> List[Chunk]:
+    """Chunks for one SRD file. Ids: <ruleset>:<stem>:<index>[#n]."""
+    stem_full = os.path.splitext(os.path.basename(filename))[0]
+    stem = stem_full.replace("5e-SRD-", "")
+    if stem in SKIP_STEMS or not isinstance(data, list):
+        return []
+    category, fmt = _FORMATTERS.get(stem, (REFERENCE, _generic))
+    year = int(ruleset) if str(ruleset).isdigit() else None
+    out: List[Chunk] = []
+    seen = set()
+    for item in data:
+        if not isinstance(item, dict) or not (item.get("name") or item.get("index")):
+            continue
+        item = dict(item)
+        item.setdefault("name", item.get("index"))
+        try:
+            doc, extra = fmt(item)
+        except Exception:
+            doc, extra = _generic(item)
+        if not doc.strip():
+            continue
+        index = item.get("index") or _slug(item["name"])
+        base = f"{ruleset}:{stem_full}:{index}"
+        if base in seen:
+            continue
+        seen.add(base)
+        meta = _clean_meta({
+            "source": "SRD", "file": os.path.basename(filename), "ruleset": str(ruleset),
+            "year": year, "category": category, "name": str(item["name"]), "index": index, **extra,
+        })
+        pieces = _split_sections(doc) if category == RULE and len(doc) > MAX_SECTION_CHARS else [doc]
+        for n, piece in enumerate(pieces):
+            cid = base if len(pieces) == 1 else f"{base}#{n}"
+            if n and not piece.lstrip().startswith(item["name"]):
+                piece = f"{item['name']} (cont.)\n{piece}"
+            out.append(Chunk(cid, piece, dict(meta, part=n) if len(pieces) > 1 else meta))
+    return out
+
+
+# Cheap intent hints for callers that want to narrow retrieval.
+_HINTS = (
+    (SPELL, re.compile(r"\b(spell|cast|cantrip|slot|concentration|ritual)\b", re.I)),
+    (MONSTER, re.compile(r"\b(monster|creature|beast|stat ?block|\bcr\b|challenge rating)\b", re.I)),
+    (CONDITION, re.compile(r"\b(condition|blinded|charmed|deafened|frightened|grappled|incapacitated|invisible|paralyzed|petrified|poisoned|prone|restrained|stunned|unconscious|exhaustion)\b", re.I)),
+    (ITEM, re.compile(r"\b(weapon|armor|armour|shield|potion|item|gear|cost|weight)\b", re.I)),
+)
+
+
+def guess_categories(text: str) -> Optional[List[str]]:
+    """Categories suggested by keywords in a player utterance, or None (no filter)."""
+    hits = [cat for cat, rx in _HINTS if rx.search(text or "")]
+    return hits + [RULE] if hits else None
@@ -0,0 +1,268 @@
+#===============================================================
+#Script Name: srd_lookup.py
+#Script Location: /opt/RealmQuest/api/srd_lookup.py
+#Date: 10/19/2026
+#Created By: T03KNEE
+#Github: https://github.com/To3Knee/RealmQuest
+#Version: 1.0.1
+#About: In-process SRD entity lookup ahead of vector search.
+#       - Name/alias dictionary over the SRD (spells, monsters, items, conditions, classes,
+#         features, races, feats, backgrounds), built once per process from the SRD bundle's
+#         name tables (or the JSON files); records are decoded only when an entity is hit.
+#       - Aho-Corasick automaton over the aliases finds every entity named in an utterance
+#         in one pass ("what does Fireball do", "goblin AC", "cast hold person on the ogres").
+#       - Hits return the same compact documents the Chroma ingest embeds (srd_chunker), so the
+#         prompt gets the exact entry; callers fall back to Chroma only when nothing matches.
+#===============================================================
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import srd_bundle
+from srd_chunker import (
+    BACKGROUND, CLASS, CONDITION, FEAT, FEATURE, ITEM, MONSTER, RACE, SPELL, category_for, chunk_items,
+)
+
+
+PREFERRED_RULESET = os.getenv("RQ_SRD_RULESET", "2014")
+MAX_ENTRIES = int(os.getenv("RQ_SRD_LOOKUP_MAX", "3"))
+
+LOOKUP_CATEGORIES = {SPELL, MONSTER, ITEM, CONDITION, CLASS, FEATURE, RACE, FEAT, BACKGROUND}
+
+# Single-word SRD names that are also ordinary English. In lower case they only count when the
+# utterance also carries a matching hint (guessed category) — "the light fades" is not the spell.
+COMMON_WORDS = frozenset("""
+    acolyte aid alert ape archery bandit barrel basket bat bell blanket bless boar book brave bucket
+    camel candle cart cat chain champion chariot chest combat command commoner confusion costume
+    cover crab creation criminal crystal darkness daylight deer defense devotion dice dream drum
+    eagle elephant elusive emblem evasion expertise fear fiend flask fly frenzy frog gate ghost goat
+    guard hammer harm hawk heal horn human hunter indomitable ink jug jump knight knock ladder land
+    life light lion lock lore lucky mage map menacing message mimic mirror mule net nightmare noble
+    oil orb owl paper pole pony pouch priest rage rat rest retaliation rod rope sack sage scout
+    seeming sending shadow shield silence skeleton skilled sled sleep slow soldier spy staff string
+    survivor symbol tent thief tiger time tinker torch totem trance tranquility vanish veteran vial
+    wagon wand web weird wish wolf
+""".split())
+
+_NORM_RX = re.compile(r"[^a-z0-9'/+-]+")
+# Possessive 's and any apostrophe that is not inside a word (quotes, plural possessives).
+_APOS_RX = re.compile(r"'s(?![a-z0-9])|(?<![a-z0-9])'|'(?![a-z0-9])")
+
+
+def normalize(text: str) -> str:
+    """Lowercase, punctuation -> single spaces; aliases and utterances share this form.
+
+    "goblin's" -> "goblin" so possessives still end on a word boundary.
+    """
+    s = _APOS_RX.sub(" ", str(text or "").lower().replace("’", "'"))
+    return " ".join(_NORM_RX.sub(" ", s).split())
+
+
+@dataclass(eq=False)
+class Entity:
+    key: str            # "<ruleset>:<category>:<index>"
+    name: str
+    category: str
+    ruleset: str
+    source: Any = field(default=None, repr=False)   # (records, position, file stem)
+    _doc: Optional[str] = field(default=None, repr=False)
+
+    @property
+    def doc(self) -> str:
+        """The srd_chunker document for this entity, built from its record on first use."""
+        if self._doc is None:
+            recs, pos, stem = self.source
+            chunks = chunk_items(self.ruleset, f"5e-SRD-{stem}.json", [recs[pos]])
+            self._doc = chunks[0].doc if chunks else self.name
+        return self._doc
+
+
+# -----------------------------
+# Aho-Corasick
+# -----------------------------
+
+class Automaton:
+    """Multi-pattern matcher over characters; patterns are matched on whole-word boundaries."""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[str]] = [[]]
+
+    def add(self, pattern: str) -> None:
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(pattern)
+
+    def build(self) -> "Automaton":
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+        return self
+
+    def iter(self, text: str):
+        """(start, end, pattern) for every whole-word occurrence in `text`."""
+        node = 0
+        goto, fail, out = self._goto, self._fail, self._out
+        n = len(text)
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node] and (i + 1 == n or text[i + 1] == " "):
+                for pat in out[node]:
+                    start = i + 1 - len(pat)
+                    if start == 0 or text[start - 1] == " ":
+                        yield start, i + 1, pat
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+
+# -----------------------------
+# Index
+# -----------------------------
+
+def _aliases(name: str, index: str, category: str) -> List[str]:
+    base = normalize(re.sub(r"\s*\(.*?\)\s*", " ", name))
+    out = {normalize(name), base, normalize(index.replace("-", " "))}
+    for a in list(out):
+        if "/" in a:
+            out.update(p.strip() for p in a.split("/"))  # "Enlarge/Reduce" -> "enlarge", "reduce"
+    if category == MONSTER and base:
+        out.add(base[:-1] + "ves" if base.endswith("f") else base + ("es" if base.endswith(("s", "x", "ch", "sh")) else "s"))
+    return [a for a in out if len(a) >= 3]
+
+
+class SrdIndex:
+    def __init__(self, preferred: str = PREFERRED_RULESET):
+        started = time.perf_counter()
+        self.preferred = preferred
+        self.entities: Dict[str, Entity] = {}
+        self.aliases: Dict[str, List[str]] = {}
+        for fkey in srd_bundle.file_keys():
+            ruleset, stem = fkey.rsplit("/", 1)
+            category = category_for(f"{stem}.json")
+            if category not in LOOKUP_CATEGORIES or stem == "Levels":
+                continue  # per-level tables are not entities anyone names
+            try:
+                recs = srd_bundle.records(ruleset, stem)
+            except Exception:
+                continue
+            # Bundle: names/keys come from its string tables; records are decoded on a hit only.
+            if isinstance(recs, srd_bundle.RecordList):
+                rows = zip(recs.keys(), recs.names())
+            else:
+                rows = ((r.get("index") or "", r.get("name") or "") if isinstance(r, dict) else ("", "") for r in recs)
+            for pos, (index, name) in enumerate(rows):
+                if not index or index.startswith("#"):
+                    continue
+                self._add(Entity(f"{ruleset}:{category}:{index}", name or index, category, ruleset, source=(recs, pos, stem)), index)
+        self.matcher = Automaton()
+        for alias in self.aliases:
+            self.matcher.add(alias)
+        self.matcher.build()
+        self.load_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    def _add(self, entity: "Entity", index: str) -> None:
+        if entity.key in self.entities:
+            return
+        self.entities[entity.key] = entity
+        for alias in _aliases(entity.name, index, entity.category):
+            self.aliases.setdefault(alias, []).append(entity.key)
+
+    def get(self, name: str, category: Optional[str] = None) -> List[Entity]:
+        """Exact name/alias lookup (preferred ruleset first)."""
+        keys = self.aliases.get(normalize(name), [])
+        hits = [self.entities[k] for k in keys if category is None or self.entities[k].category == category]
+        return self._rank(hits)
+
+    def _rank(self, hits: List[Entity]) -> List[Entity]:
+        # One entry per (category, name): the preferred ruleset shadows the other edition.
+        hits = sorted(hits, key=lambda e: e.ruleset != self.preferred)
+        seen, out = set(), []
+        for e in hits:
+            k = (e.category, e.name.lower())
+            if k not in seen:
+                seen.add(k)
+                out.append(e)
+        return out
+
+    def scan(self, text: str, hints: Optional[List[str]] = None) -> List[Tuple[str, List[Entity]]]:
+        """Entities named in `text`: leftmost-longest, non-overlapping matches in reading order."""
+        norm = normalize(text)
+        raw = str(text or "")
+        spans = sorted(self.matcher.iter(norm), key=lambda m: (m[0], -(m[1] - m[0])))
+        out, taken_to = [], -1
+        for start, end, alias in spans:
+            if start < taken_to:
+                continue
+            hits = self._rank([self.entities[k] for k in self.aliases[alias]])
+            if alias in COMMON_WORDS:
+                named = re.search(rf"(?<![A-Za-z]){re.escape(alias.capitalize())}(?![A-Za-z])", raw[1:]) is not None
+                hits = hits if named else [e for e in hits if hints and e.category in hints]
+            if hits:
+                out.append((alias, hits))
+                taken_to = end
+        return out
+
+    def lookup(self, text: str, hints: Optional[List[str]] = None, limit: int = MAX_ENTRIES) -> List[Entity]:
+        found: List[Entity] = []
+        for _, hits in self.scan(text, hints):
+            if hints:
+                hits = sorted(hits, key=lambda e: e.category not in hints)
+            for e in hits[:2]:
+                if e not in found:
+                    found.append(e)
+        return found[:limit]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entities": len(self.entities), "aliases": len(self.aliases), "nodes": len(self.matcher), "load_ms": self.load_ms}
+
+
+_INDEX: Optional[SrdIndex] = None
+_INDEX_LOCK = threading.Lock()
+
+
+def get_index() -> SrdIndex:
+    global _INDEX
+    if _INDEX is None:
+        with _INDEX_LOCK:
+            if _INDEX is None:
+                _INDEX = SrdIndex()
+    return _INDEX
+
+
+def warm() -> None:
+    """Build the index on a background thread so the first chat turn doesn't pay for it."""
+    threading.Thread(target=get_index, name="rq-srd-index", daemon=True).start()
+
+
+def lookup(text: str, hints: Optional[List[str]] = None, limit: int = MAX_ENTRIES) -> List[Entity]:
+    """Precise SRD entries for entities named in `text` ([] when none: use vector search)."""
+    try:
+        return get_index().lookup(text, hints, limit)
+    except Exception:
+        return []
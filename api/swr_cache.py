@@ -0,0 +1,147 @@
+#===============================================================
+#Script Name: swr_cache.py
+#Script Location: /opt/RealmQuest/api/swr_cache.py
+#Date: 10/19/2026
+#Created By: T03KNEE
+#Github: https://github.com/To3Knee/RealmQuest
+#Version: 1.1.0
+#About: Stale-while-revalidate cache for slow external catalogs (ElevenLabs voices, Kenku tracks).
+#       - Fresh (age < ttl): served from memory.
+#       - Stale (ttl <= age < max_stale): served from memory; one background refresh is started.
+#       - Cold / expired: the first caller loads, concurrent callers for the same key wait on it.
+#       - Loader failures keep the last known good value (flagged stale) instead of surfacing.
+#       - refresh() marks an entry stale and reloads it in the background (source changed, but
+#         the old value is still usable); invalidate() forces the next caller to load inline.
+#       Thread-based so sync endpoints (Starlette threadpool) can use it directly.
+#===============================================================
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+logger = logging.getLogger("api")
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Entry:
+    value: Any = None
+    loaded_at: float = 0.0
+    has_value: bool = False
+    error: Optional[str] = None
+    error_at: float = 0.0
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class SWRCache(Generic[T]):
+    def __init__(self, name: str, ttl: float, max_stale: float, load_timeout: float = 10.0, error_backoff: float = 15.0):
+        self.name = name
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.load_timeout = load_timeout
+        self.error_backoff = error_backoff
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, _Entry] = {}
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.stats = {"hits": 0, "stale": 0, "loads": 0, "errors": 0}
+
+    def _run_load(self, key: Hashable, loader: Callable[[], T], flight: _Flight) -> None:
+        try:
+            value = loader()
+            with self._lock:
+                e = self._entries.setdefault(key, _Entry())
+                e.value, e.loaded_at, e.has_value, e.error = value, time.monotonic(), True, None
+                self.stats["loads"] += 1
+        except Exception as ex:
+            with self._lock:
+                e = self._entries.setdefault(key, _Entry())
+                e.error, e.error_at = str(ex), time.monotonic()
+                self.stats["errors"] += 1
+            logger.warning(f"⚠️ {self.name} refresh failed ({key}): {ex}")
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _start(self, key: Hashable, loader: Callable[[], T], background: bool) -> _Flight:
+        """Single-flight: at most one load per key at a time. Caller holds no lock."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight
+            flight = _Flight()
+            self._flights[key] = flight
+        if background:
+            threading.Thread(target=self._run_load, args=(key, loader, flight), name=f"swr-{self.name}", daemon=True).start()
+        else:
+            self._run_load(key, loader, flight)
+        return flight
+
+    def get(self, key: Hashable, loader: Callable[[], T], default: Optional[T] = None) -> T:
+        now = time.monotonic()
+        with self._lock:
+            e = self._entries.get(key)
+            age = now - e.loaded_at if e is not None and e.has_value else None
+            backing_off = e is not None and e.error is not None and now - e.error_at < self.error_backoff
+
+        if age is not None and age < self.ttl:
+            self.stats["hits"] += 1
+            return e.value
+        if age is not None and (age < self.max_stale or backing_off):
+            self.stats["stale"] += 1
+            if not backing_off:
+                self._start(key, loader, background=True)
+            return e.value
+
+        if backing_off and age is None:
+            return default  # upstream just failed with nothing cached; don't hammer it
+        flight = self._start(key, loader, background=False)
+        flight.done.wait(self.load_timeout)
+        with self._lock:
+            e = self._entries.get(key)
+            if e is not None and e.has_value:
+                return e.value  # fresh, or last known good after a failed reload
+        return default
+
+    def warm(self, key: Hashable, loader: Callable[[], T]) -> None:
+        """Start a background load so the first real request is served from memory."""
+        self._start(key, loader, background=True)
+
+    def peek(self, key: Hashable) -> Dict[str, Any]:
+        with self._lock:
+            e = self._entries.get(key)
+            if e is None:
+                return {"cached": False}
+            expired = e.loaded_at == float("-inf")
+            return {
+                "cached": e.has_value,
+                "age_s": round(time.monotonic() - e.loaded_at, 1) if e.has_value and not expired else None,
+                "stale": (time.monotonic() - e.loaded_at) >= self.ttl if e.has_value else None,
+                "error": e.error,
+            }
+
+    def refresh(self, key: Hashable, loader: Callable[[], T]) -> None:
+        """Mark stale without expiring and reload in the background; callers keep the old value."""
+        with self._lock:
+            e = self._entries.get(key)
+            if e is not None and e.has_value:
+                e.loaded_at = min(e.loaded_at, time.monotonic() - self.ttl)
+                e.error = None
+        self._start(key, loader, background=True)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Expire (not drop) entries: the next get reloads, but a failed reload still has the old value."""
+        with self._lock:
+            for k, e in self._entries.items():
+                if key is None or k == key:
+                    e.loaded_at = float("-inf")
+                    e.error = None
@@ -0,0 +1,206 @@
+#===============================================================
+#Script Name: uploads.py
+#Script Location: /opt/RealmQuest/api/uploads.py
+#Date: 10/19/2026
+#Created By: T03KNEE
+#Github: https://github.com/To3Knee/RealmQuest
+#Version: 1.0.1
+#About: Shared upload pipeline for avatars, NPC portraits and gallery images.
+#       - UploadLimitMiddleware enforces the size cap on the raw request: Starlette parses and
+#         spools the whole multipart body before a handler runs, so the cap has to apply there
+#         (413 on Content-Length up front; chunked bodies are cut off once they pass it).
+#       - receive_image copies the spooled UploadFile in fixed chunks to a temp file next to the
+#         destination (same filesystem, for the rename), hashing on the fly (SHA-256, for dedupe)
+#         and sniffing the image type from the first bytes; commit_upload renames it into place.
+#===============================================================
+
+from __future__ import annotations
+
+import hashlib
+import os
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Union
+
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+
+
+MAX_UPLOAD_BYTES = int(float(os.getenv("RQ_MAX_UPLOAD_MB", "15")) * 1024 * 1024)
+# Multipart framing + small form fields on top of the file itself.
+FORM_OVERHEAD_BYTES = 64 * 1024
+CHUNK_BYTES = 256 * 1024
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".webp")
+KIND_EXT = {"png": ".png", "jpeg": ".jpg", "webp": ".webp"}
+EXT_KIND = {".png": "png", ".jpg": "jpeg", ".jpeg": "jpeg", ".webp": "webp"}
+
+_SNIFF_BYTES = 12
+
+
+def sniff_image(head: bytes) -> Optional[str]:
+    """Image kind from magic bytes: 'png' | 'jpeg' | 'webp' | None."""
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if len(head) >= 12 and head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+@dataclass
+class ReceivedUpload:
+    tmp_path: Path
+    size: int
+    sha256: str
+    kind: str
+
+    @property
+    def ext(self) -> str:
+        return KIND_EXT[self.kind]
+
+    def matches_ext(self, ext: str) -> bool:
+        return EXT_KIND.get(str(ext or "").lower()) == self.kind
+
+
+def _unlink(p: Path) -> None:
+    try:
+        p.unlink()
+    except FileNotFoundError:
+        pass
+    except Exception:
+        pass
+
+
+def _too_large(limit: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"upload exceeds {limit / (1024 * 1024):.1f} MB limit")
+
+
+class UploadLimitMiddleware:
+    """Caps multipart request bodies before the form parser spools them to disk."""
+
+    def __init__(self, app, max_bytes: int = MAX_UPLOAD_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.limit = max_bytes + FORM_OVERHEAD_BYTES
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = dict(scope.get("headers") or [])
+        if not headers.get(b"content-type", b"").lower().startswith(b"multipart/"):
+            return await self.app(scope, receive, send)
+
+        length = headers.get(b"content-length")
+        if length is not None:
+            try:
+                declared = int(length)
+            except ValueError:
+                declared = -1
+            if declared < 0 or declared > self.limit:
+                err = _too_large(self.max_bytes) if declared >= 0 else HTTPException(status_code=400, detail="invalid Content-Length")
+                response = JSONResponse({"detail": err.detail}, status_code=err.status_code)
+                return await response(scope, receive, send)
+
+        seen = 0
+
+        async def limited_receive():
+            nonlocal seen
+            message = await receive()
+            if message["type"] == "http.request":
+                seen += len(message.get("body", b""))
+                if seen > self.limit:
+                    # Raised inside request.form(); FastAPI re-raises HTTPException as-is.
+                    raise _too_large(self.max_bytes)
+            return message
+
+        return await self.app(scope, limited_receive, send)
+
+
+async def receive_image(file: UploadFile, target_dir: Union[str, Path], max_bytes: int = MAX_UPLOAD_BYTES) -> ReceivedUpload:
+    """Copy a (middleware-capped, already spooled) image upload into a temp file in target_dir.
+
+    Raises 400 (empty / unreadable), 413 (over max_bytes) or 415 (not png/jpeg/webp).
+    The caller must commit_upload() or discard() the result.
+    """
+    target_dir = Path(target_dir)
+    await run_in_threadpool(target_dir.mkdir, parents=True, exist_ok=True)
+    tmp = target_dir / f".upload-{uuid.uuid4().hex}.tmp"
+
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+    kind: Optional[str] = None
+    fh = await run_in_threadpool(open, tmp, "wb")
+    try:
+        while True:
+            try:
+                chunk = await file.read(CHUNK_BYTES)
+            except Exception as e:
+                raise HTTPException(status_code=400, detail=f"failed to read upload: {e}")
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise _too_large(max_bytes)
+            if kind is None:
+                head = (head + chunk)[:_SNIFF_BYTES]
+                if len(head) >= _SNIFF_BYTES:
+                    kind = sniff_image(head)
+                    if kind is None:
+                        raise HTTPException(status_code=415, detail="only png/jpg/jpeg/webp images allowed")
+            digest.update(chunk)
+            await run_in_threadpool(fh.write, chunk)
+        await run_in_threadpool(fh.close)
+
+        if size == 0:
+            raise HTTPException(status_code=400, detail="empty upload")
+        if kind is None:
+            kind = sniff_image(head)
+            if kind is None:
+                raise HTTPException(status_code=415, detail="only png/jpg/jpeg/webp images allowed")
+    except BaseException:
+        try:
+            fh.close()
+        except Exception:
+            pass
+        _unlink(tmp)
+        raise
+
+    return ReceivedUpload(tmp_path=tmp, size=size, sha256=digest.hexdigest(), kind=kind)
+
+
+def _file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_BYTES), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _commit(upload: ReceivedUpload, dst: Path) -> bool:
+    try:
+        if dst.is_file() and dst.stat().st_size == upload.size and _file_sha256(dst) == upload.sha256:
+            # Identical bytes already in place: keep the file (and its mtime / caches) as-is.
+            _unlink(upload.tmp_path)
+            return False
+    except Exception:
+        pass
+    os.replace(upload.tmp_path, dst)
+    return True
+
+
+async def commit_upload(upload: ReceivedUpload, dst: Union[str, Path]) -> bool:
+    """Atomically move the upload to dst. Returns False when dst already held identical bytes."""
+    try:
+        return await run_in_threadpool(_commit, upload, Path(dst))
+    except Exception as e:
+        _unlink(upload.tmp_path)
+        raise HTTPException(status_code=500, detail=f"failed to write upload: {e}")
+
+
+def discard(upload: ReceivedUpload) -> None:
+    _unlink(upload.tmp_path)
@@ -0,0 +1,168 @@
+#===============================================================
+#Script Name: vector_index.py
+#Script Location: /opt/RealmQuest/api/vector_index.py
+#Date: 10/19/2026
+#Created By: T03KNEE
+#Github: https://github.com/To3Knee/RealmQuest
+#Version: 1.0.0
+#About: Embedded NumPy vector index used when Chroma is unreachable.
+#       bootstrap exports each RAG collection's embeddings to RQ_VECTOR_DIR
+#       (default /app/data/cache/vectors):
+#         <collection>.npy        float32 [N, dim], rows L2-normalised
+#         <collection>.meta.json  {"collection", "dim", "count", "provider", "built_at",
+#                                  "ids": [...], "documents": [...], "metadatas": [...]}
+#       The matrix is memory-mapped; a query (or a batch of queries) is one matrix product
+#       plus argpartition top-k, with metadata filters applied as a row mask.
+#===============================================================
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("api")
+
+VECTOR_DIR = os.getenv("RQ_VECTOR_DIR", "/app/data/cache/vectors")
+EXPORT_PAGE = 1000
+
+
+def _paths(name: str, root: str = VECTOR_DIR) -> Tuple[str, str]:
+    return os.path.join(root, f"{name}.npy"), os.path.join(root, f"{name}.meta.json")
+
+
+def _normalise(m: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (m / norms).astype(np.float32, copy=False)
+
+
+# -----------------------------
+# Export (bootstrap)
+# -----------------------------
+
+def export_collection(collection: Any, name: str, provider: str = "", root: str = VECTOR_DIR) -> Dict[str, Any]:
+    """Snapshot one Chroma collection's embeddings + documents (files replaced atomically)."""
+    ids: List[str] = []
+    docs: List[str] = []
+    metas: List[Dict[str, Any]] = []
+    rows: List[np.ndarray] = []
+    offset = 0
+    while True:
+        page = collection.get(include=["embeddings", "documents", "metadatas"], limit=EXPORT_PAGE, offset=offset)
+        got = page.get("ids") or []
+        embs = page.get("embeddings")
+        if got:
+            rows.append(np.asarray(embs, dtype=np.float32))
+            ids.extend(got)
+            docs.extend(d or "" for d in (page.get("documents") or [""] * len(got)))
+            metas.extend(m or {} for m in (page.get("metadatas") or [{}] * len(got)))
+        if len(got) < EXPORT_PAGE:
+            break
+        offset += EXPORT_PAGE
+    if not ids:
+        return {"collection": name, "count": 0}
+
+    matrix = _normalise(np.vstack(rows))
+    os.makedirs(root, exist_ok=True)
+    npy, meta = _paths(name, root)
+    tag = f".{os.getpid()}.tmp"
+    with open(npy + tag, "wb") as f:
+        np.save(f, matrix)
+    with open(meta + tag, "w", encoding="utf-8") as f:
+        json.dump({
+            "collection": name, "dim": int(matrix.shape[1]), "count": len(ids), "provider": provider,
+            "built_at": int(time.time()), "ids": ids, "documents": docs, "metadatas": metas,
+        }, f, ensure_ascii=False, separators=(",", ":"))
+    # Sidecar first: a reader that sees the new matrix must also see its rows' ids.
+    os.replace(meta + tag, meta)
+    os.replace(npy + tag, npy)
+    return {"collection": name, "count": len(ids), "dim": int(matrix.shape[1])}
+
+
+# -----------------------------
+# Query
+# -----------------------------
+
+class VectorIndex:
+    def __init__(self, name: str, root: str = VECTOR_DIR):
+        npy, meta = _paths(name, root)
+        with open(meta, "r", encoding="utf-8") as f:
+            side = json.load(f)
+        self.name = name
+        self.matrix = np.load(npy, mmap_mode="r")
+        if self.matrix.shape[0] != side["count"]:
+            raise ValueError(f"{name}: matrix/sidecar mismatch ({self.matrix.shape[0]} vs {side['count']})")
+        self.provider: str = side.get("provider") or ""
+        self.built_at = side.get("built_at")
+        self.ids: List[str] = side["ids"]
+        self.documents: List[str] = side["documents"]
+        self.metadatas: List[Dict[str, Any]] = side["metadatas"]
+        self._masks: Dict[Tuple[str, Tuple[str, ...]], np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _mask(self, where: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Supports the filters retrieval uses: {field: value} and {field: {"$in": [...]}}."""
+        if not where:
+            return None
+        mask = np.ones(len(self.ids), dtype=bool)
+        for field, cond in where.items():
+            values = tuple(sorted(map(str, cond["$in"]))) if isinstance(cond, dict) else (str(cond),)
+            key = (field, values)
+            m = self._masks.get(key)
+            if m is None:
+                allowed = set(values)
+                m = np.fromiter((str(md.get(field)) in allowed for md in self.metadatas), dtype=bool, count=len(self.ids))
+                self._masks[key] = m
+            mask &= m
+        return mask
+
+    def search(self, queries: Sequence[Sequence[float]], k: int, where: Optional[Dict[str, Any]] = None) -> List[List[Tuple[int, float]]]:
+        """Top-k (row, cosine) per query; all queries in one [N, dim] x [dim, B] product."""
+        q = _normalise(np.asarray(queries, dtype=np.float32).reshape(len(queries), -1))
+        scores = np.asarray(self.matrix @ q.T)            # [N, B]
+        mask = self._mask(where)
+        if mask is not None:
+            scores = np.where(mask[:, None], scores, -np.inf)
+        k = min(k, scores.shape[0])
+        out: List[List[Tuple[int, float]]] = []
+        for col in range(scores.shape[1]):
+            s = scores[:, col]
+            top = np.argpartition(-s, k - 1)[:k] if k < len(s) else np.arange(len(s))
+            top = top[np.argsort(-s[top])]
+            out.append([(int(i), float(s[i])) for i in top if np.isfinite(s[i])])
+        return out
+
+    def query(self, embedding: Sequence[float], n: int, where: Optional[Dict[str, Any]] = None) -> List[Tuple[str, str, Dict[str, Any], float]]:
+        return [(self.ids[i], self.documents[i], self.metadatas[i], s) for i, s in self.search([embedding], n, where)[0]]
+
+
+_INDEXES: Dict[str, Tuple[float, Optional[VectorIndex]]] = {}
+_LOCK = threading.Lock()
+
+
+def get_index(name: str, root: str = VECTOR_DIR) -> Optional[VectorIndex]:
+    """Process-wide index for a collection, reloaded when bootstrap writes a newer export."""
+    npy, _ = _paths(name, root)
+    try:
+        mtime = os.path.getmtime(npy)
+    except OSError:
+        return None
+    with _LOCK:
+        cached = _INDEXES.get(name)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        try:
+            idx: Optional[VectorIndex] = VectorIndex(name, root)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"⚠️ Vector fallback for {name} unavailable: {e}")
+            idx = None
+        _INDEXES[name] = (mtime, idx)
+        return idx
@@ -0,0 +1,145 @@
+#===============================================================
+#Script Name: bench_asr.py
+#Script Location: /opt/RealmQuest/bot/bench_asr.py
+#Date: 10/19/2026
+#Created By: T03KNEE
+#Github: https://github.com/To3Knee/RealmQuest
+#Version: 1.0.0
+#About: Throughput benchmark for the ASR corrector (core/asr_correct.py) against the full
+#       language-pack bundle. Rules are read straight from the bundle zip and shaped exactly as
+#       `rq-pack-manager compile-redis` writes them, so no Mongo/Redis is needed:
+#         python bench_asr.py [--bundle ../tools/language/dnd-asr-language-pack-bundle-v1.1.0.zip]
+#       Reports compile time, automaton size, transcripts/s and chars/s, and the same workload
+#       through a naive one-regex-per-rule loop for comparison.
+#===============================================================
+
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import re
+import statistics
+import time
+import zipfile
+
+from core.asr_correct import CompiledRules, parse_context
+
+DEFAULT_BUNDLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools", "language",
+                              "dnd-asr-language-pack-bundle-v1.1.0.zip")
+
+FILLER = [
+    "I want to", "can I", "we head over to the", "my character tries to", "okay so I", "then we",
+    "does the", "I'd like to", "after that I", "roll for", "what is the", "I think the",
+]
+
+
+def load_bundle(path):
+    """(rules in compile-redis shape, pack rows) from the bundle's CSV (or JSONL)."""
+    z = zipfile.ZipFile(path)
+    names = z.namelist()
+    csv_name = next((n for n in names if n.endswith(".csv")), None)
+    if csv_name:
+        rows = list(csv.DictReader(io.StringIO(z.read(csv_name).decode("utf-8"))))
+    else:
+        jl = next(n for n in names if n.endswith(".jsonl"))
+        rows = [json.loads(l) for l in z.read(jl).decode("utf-8").splitlines() if l.strip()]
+    for r in rows:
+        r["confidence"] = float(r.get("confidence") or 1.0)
+        r["priority"] = int(r.get("priority") or 50)
+    rows.sort(key=lambda r: (r["priority"], r["confidence"]), reverse=True)
+    rules = [{
+        "pattern": r["heard"], "replacement": r["canonical"], "type": r.get("type", "phrase"),
+        "confidence": r["confidence"], "priority": r["priority"],
+        "context_include": parse_context(r.get("context_include")),
+        "context_exclude": parse_context(r.get("context_exclude")),
+    } for r in rows if r.get("type") != "hint"]
+    return rules, rows
+
+
+def transcripts(rows, rules, count, seed):
+    """Pack examples plus synthetic utterances mixing heard errors, canonical terms and filler."""
+    rnd = random.Random(seed)
+    out = [r["example_in"] for r in rows if r.get("example_in")]
+    heard = [r["pattern"] for r in rules]
+    hints = [r["heard"] for r in rows if r.get("type") == "hint"]
+    while len(out) < count:
+        words = []
+        for _ in range(rnd.randint(2, 5)):
+            words.append(rnd.choice(FILLER))
+            words.append(rnd.choice(heard) if rnd.random() < 0.3 else rnd.choice(hints))
+        s = " ".join(words)
+        out.append(s[:1].upper() + s[1:] + rnd.choice([".", "?", "!", ""]))
+    return out[:count]
+
+
+class NaiveRules:
+    """Baseline: every rule as its own word-bounded regex, applied in priority order."""
+
+    def __init__(self, rules):
+        seen, self.subs = set(), []
+        for r in rules:
+            p = r["pattern"].lower()
+            if p in seen or r["context_include"] or r["context_exclude"]:
+                continue
+            seen.add(p)
+            self.subs.append((re.compile(r"(?<!\w)" + re.escape(p) + r"(?!\w)", re.IGNORECASE), r["replacement"]))
+
+    def correct(self, text):
+        for rx, repl in self.subs:
+            text = rx.sub(repl, text)
+        return text
+
+
+def _run(fn, texts, rounds):
+    per_round = []
+    for _ in range(rounds):
+        t = time.perf_counter()
+        for s in texts:
+            fn(s)
+        per_round.append(time.perf_counter() - t)
+    return statistics.median(per_round)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bundle", default=DEFAULT_BUNDLE)
+    ap.add_argument("--transcripts", type=int, default=2000)
+    ap.add_argument("--rounds", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--skip-naive", action="store_true")
+    args = ap.parse_args()
+
+    rules, rows = load_bundle(args.bundle)
+    print(f"📦 {os.path.basename(args.bundle)}: {len(rows)} rows, {len(rules)} correction rules")
+
+    compiled = CompiledRules(rules)
+    print(f"🧩 Compiled: {compiled.stats()}")
+
+    texts = transcripts(rows, rules, args.transcripts, args.seed)
+    chars = sum(len(s) for s in texts)
+    changed = sum(1 for s in texts if compiled.correct(s)[1])
+    print(f"📝 {len(texts)} transcripts, {chars / len(texts):.0f} chars avg, {changed} corrected")
+
+    for r in rows:
+        if r.get("example_in") and r.get("example_out"):
+            print(f"   e.g. '{r['example_in']}' -> '{compiled.correct(r['example_in'])[0]}'")
+            break
+
+    secs = _run(compiled.correct, texts, args.rounds)
+    print(f"{'automaton':<12} {len(texts) / secs:10.0f} transcripts/s   {chars / secs / 1e6:6.2f} M chars/s   "
+          f"{secs / len(texts) * 1e6:8.1f} µs/transcript")
+
+    if args.skip_naive:
+        return
+    naive = NaiveRules(rules)
+    sample = texts[:max(1, len(texts) // 10)]
+    nsecs = _run(naive.correct, sample, 1) * len(texts) / len(sample)
+    print(f"{'naive regex':<12} {len(texts) / nsecs:10.0f} transcripts/s   {chars / nsecs / 1e6:6.2f} M chars/s   "
+          f"{nsecs / len(texts) * 1e6:8.1f} µs/transcript   ({len(naive.subs)} regexes)")
+    print(f"{'speedup':<12} {nsecs / secs:10.1f} x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+#===============================================================
+#Script Name: asr_correct.py
+#Script Location: /opt/RealmQuest/bot/core/asr_correct.py
+#Date: 10/19/2026
+#Created By: T03KNEE
+#Github: https://github.com/To3Knee/RealmQuest
+#Version: 1.0.0
+#About: Runtime ASR transcript correction from the compiled language packs.
+#       `rq-pack-manager compile-redis` writes the active heard -> canonical rules to
+#       rq:asr:rules (JSON list, sorted by priority then confidence) and bumps rq:asr:version.
+#       The rules are compiled once into an Aho-Corasick automaton over lowercase text, so a
+#       transcript is corrected in one linear pass regardless of how many rules are loaded:
+#         - whole-word matches only, leftmost-longest, non-overlapping
+#         - several rules for the same heard text are tried in priority/confidence order;
+#           guarded rules (context_include / context_exclude) only fire when their context holds,
+#           and a matching context_exclude vetoes every rule for that heard text ("cavern ... torch")
+#         - identity rules ("hit points" -> "hit points") claim their span and protect it
+#         - the replacement follows the heard text's capitalisation ("Cavern" -> "Tavern")
+#       The corrector polls rq:asr:version (at most every RQ_ASR_RELOAD_S seconds) and
+#       recompiles when it changes, so a pack compile takes effect without restarting the bot.
+#===============================================================
+
+import ast
+import json
+import logging
+import os
+import re
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+
+logger = logging.getLogger("rq.asr")
+
+RULES_KEY = "rq:asr:rules"
+VERSION_KEY = "rq:asr:version"
+
+MIN_CONFIDENCE = float(os.getenv("RQ_ASR_MIN_CONFIDENCE", "0.0"))
+RELOAD_S = float(os.getenv("RQ_ASR_RELOAD_S", "10"))
+
+
+def parse_context(value: Any) -> List[str]:
+    """Context lists arrive as lists (JSONL packs) or as their repr strings (CSV packs)."""
+    if isinstance(value, (list, tuple)):
+        return [str(v) for v in value if str(v).strip()]
+    s = str(value or "").strip()
+    if not s or s == "[]":
+        return []
+    try:
+        parsed = ast.literal_eval(s)
+        if isinstance(parsed, (list, tuple)):
+            return [str(v) for v in parsed if str(v).strip()]
+    except (ValueError, SyntaxError):
+        pass
+    return [p.strip() for p in s.split(",") if p.strip()]
+
+
+def _lower(text: str) -> str:
+    """Lowercase without changing length, so match offsets index the original transcript."""
+    low = text.replace("’", "'").lower()
+    if len(low) == len(text):
+        return low
+    return "".join(c if len(c.lower()) != 1 else c.lower() for c in text.replace("’", "'"))
+
+
+_LITERAL_RX = re.compile(r"[\w '-]+")
+
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum()
+
+
+def _match_case(heard: str, replacement: str) -> str:
+    if len(heard) > 1 and heard.isupper():
+        return replacement.upper()
+    if heard[:1].isupper() and replacement[:1].islower():
+        return replacement[:1].upper() + replacement[1:]
+    return replacement
+
+
+def _terms_regex(terms: List[str], heard: str) -> Optional["re.Pattern"]:
+    # "I _ to" is a template around the heard word itself.
+    alts = sorted({re.escape(_lower(t.replace("_", heard)).strip()) for t in terms if t.strip()}, key=len, reverse=True)
+    if not alts:
+        return None
+    return re.compile(r"(?<![^\W_])(?:" + "|".join(alts) + r")(?![^\W_])")
+
+
+class Rule:
+    __slots__ = ("pattern", "replacement", "type", "confidence", "priority", "include", "exclude")
+
+    def __init__(self, pattern: str, replacement: str, rtype: str, confidence: float, priority: int,
+                 include: List[str], exclude: List[str]):
+        self.pattern = pattern
+        self.replacement = replacement
+        self.type = rtype
+        self.confidence = confidence
+        self.priority = priority
+        self.include = _terms_regex(include, pattern)
+        self.exclude = _terms_regex(exclude, pattern)
+
+    @property
+    def guarded(self) -> bool:
+        return self.include is not None or self.exclude is not None
+
+    def allowed(self, low: str) -> bool:
+        if self.include is not None and not self.include.search(low):
+            return False
+        if self.exclude is not None and self.exclude.search(low):
+            return False
+        return True
+
+
+# -----------------------------
+# Compiled rule set
+# -----------------------------
+
+class CompiledRules:
+    """One immutable compile of a rule list: automaton + per-pattern candidate rules."""
+
+    def __init__(self, rules: List[Dict[str, Any]], min_confidence: float = MIN_CONFIDENCE, version: str = ""):
+        started = time.perf_counter()
+        self.version = version
+        by_pattern: Dict[str, List[Tuple[Tuple[int, float, int], Rule]]] = {}
+        regex_rules: List[Tuple[Tuple[int, float, int], "re.Pattern", Rule]] = []
+        skipped = 0
+        for pos, raw in enumerate(rules):
+            if not isinstance(raw, dict):
+                continue
+            pattern = _lower(str(raw.get("pattern") or "")).strip()
+            rtype = str(raw.get("type") or "phrase")
+            if not pattern or rtype == "hint":
+                continue
+            try:
+                conf = float(raw.get("confidence", 1.0))
+            except (TypeError, ValueError):
+                conf = 1.0
+            if conf < min_confidence:
+                skipped += 1
+                continue
+            try:
+                prio = int(raw.get("priority", 0))
+            except (TypeError, ValueError):
+                prio = 0
+            rule = Rule(pattern, str(raw.get("replacement") or ""), rtype, conf, prio,
+                        parse_context(raw.get("context_include")), parse_context(raw.get("context_exclude")))
+            # Older compiles carry no priority; their list order already is the ranking.
+            rank = (prio, conf, -pos)
+            # Pack "regex" rules are mostly guarded literals; only real expressions leave the automaton.
+            if rtype == "regex" and not _LITERAL_RX.fullmatch(pattern):
+                try:
+                    regex_rules.append((rank, re.compile(raw.get("pattern"), re.IGNORECASE), rule))
+                except re.error:
+                    skipped += 1
+                continue
+            by_pattern.setdefault(pattern, []).append((rank, rule))
+
+        self.patterns: List[str] = sorted(by_pattern)
+        self.candidates: List[List[Rule]] = [
+            [r for _, r in sorted(by_pattern[p], key=lambda x: x[0], reverse=True)] for p in self.patterns
+        ]
+        self.vetoes: List[List["re.Pattern"]] = [[r.exclude for r in c if r.exclude is not None] for c in self.candidates]
+        self.regex_rules = [(rx, r) for _, rx, r in sorted(regex_rules, key=lambda x: x[0], reverse=True)]
+        self.rule_count = sum(len(c) for c in self.candidates) + len(self.regex_rules)
+        self.skipped = skipped
+        self._build()
+        self.build_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    def _build(self) -> None:
+        goto: List[Dict[str, int]] = [{}]
+        fail: List[int] = [0]
+        out: List[Tuple[int, ...]] = [()]
+        for pid, pattern in enumerate(self.patterns):
+            node = 0
+            for ch in pattern:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({})
+                    fail.append(0)
+                    out.append(())
+                node = nxt
+            out[node] = out[node] + (pid,)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in goto[node].items():
+                queue.append(nxt)
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] = out[nxt] + out[fail[nxt]]
+        self._goto, self._fail, self._out = goto, fail, out
+
+    def matches(self, low: str) -> List[Tuple[int, int, int]]:
+        """(start, end, pattern id) for every whole-word pattern occurrence, in one pass."""
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self.patterns
+        n = len(low)
+        found = []
+        node = 0
+        for i, ch in enumerate(low):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node] and (i + 1 == n or not _is_word(low[i + 1])):
+                for pid in out[node]:
+                    start = i + 1 - len(patterns[pid])
+                    if start == 0 or not _is_word(low[start - 1]):
+                        found.append((start, i + 1, pid))
+        return found
+
+    def correct(self, text: str) -> Tuple[str, List[Tuple[str, str]]]:
+        """Corrected transcript and the (heard, replacement) pairs that were applied."""
+        if not text or (not self.patterns and not self.regex_rules):
+            return text, []
+        low = _lower(text)
+        parts: List[str] = []
+        applied: List[Tuple[str, str]] = []
+        cursor = 0
+        # Leftmost first, then longest; a span that is taken blocks anything overlapping it.
+        for start, end, pid in sorted(self.matches(low), key=lambda m: (m[0], m[0] - m[1])):
+            if start < cursor:
+                continue
+            if self.vetoes[pid] and any(rx.search(low) for rx in self.vetoes[pid]):
+                continue
+            rule = next((r for r in self.candidates[pid] if not r.guarded or r.allowed(low)), None)
+            if rule is None:
+                continue
+            heard = text[start:end]
+            if rule.replacement != rule.pattern:
+                fixed = _match_case(heard, rule.replacement)
+                if fixed != heard:
+                    applied.append((heard, fixed))
+                heard = fixed
+            parts.append(text[cursor:start])
+            parts.append(heard)
+            cursor = end
+        parts.append(text[cursor:])
+        result = "".join(parts)
+        for rx, rule in self.regex_rules:
+            if rule.guarded and not rule.allowed(_lower(result)):
+                continue
+            result, n = rx.subn(rule.replacement, result)
+            if n:
+                applied.append((rule.pattern, rule.replacement))
+        return result, applied
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version, "rules": self.rule_count, "patterns": len(self.patterns),
+            "regex": len(self.regex_rules), "skipped": self.skipped, "nodes": len(self._goto),
+            "build_ms": self.build_ms,
+        }
+
+
+# -----------------------------
+# Hot-reloading corrector
+# -----------------------------
+
+class AsrCorrector:
+    """Applies the Redis-compiled ASR rules; recompiles when rq:asr:version changes."""
+
+    def __init__(self, redis_client=None, reload_s: float = RELOAD_S, min_confidence: float = MIN_CONFIDENCE):
+        self.redis = redis_client
+        self.reload_s = reload_s
+        self.min_confidence = min_confidence
+        self.compiled: Optional[CompiledRules] = None
+        self._checked_at = 0.0
+        self.corrected = 0
+
+    def maybe_reload(self, force: bool = False) -> bool:
+        """Recompile when the version key moved (checked at most every reload_s seconds)."""
+        if self.redis is None:
+            return False
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.reload_s:
+            return False
+        self._checked_at = now
+        try:
+            version = str(self.redis.get(VERSION_KEY) or "")
+            if not force and self.compiled is not None and version == self.compiled.version:
+                return False
+            raw = self.redis.get(RULES_KEY)
+            rules = json.loads(raw) if raw else []
+        except Exception as e:
+            logger.warning(f"⚠️ ASR rules unavailable: {e}")
+            return False
+        # Swap in a complete compile; concurrent callers keep using the previous one meanwhile.
+        self.compiled = CompiledRules(rules if isinstance(rules, list) else [], self.min_confidence, version)
+        logger.info(f"✅ ASR rules loaded: {self.compiled.stats()}")
+        return True
+
+    def correct(self, text: str) -> str:
+        self.maybe_reload()
+        compiled = self.compiled
+        if compiled is None or not text:
+            return text
+        try:
+            fixed, applied = compiled.correct(text)
+        except Exception as e:
+            logger.warning(f"⚠️ ASR correction failed: {e}")
+            return text
+        if applied:
+            self.corrected += 1
+            logger.info(f"🔤 ASR fix: {applied}")
+        return fixed
+
+    def stats(self) -> Dict[str, Any]:
+        base = self.compiled.stats() if self.compiled is not None else {"rules": 0}
+        return {**base, "corrected": self.corrected}
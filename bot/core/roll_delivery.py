@@ -0,0 +1,251 @@
+#===============================================================
+#Script Name: roll_delivery.py
+#Script Location: /opt/RealmQuest/bot/core/roll_delivery.py
+#Date: 10/19/2026
+#Created By: T03KNEE
+#Github: https://github.com/To3Knee/RealmQuest
+#Version: 1.0.1
+#About: Delivery engine for roll announcements.
+#       - One bounded queue + worker per Discord channel.
+#       - Embeds that arrive close together are coalesced into one message (Discord max: 10 embeds,
+#         6000 characters), so a stat block plus six initiative rolls is one or two sends, not seven.
+#       - Token-bucket pacing under Discord's per-channel limit; discord.py retries 429s itself, and a
+#         429 that still surfaces empties the lane's bucket with exponential backoff.
+#       - Latency / drop counters for !status and !rollfeed.
+#===============================================================
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import discord
+
+
+logger = logging.getLogger("rq.roll_watcher")
+
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_CHARS_PER_MESSAGE = 6000
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = max(0.01, float(rate))
+        self.capacity = max(1, int(capacity))
+        self._tokens = float(self.capacity)
+        self._stamp = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    async def acquire(self):
+        while True:
+            self._refill()
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return
+            await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+    def drain(self, seconds: float):
+        """Server said slow down: empty the bucket and push the next token out by `seconds`."""
+        self._tokens = 0.0
+        self._stamp = time.monotonic() + max(0.0, float(seconds))
+
+
+class DeliveryMetrics:
+    """Counters plus a rolling window of per-event latencies (roll created -> message sent)."""
+
+    def __init__(self, window: int = 500):
+        self.enqueued = 0
+        self.delivered = 0
+        self.messages = 0
+        self.dropped = 0
+        self.failed = 0
+        self.rate_limited = 0
+        self._latencies: Deque[float] = deque(maxlen=max(10, int(window)))
+
+    def observe(self, latency: float):
+        if latency >= 0:
+            self._latencies.append(latency)
+
+    def snapshot(self) -> Dict[str, Any]:
+        lat = sorted(self._latencies)
+
+        def pct(q: float) -> Optional[float]:
+            if not lat:
+                return None
+            return round(lat[min(len(lat) - 1, int(q * (len(lat) - 1) + 0.5))], 3)
+
+        return {
+            "enqueued": self.enqueued,
+            "delivered": self.delivered,
+            "messages": self.messages,
+            "embeds_per_message": round(self.delivered / self.messages, 2) if self.messages else None,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "rate_limited": self.rate_limited,
+            "latency_p50_s": pct(0.50),
+            "latency_p95_s": pct(0.95),
+            "latency_max_s": round(lat[-1], 3) if lat else None,
+        }
+
+
+# (embed, roll created_at_epoch, roll_id)
+_Item = Tuple[discord.Embed, float, Optional[str]]
+
+
+class _ChannelLane:
+    def __init__(self, channel_id: int, max_queue: int, rate: float, burst: int):
+        self.channel_id = channel_id
+        self.queue: "asyncio.Queue[_Item]" = asyncio.Queue(maxsize=max_queue)
+        self.bucket = TokenBucket(rate, burst)
+        self.task: Optional[asyncio.Task] = None
+        # An item that did not fit the previous message; it opens the next batch.
+        self.carry: Optional[_Item] = None
+
+
+class RollDelivery:
+    """
+    Channel-aware send queue used by RollWatcher.
+
+    enqueue() never blocks the poller: when a channel's queue is full the oldest pending
+    embed is dropped (and counted) so the feed stays current.
+    """
+
+    def __init__(
+        self,
+        bot: discord.Client,
+        coalesce_window: float = 0.35,
+        max_queue: int = 200,
+        rate: float = 1.0,
+        burst: int = 5,
+        max_retries: int = 3,
+    ):
+        self.bot = bot
+        self.coalesce_window = max(0.0, float(coalesce_window))
+        self.max_queue = max(10, int(max_queue))
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max(0, int(max_retries))
+        self.metrics = DeliveryMetrics()
+        self._lanes: Dict[int, _ChannelLane] = {}
+
+    def queue_depth(self) -> int:
+        return sum(l.queue.qsize() + (l.carry is not None) for l in self._lanes.values())
+
+    def snapshot(self) -> Dict[str, Any]:
+        out = self.metrics.snapshot()
+        out["queued"] = self.queue_depth()
+        out["channels"] = len(self._lanes)
+        return out
+
+    def enqueue(self, channel_id: int, embed: discord.Embed, created_at_epoch: float = 0.0, roll_id: Optional[str] = None):
+        lane = self._lanes.get(channel_id)
+        if lane is None:
+            lane = _ChannelLane(channel_id, self.max_queue, self.rate, self.burst)
+            self._lanes[channel_id] = lane
+        if lane.task is None or lane.task.done():
+            lane.task = asyncio.create_task(self._worker(lane), name=f"rq_roll_delivery_{channel_id}")
+
+        if lane.queue.full():
+            try:
+                _, _, old_id = lane.queue.get_nowait()
+                self.metrics.dropped += 1
+                logger.warning(f"Roll delivery queue full for channel {channel_id}; dropped roll_id={old_id}")
+            except asyncio.QueueEmpty:
+                pass
+        lane.queue.put_nowait((embed, float(created_at_epoch or time.time()), roll_id))
+        self.metrics.enqueued += 1
+
+    async def close(self):
+        for lane in self._lanes.values():
+            if lane.task and not lane.task.done():
+                lane.task.cancel()
+        for lane in self._lanes.values():
+            if lane.task:
+                try:
+                    await lane.task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._lanes.clear()
+
+    async def _resolve_channel(self, channel_id: int):
+        channel = self.bot.get_channel(channel_id)
+        if channel is None:
+            try:
+                channel = await self.bot.fetch_channel(channel_id)
+            except Exception as e:
+                logger.warning(f"Roll delivery cannot resolve channel {channel_id}: {e}")
+                return None
+        return channel
+
+    async def _collect(self, lane: _ChannelLane) -> List[_Item]:
+        """Wait for one item, then keep taking items for `coalesce_window` or until a message is full."""
+        if lane.carry is not None:
+            batch = [lane.carry]
+            lane.carry = None
+        else:
+            batch = [await lane.queue.get()]
+        chars = len(batch[0][0])
+        deadline = time.monotonic() + self.coalesce_window
+        while len(batch) < MAX_EMBEDS_PER_MESSAGE:
+            try:
+                if lane.queue.empty():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    item = await asyncio.wait_for(lane.queue.get(), timeout=remaining)
+                else:
+                    item = lane.queue.get_nowait()
+            except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                break
+            size = len(item[0])
+            if chars + size > MAX_CHARS_PER_MESSAGE:
+                # Does not fit this message: it leads the next one.
+                lane.carry = item
+                break
+            batch.append(item)
+            chars += size
+        return batch
+
+    async def _worker(self, lane: _ChannelLane):
+        while True:
+            batch = await self._collect(lane)
+            channel = await self._resolve_channel(lane.channel_id)
+            if channel is None:
+                self.metrics.failed += len(batch)
+                continue
+            await self._send(lane, channel, batch)
+
+    async def _send(self, lane: _ChannelLane, channel, batch: List[_Item]):
+        embeds = [it[0] for it in batch]
+        for attempt in range(self.max_retries + 1):
+            await lane.bucket.acquire()
+            try:
+                await channel.send(embeds=embeds)
+                now = time.time()
+                self.metrics.messages += 1
+                self.metrics.delivered += len(batch)
+                for _, created, _ in batch:
+                    self.metrics.observe(now - created)
+                return
+            except discord.HTTPException as e:
+                status = getattr(e, "status", 500)
+                if status == 429 and attempt < self.max_retries:
+                    self.metrics.rate_limited += 1
+                    lane.bucket.drain(1.0 * (2 ** attempt))
+                    continue
+                if status >= 500 and attempt < self.max_retries:
+                    await asyncio.sleep(0.5 * (2 ** attempt))
+                    continue
+                logger.warning(f"Discord send failed for {len(batch)} roll(s) ({[it[2] for it in batch]}): {e}")
+                break
+            except Exception as e:
+                logger.warning(f"Discord send failed for {len(batch)} roll(s) ({[it[2] for it in batch]}): {e}")
+                break
+        self.metrics.failed += len(batch)
@@ -4,10 +4,16 @@
 #Date: 02/01/2026
 #Created By: T03KNEE
 #Github: https://github.com/To3Knee/RealmQuest
-#Version: 1.1.7
+#Version: 1.3.1
 #About: Polls the API roll feed and posts new roll events to the same Discord text channel used for narration/listening.
 #       Enhanced formatting: keep/drop (adv/dis), stat blocks, percentile notation, and safer channel routing via Redis key rq_text_channel_id.
 #       Additive, no portal UI drift.
+#       1.2.0: one long-lived aiohttp session for polling; sends go through RollDelivery
+#              (coalesced multi-embed messages, token-bucket pacing, latency/drop metrics).
+#       1.3.0: supervisor mode: Redis campaign -> channel bindings (rq:roll_bindings), one consumer
+#              per bound campaign with its own cursor (rq:roll_cursors). Unbound = legacy single feed.
+#       1.3.1: cursors are (created_at_epoch, roll_id) (rq:roll_cursor_ids / rq_last_seen_roll_id), passed
+#              as since_epoch + since_id, so rolls sharing an epoch are not skipped.
 #===============================================================
 
 import asyncio
@@ -16,14 +22,24 @@ import time
 import datetime
 import os
 import re
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import aiohttp
 import discord
 
+from core.roll_delivery import RollDelivery
+
 
 logger = logging.getLogger("rq.roll_watcher")
 
+# Redis hashes: campaign_id -> channel_id, campaign_id -> last announced created_at_epoch / roll_id.
+BINDINGS_KEY = "rq:roll_bindings"
+CURSORS_KEY = "rq:roll_cursors"
+CURSOR_IDS_KEY = "rq:roll_cursor_ids"
+
+# Consumer key for the legacy feed (active campaign -> rq_text_channel_id).
+ACTIVE_FEED = ""
+
 
 def _safe_int(v: Any) -> Optional[int]:
     try:
@@ -94,14 +110,17 @@ def _fmt_dice_list(raw: List[int], kept: Optional[List[int]] = None) -> str:
 
 class RollWatcher:
     """
-    RollWatcher continuously polls the API's /game/rolls endpoint and announces new rolls.
+    RollWatcher supervises one consumer per campaign feed and announces new rolls.
 
-    Channel routing:
-    - Uses Redis key 'rq_text_channel_id' (string) when available.
-    - Falls back to in-memory last_channel_id if provided.
+    Campaign bindings:
+    - Redis hash 'rq:roll_bindings' maps campaign_id -> Discord channel id (see bind()/unbind()).
+    - Each bound campaign gets its own consumer polling /game/rolls?campaign_id=..&since_epoch=..
+      with an independent (epoch, roll_id) cursor in 'rq:roll_cursors' / 'rq:roll_cursor_ids',
+      so tables never cross-talk or rescan.
 
-    Deduping:
-    - Uses Redis key 'rq_last_seen_roll_epoch' and 'rq_last_seen_roll_id' (optional).
+    Legacy routing (no bindings):
+    - Follows the active campaign into 'rq_text_channel_id' / RQ_TEXT_CHANNEL_ID / in-memory channel.
+    - Deduping uses Redis keys 'rq_last_seen_roll_epoch' and 'rq_last_seen_roll_id' (optional).
     """
 
     def __init__(
@@ -122,6 +141,17 @@ class RollWatcher:
         self._env_channel_id = _safe_int(os.getenv("RQ_TEXT_CHANNEL_ID") or os.getenv("REALMQUEST_TEXT_CHANNEL_ID") or "")
         self._task: Optional[asyncio.Task] = None
         self._stop = asyncio.Event()
+        self._consumers: Dict[str, asyncio.Task] = {}
+        self._bindings: Dict[str, int] = {}
+        self._mem_cursors: Dict[str, Tuple[float, Optional[str]]] = {}
+        self.bindings_refresh = max(1.0, float(os.getenv("ROLL_BINDINGS_REFRESH", "5.0")))
+        self._http: Optional[aiohttp.ClientSession] = None
+        self.delivery = RollDelivery(
+            bot,
+            coalesce_window=float(os.getenv("ROLL_COALESCE_WINDOW", "0.35")),
+            rate=float(os.getenv("ROLL_SEND_RATE", "1.0")),
+            burst=int(os.getenv("ROLL_SEND_BURST", "5")),
+        )
 
     def start(self):
         if self._task and not self._task.done():
@@ -136,6 +166,60 @@ class RollWatcher:
                 await asyncio.wait_for(self._task, timeout=5.0)
             except Exception:
                 pass
+        await self._stop_consumers(list(self._consumers))
+        await self.delivery.close()
+        if self._http and not self._http.closed:
+            await self._http.close()
+        self._http = None
+
+    def metrics(self) -> Dict[str, Any]:
+        out = self.delivery.snapshot()
+        out["feeds"] = len(self._consumers)
+        return out
+
+    # -----------------------------
+    # Campaign bindings
+    # -----------------------------
+
+    def bindings(self) -> Dict[str, int]:
+        """Current campaign -> channel map (Redis is canonical; memory covers Redis outages)."""
+        if self.r:
+            try:
+                raw = self.r.hgetall(BINDINGS_KEY) or {}
+                parsed = {str(k): _safe_int(v) for k, v in raw.items()}
+                self._bindings = {k: v for k, v in parsed.items() if k and v}
+            except Exception:
+                pass
+        return dict(self._bindings)
+
+    def bind(self, campaign_id: str, channel_id: int):
+        cid = str(campaign_id or "").strip()
+        if not cid:
+            raise ValueError("campaign_id required")
+        self._bindings[cid] = int(channel_id)
+        if self.r:
+            try:
+                self.r.hset(BINDINGS_KEY, cid, str(int(channel_id)))
+            except Exception as e:
+                logger.warning(f"Roll binding not persisted for {cid}: {e}")
+
+    def unbind(self, campaign_id: str) -> bool:
+        cid = str(campaign_id or "").strip()
+        existed = self._bindings.pop(cid, None) is not None
+        if self.r:
+            try:
+                existed = bool(self.r.hdel(BINDINGS_KEY, cid)) or existed
+                self.r.hdel(CURSORS_KEY, cid)
+                self.r.hdel(CURSOR_IDS_KEY, cid)
+            except Exception:
+                pass
+        return existed
+
+    def _session(self) -> aiohttp.ClientSession:
+        # One pooled session for the watcher's lifetime (keep-alive to the API).
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=8))
+        return self._http
 
     def _get_text_channel_id(self) -> Optional[int]:
         # 0) Env override (stable channel binding across restarts)
@@ -158,36 +242,61 @@ class RollWatcher:
                 pass
         return None
 
-    def _get_last_seen_epoch(self) -> float:
+    def _get_last_seen(self, campaign_id: str = ACTIVE_FEED) -> Tuple[float, Optional[str]]:
+        """(created_at_epoch, roll_id) of the last announced roll; roll_id is None for older cursors."""
         if self.r:
             try:
-                v = self.r.get("rq_last_seen_roll_epoch")
+                if campaign_id:
+                    v = self.r.hget(CURSORS_KEY, campaign_id)
+                    rid = self.r.hget(CURSOR_IDS_KEY, campaign_id)
+                else:
+                    v = self.r.get("rq_last_seen_roll_epoch")
+                    rid = self.r.get("rq_last_seen_roll_id")
                 if v:
-                    return float(v)
+                    return float(v), (rid or None)
             except Exception:
                 pass
-        return 0.0
+        return self._mem_cursors.get(campaign_id, (0.0, None))
 
-    def _set_last_seen(self, epoch: float, roll_id: Optional[str] = None):
+    def _set_last_seen(self, epoch: float, roll_id: Optional[str] = None, campaign_id: str = ACTIVE_FEED):
+        # In-memory copy keeps cursors moving when Redis is down.
+        self._mem_cursors[campaign_id] = (float(epoch), roll_id)
         if not self.r:
             return
         try:
-            self.r.set("rq_last_seen_roll_epoch", str(epoch))
+            if campaign_id:
+                self.r.hset(CURSORS_KEY, campaign_id, repr(float(epoch)))
+                if roll_id:
+                    self.r.hset(CURSOR_IDS_KEY, campaign_id, roll_id)
+                else:
+                    self.r.hdel(CURSOR_IDS_KEY, campaign_id)
+                return
+            self.r.set("rq_last_seen_roll_epoch", repr(float(epoch)))
             if roll_id:
                 self.r.set("rq_last_seen_roll_id", roll_id)
+            else:
+                self.r.delete("rq_last_seen_roll_id")
         except Exception:
             pass
 
-    async def _fetch_rolls(self) -> List[Dict[str, Any]]:
-        url = f"{self.api_url}/game/rolls?limit={self.limit}"
+    async def _fetch_rolls(
+        self, campaign_id: str = ACTIVE_FEED, since_epoch: Optional[float] = None, since_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        params: Dict[str, Any] = {"limit": self.limit}
+        if campaign_id:
+            params["campaign_id"] = campaign_id
+        if since_epoch is not None:
+            params["since_epoch"] = repr(float(since_epoch))
+            if since_id:
+                params["since_id"] = since_id
+        url = f"{self.api_url}/game/rolls"
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, timeout=aiohttp.ClientTimeout(total=8)) as resp:
-                    if resp.status != 200:
-                        return []
-                    data = await resp.json()
-                    if isinstance(data, list):
-                        return data
+            async with self._session().get(url, params=params) as resp:
+                if resp.status != 200:
+                    return []
+                data = await resp.json()
+                if isinstance(data, list):
+                    return data
         except Exception as e:
             logger.debug(f"poll failed: {e}")
         return []
@@ -467,32 +576,66 @@ class RollWatcher:
         return embed
 
     async def _announce(self, channel_id: int, events: List[Dict[str, Any]]):
-        channel = self.bot.get_channel(channel_id)
-        if channel is None:
-            try:
-                channel = await self.bot.fetch_channel(channel_id)
-            except Exception:
-                return
-
+        # Hand off to the delivery queue; the poller never waits on Discord.
         for ev in events:
             try:
-                await channel.send(embed=self._format_embed(ev))
+                embed = self._format_embed(ev)
             except Exception as e:
-                logger.warning(f"Discord send failed for roll_id={ev.get('roll_id')}: {e}")
+                logger.warning(f"Roll embed format failed for roll_id={ev.get('roll_id')}: {e}")
+                continue
+            try:
+                created = float(ev.get("created_at_epoch") or 0.0)
+            except Exception:
+                created = 0.0
+            self.delivery.enqueue(channel_id, embed, created, ev.get("roll_id"))
+
+    async def _stop_consumers(self, keys: List[str]):
+        tasks = [self._consumers.pop(k) for k in keys if k in self._consumers]
+        for t in tasks:
+            t.cancel()
+        for t in tasks:
+            try:
+                await t
+            except (asyncio.CancelledError, Exception):
+                pass
 
     async def _run(self):
         await self.bot.wait_until_ready()
         logger.info("🎲 RollWatcher online.")
 
-        # Avoid replaying historical rolls on fresh start unless explicitly desired.
+        while not self._stop.is_set():
+            bound = self.bindings()
+            wanted = set(bound) or {ACTIVE_FEED}
+
+            stale = [k for k in self._consumers if k not in wanted or self._consumers[k].done()]
+            await self._stop_consumers(stale)
+            for key in wanted:
+                if key not in self._consumers:
+                    label = key or "active campaign"
+                    logger.info(f"🎲 RollWatcher feed started: {label}")
+                    self._consumers[key] = asyncio.create_task(self._consume(key), name=f"rq_roll_feed_{key or 'active'}")
+
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.bindings_refresh)
+            except asyncio.TimeoutError:
+                pass
+
+    def _channel_for(self, campaign_id: str) -> Optional[int]:
+        if campaign_id:
+            return self._bindings.get(campaign_id)
+        return self._get_text_channel_id()
+
+    async def _consume(self, campaign_id: str):
+        """Poll one campaign feed (or the legacy active feed) and enqueue new rolls."""
+        # Avoid replaying historical rolls on a fresh binding/start unless explicitly desired.
         try:
-            if self._get_last_seen_epoch() <= 0.0:
-                self._set_last_seen(time.time(), None)
+            if self._get_last_seen(campaign_id)[0] <= 0.0:
+                self._set_last_seen(time.time(), None, campaign_id)
         except Exception:
             pass
 
         while not self._stop.is_set():
-            channel_id = self._get_text_channel_id()
+            channel_id = self._channel_for(campaign_id)
             if not channel_id:
                 # If no channel is bound, we can't announce. Log occasionally.
                 try:
@@ -506,27 +649,25 @@ class RollWatcher:
                 await asyncio.sleep(self.poll_interval)
                 continue
 
-            last_epoch = self._get_last_seen_epoch()
-            rolls = await self._fetch_rolls()
+            last = self._get_last_seen(campaign_id)
+            rolls = await self._fetch_rolls(campaign_id, since_epoch=last[0], since_id=last[1])
 
+            # Same (created_at_epoch, roll_id) order as the API's keyset.
             new_events = []
-            newest_epoch = last_epoch
-            newest_id = None
-
             for ev in rolls:
                 try:
-                    ev_epoch = float(ev.get("created_at_epoch") or 0.0)
+                    key = (float(ev.get("created_at_epoch") or 0.0), str(ev.get("roll_id") or ""))
                 except Exception:
-                    ev_epoch = 0.0
-                if ev_epoch > last_epoch + 1e-6:
-                    new_events.append(ev)
-                if ev_epoch > newest_epoch:
-                    newest_epoch = ev_epoch
-                    newest_id = ev.get("roll_id")
+                    continue
+                if key > (last[0], last[1] or ""):
+                    new_events.append((key, ev))
 
             if new_events:
-                new_events.sort(key=lambda x: float(x.get("created_at_epoch") or 0.0))
-                await self._announce(channel_id, new_events)
-                self._set_last_seen(newest_epoch, newest_id)
+                new_events.sort(key=lambda x: x[0])
+                await self._announce(channel_id, [ev for _, ev in new_events])
+                newest_epoch, newest_id = new_events[-1][0]
+                self._set_last_seen(newest_epoch, newest_id or None, campaign_id)
 
-            await asyncio.sleep(self.poll_interval)
+            # A full page means more are waiting: fetch the next page right away.
+            if not new_events or len(rolls) < self.limit:
+                await asyncio.sleep(self.poll_interval)
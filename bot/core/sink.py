@@ -11,7 +11,7 @@
 # Script Name: sink.py
 # Script Location: /opt/RealmQuest/bot/core/sink.py
 # Date: 2026-01-27
-# Version: 21.0.0 (Priority Hearing)
+# Version: 21.1.0 (ASR corrections before chat/generate)
 # ===============================================================
 
 import asyncio
@@ -147,6 +147,12 @@ class ZeroLatencySink(voice_recv.AudioSink):
                         res = await resp.json()
                         text = res.get("text", "").strip()
                         print(f"📝 HEARD: '{text}'", flush=True)
+                        corrector = getattr(self.bot, "asr_corrector", None)
+                        if corrector and text:
+                            fixed = corrector.correct(text)
+                            if fixed != text:
+                                print(f"🔤 CORRECTED: '{fixed}'", flush=True)
+                                text = fixed
         except Exception: return
         
         if not text or len(text) < 5: 
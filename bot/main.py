@@ -2,7 +2,7 @@
 # Script Name: main.py
 # Script Location: /opt/RealmQuest/bot/main.py
 # Date: 2026-01-26
-# Version: 18.51.0 (RollWatcher start fix + channel persistence)
+# Version: 18.54.0 (ASR transcript correction from compiled language packs)
 # ===============================================================
 
 import discord
@@ -18,6 +18,7 @@ from discord.ui import Button, View
 from core.config import DISCORD_TOKEN, API_URL, SCRIBE_URL
 from core.sink import ZeroLatencySink
 from core.roll_watcher import RollWatcher
+from core.asr_correct import AsrCorrector
 
 from discord import opus
 _orig = opus.Decoder.decode
@@ -190,6 +191,13 @@ async def status_check(ctx):
                     report.append(f"✅ **Campaign:** {camp} (Physics Active)")
     except: pass
 
+    # 5. Roll feed delivery
+    watcher = getattr(bot, "roll_watcher", None)
+    if watcher:
+        m = watcher.metrics()
+        p95 = f"{m['latency_p95_s']}s" if m["latency_p95_s"] is not None else "n/a"
+        report.append(f"🎲 **Roll Feed:** {m['delivered']} delivered, {m['dropped']} dropped, p95 {p95}")
+
     # Send
     embed = discord.Embed(title="🛡️ System Status Diagnostics", description="\n".join(report), color=0x3498db)
     if isinstance(ctx, discord.Interaction): await ctx.response.send_message(embed=embed)
@@ -197,12 +205,47 @@ async def status_check(ctx):
 
 @bot.command(aliases=["help", "commands"])
 async def menu(ctx):
-    desc = "`!buttons` - Open Control Deck\n`!status` - Run System Diagnostics"
+    desc = "`!buttons` - Open Control Deck\n`!status` - Run System Diagnostics\n`!rollfeed` - Roll Announcement Metrics\n`!rollbind [campaign]` - Post a Campaign's Rolls Here\n`!rollunbind [campaign]` - Stop Posting a Campaign's Rolls"
     await ctx.send(embed=discord.Embed(title="📜 RealmQuest Interface", description=desc, color=0x9b59b6))
 
 @bot.command()
 async def status(ctx): await status_check(ctx)
 
+@bot.command()
+async def rollfeed(ctx):
+    watcher = getattr(bot, "roll_watcher", None)
+    if not watcher: return await ctx.send("⚠️ RollWatcher not running.", delete_after=5)
+    m = watcher.metrics()
+    lines = [f"**{k.replace('_', ' ')}:** {'n/a' if v is None else v}" for k, v in m.items()]
+    bound = watcher.bindings()
+    lines.append("**bindings:** " + (", ".join(f"{c} → <#{ch}>" for c, ch in sorted(bound.items())) if bound else "none (active campaign feed)"))
+    await ctx.send(embed=discord.Embed(title="🎲 Roll Feed Delivery", description="\n".join(lines), color=0x9b59b6))
+
+async def _active_campaign_id():
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"{API_URL}/system/config") as r:
+                if r.status == 200: return (await r.json()).get("active_campaign")
+    except: pass
+    return None
+
+@bot.command()
+async def rollbind(ctx, campaign_id: str = None):
+    watcher = getattr(bot, "roll_watcher", None)
+    if not watcher: return await ctx.send("⚠️ RollWatcher not running.", delete_after=5)
+    campaign_id = campaign_id or await _active_campaign_id()
+    if not campaign_id: return await ctx.send("❌ No campaign given and no active campaign.", delete_after=5)
+    watcher.bind(campaign_id, ctx.channel.id)
+    await ctx.send(f"🎲 Rolls for **{campaign_id}** will post here.", delete_after=10)
+
+@bot.command()
+async def rollunbind(ctx, campaign_id: str = None):
+    watcher = getattr(bot, "roll_watcher", None)
+    if not watcher: return await ctx.send("⚠️ RollWatcher not running.", delete_after=5)
+    campaign_id = campaign_id or await _active_campaign_id()
+    if campaign_id and watcher.unbind(campaign_id): await ctx.send(f"🎲 Unbound **{campaign_id}**.", delete_after=10)
+    else: await ctx.send("⚠️ No such binding.", delete_after=5)
+
 @bot.command(aliases=['join'])
 async def buttons(ctx):
     if ctx.author.voice:
@@ -229,6 +272,11 @@ async def on_ready():
     for guild in bot.guilds:
         await sync_roster_to_redis(guild)
 
+    # ASR corrections (rq:asr:rules); the sink applies them to every transcript.
+    if not hasattr(bot, 'asr_corrector'):
+        bot.asr_corrector = AsrCorrector(r_client)
+        bot.asr_corrector.maybe_reload(force=True)
+
     # Start RollWatcher once the bot is ready (additive; no UI drift)
     if not hasattr(bot, '_roll_watcher_started'):
         try:
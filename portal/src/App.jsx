@@ -3398,6 +3398,7 @@ function ServiceRow({ name, id, onRestart, onViewLogs }) {
 
 function LogTerminal({ service, onClose, isModal }) {
     const [logs, setLogs] = useState("Fetching stream...");
+    const [streamKey, setStreamKey] = useState(0);
     const fetch = async () => { 
         try { 
             const res = await axios.get(`${API_URL}/system/control/logs/${service}`); 
@@ -3415,17 +3416,40 @@ function LogTerminal({ service, onClose, isModal }) {
     };
 
     useEffect(() => {
-        fetch();
-        const interval = setInterval(fetch, 3000); 
-        return () => clearInterval(interval);
-    }, [service]);
+        // Follow mode: the server replays the tail once, then pushes only new lines.
+        // EventSource resumes from the last line id on reconnect; polling is the fallback.
+        if (typeof EventSource === "undefined") {
+            fetch();
+            const interval = setInterval(fetch, 3000);
+            return () => clearInterval(interval);
+        }
+        const MAX_LINES = 2000;
+        let lines = [];
+        let frame = null;
+        const flush = () => { frame = null; setLogs(lines.length ? lines.join("\n") : "No logs available."); };
+        const schedule = () => { if (!frame) frame = setTimeout(flush, 100); };
+        const es = new EventSource(`${API_URL}/system/control/logs/${service}/stream?tail=400`);
+        es.onmessage = (ev) => {
+            lines.push(ev.data);
+            if (lines.length > MAX_LINES) lines = lines.slice(-MAX_LINES);
+            schedule();
+        };
+        es.addEventListener("ready", schedule);
+        es.addEventListener("gap", (ev) => {
+            try { lines.push(`[... ${JSON.parse(ev.data).dropped || "some"} lines skipped ...]`); } catch (e) { /* ignore */ }
+            schedule();
+        });
+        es.addEventListener("end", () => { es.close(); lines.push("[stream ended]"); schedule(); });
+        es.onerror = () => { if (es.readyState === EventSource.CLOSED) fetch(); };
+        return () => { es.close(); if (frame) clearTimeout(frame); };
+    }, [service, streamKey]);
 
     return (
         <div className={isModal ? "fixed inset-0 z-50 flex items-center justify-center bg-black/80 backdrop-blur-sm p-10 animate-fade-in" : "w-full h-full"}>
             <div className={isModal ? "w-full max-w-4xl h-[80vh] bg-[#0a0a0a] border border-white/20 rounded-xl shadow-2xl flex flex-col overflow-hidden" : "w-full h-full flex flex-col"}>
                 <div className="h-12 border-b border-white/10 flex items-center justify-between px-6 bg-white/5"><div className="flex items-center gap-2"><Terminal size={16} className="text-yellow-600" /><span className="font-mono text-xs uppercase tracking-widest text-white">Live Terminal // {service}</span></div>
                 <div className="flex gap-2">
-                    <button onClick={fetch} className="text-gray-500 hover:text-white"><RefreshCw size={14} /></button>
+                    <button onClick={() => setStreamKey(k => k + 1)} className="text-gray-500 hover:text-white"><RefreshCw size={14} /></button>
                     {isModal && <button onClick={onClose} className="text-gray-500 hover:text-white"><X size={18} /></button>}
                 </div>
                 </div>
@@ -1,11 +1,12 @@
 #!/usr/bin/env python3
 # =============================================================================
 # Script Name: rq-pack-manager.py
-# Version: 1.0.3 (Fixes Name Mismatch & Dict Keys)
+# Version: 1.0.4 (compile-redis: priority/context fields + rq:asr:version bump)
 # Date: 2026-01-27
 # =============================================================================
 
 import argparse
+import ast
 import csv
 import io
 import json
@@ -165,6 +166,17 @@ def import_pack(zip_path: str, kind: str, pack_name_arg: str, version: str, enab
     print(f"Pack enabled: {pack_meta['name']}")
     client.close()
 
+def parse_list(value):
+    # CSV packs store context lists as their repr ("['inn', 'ale']"); JSONL may carry real lists.
+    if isinstance(value, list): return value
+    s = str(value or "").strip()
+    if not s or s == "[]": return []
+    try:
+        v = ast.literal_eval(s)
+        return [str(x) for x in v] if isinstance(v, (list, tuple)) else [str(v)]
+    except Exception:
+        return [x.strip() for x in s.split(",") if x.strip()]
+
 def compile_asr_to_redis(db, rds):
     enabled_packs = list(db["rq_packs"].find({"kind": "asr", "enabled": True}))
     if not enabled_packs:
@@ -192,7 +204,10 @@ def compile_asr_to_redis(db, rds):
                 "pattern": r["heard"],
                 "replacement": r["canonical"],
                 "type": rtype,
-                "confidence": r["confidence"]
+                "confidence": r["confidence"],
+                "priority": r.get("priority", 0),
+                "context_include": parse_list(r.get("context_include")),
+                "context_exclude": parse_list(r.get("context_exclude"))
             })
     
     if not active_rules and not active_hints:
@@ -204,7 +219,8 @@ def compile_asr_to_redis(db, rds):
     pipe.delete("rq:asr:hints")
     if active_hints:
         pipe.sadd("rq:asr:hints", *list(active_hints))
-    
+    # The bot's ASR corrector recompiles when this moves.
+    pipe.incr("rq:asr:version")
     pipe.execute()
     print(f"Redis compiled: {len(active_rules)} rules active.")
 